@@ -1,27 +1,53 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import json
+import random
 import re
-from dataclasses import dataclass
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Protocol, Tuple
 
 
 PROMPT_DIR = Path(__file__).parent / "prompts"
-SHORT_NOTE_THRESHOLD = 20
-STOPWORDS = {
-    "저는",
-    "나는",
-    "제가",
-    "우리",
-    "그리고",
-    "하지만",
-    "그러나",
-    "다만",
-    "이것",
-    "그것",
-    "주장",
+# 공용 모듈(instrument 등)은 backend/에 있습니다.
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from instrument import StageTimer, profiled, stage, use_timer  # noqa: E402
+from korean_text import STOPWORDS, sentence_scope, split_sentences  # noqa: E402
+from korean_text import extract_keywords as scan_keywords  # noqa: E402
+from model_backend import ModelBackend, ModelUnavailable, model_backend_from_env  # noqa: E402
+from schemas import REPORT, STRUCTURE_AGENT, STRUCTURE_SHORT_NOTE  # noqa: E402
+from session_store import DEFAULT_SESSION_DB, SessionState, SessionStore  # noqa: E402
+
+SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+AGENT_KINDS = ["pro", "con", "structure", "summary"]
+# 각 에이전트 호출이 넘기는 변수 계약. 프롬프트가 이 밖의 슬롯을 쓰면 로드 시점에 실패합니다.
+AGENT_VARIABLES: Dict[str, FrozenSet[str]] = {
+    "pro": frozenset({"topic", "user_note"}),
+    "con": frozenset({"topic", "pro_statement"}),
+    "structure": frozenset({"topic", "debate_transcript", "user_note"}),
+    "summary": frozenset(
+        {"topic", "debate_transcript", "user_note", "structure_feedback", "pro_statement", "con_statement"}
+    ),
+}
+# 에이전트의 system/user 프롬프트 중 어딘가에 반드시 있어야 하는 슬롯. 빠져 있으면 로드 시점에 실패합니다.
+AGENT_REQUIRED_VARIABLES: Dict[str, FrozenSet[str]] = {
+    "pro": frozenset({"topic", "user_note"}),
+    "con": frozenset({"topic", "pro_statement"}),
+    "structure": frozenset({"topic", "debate_transcript", "user_note"}),
+    "summary": frozenset({"topic", "debate_transcript", "user_note", "structure_feedback"}),
 }
+SHORT_NOTE_THRESHOLD = 20
+# mock이 아닐 때 에이전트 호출을 보낼 모델 백엔드 (main()이 --agent-url / THINKGYM_MODEL_URL로 설정).
+# 동기/비동기 경로가 같은 연결 풀을 공유합니다.
+AGENT_MODEL: Optional[ModelBackend] = None
+NO_MODEL_MESSAGE = "실제 모델 모드에는 --agent-url 또는 THINKGYM_MODEL_URL이 필요합니다. (모의 응답은 --mock)"
 
 
 @dataclass
@@ -34,27 +60,76 @@ class RoundResult:
     structure_feedback: Dict[str, object]
     summary_report: str
     next_question: str
+    timings: Dict[str, float] = field(default_factory=dict)
 
 
-def load_prompt(name: str) -> str:
-    path = PROMPT_DIR / name
-    return path.read_text(encoding="utf-8").strip()
+RoundSink = Callable[[RoundResult], None]
 
 
-def render_template(text: str, variables: Dict[str, str]) -> str:
-    rendered = text
-    for key, value in variables.items():
-        rendered = rendered.replace("{{" + key + "}}", value)
-    return rendered
+@dataclass
+class SessionCheckpoint:
+    """완료된 라운드와 다음 라운드로 이어지는 상태(질문, 직전 사용자 생각)."""
 
+    completed: List[RoundResult]
+    current_topic: str
+    previous_note: str
 
-def sentence_count(text: str) -> int:
-    return len(split_sentences(text))
 
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """리터럴/슬롯이 번갈아 오는 세그먼트 목록 (짝수 인덱스: 리터럴, 홀수 인덱스: 변수명)."""
 
-def split_sentences(text: str) -> List[str]:
-    # Split only on likely sentence boundaries: punctuation + whitespace.
-    return [p.strip() for p in re.split(r"(?<=[.!?])\s+(?=[\"'\\(\\[]?[가-힣A-Za-z0-9])", text.strip()) if p.strip()]
+    text: str
+    segments: Tuple[str, ...]
+    slots: FrozenSet[str]
+
+    def render(self, variables: Dict[str, str]) -> str:
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            # 값이 없는 슬롯은 기존 동작대로 원문 그대로 둡니다.
+            parts[i] = variables.get(name, "{{" + name + "}}")
+        return "".join(parts)
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    segments = tuple(SLOT_PATTERN.split(text))
+    return CompiledTemplate(text=text, segments=segments, slots=frozenset(segments[1::2]))
+
+
+_TEMPLATE_CACHE: Dict[Path, Tuple[int, CompiledTemplate]] = {}
+
+
+def load_template(name: str, allowed: Optional[FrozenSet[str]] = None) -> CompiledTemplate:
+    """파일 경로별로 한 번만 파싱하고, 파일 mtime이 바뀌면 다시 읽습니다."""
+    path = PROMPT_DIR / name
+    mtime = path.stat().st_mtime_ns
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        template = cached[1]
+    else:
+        template = compile_template(path.read_text(encoding="utf-8").strip())
+        _TEMPLATE_CACHE[path] = (mtime, template)
+    if allowed is not None:
+        unknown = template.slots - allowed
+        if unknown:
+            raise ValueError(f"{name}: 알 수 없는 템플릿 변수 {sorted(unknown)} (허용: {sorted(allowed)})")
+    return template
+
+
+def load_agent_templates(kind: str) -> Tuple[CompiledTemplate, CompiledTemplate]:
+    """에이전트의 (system, user) 템플릿. 계약 밖의 슬롯이나 빠진 필수 슬롯은 로드 시점에 ValueError로 알립니다."""
+    allowed = AGENT_VARIABLES[kind]
+    system = load_template(f"{kind}_agent_system.txt", allowed)
+    user = load_template(f"{kind}_agent_user.txt", allowed)
+    missing = AGENT_REQUIRED_VARIABLES[kind] - system.slots - user.slots
+    if missing:
+        raise ValueError(f"{kind} 에이전트 프롬프트에 필수 템플릿 변수 {sorted(missing)}가 없습니다.")
+    return system, user
+
+
+def sentence_count(text: str) -> int:
+    return len(split_sentences(text))
 
 
 def ensure_three_sentences(text: str, agent_name: str) -> None:
@@ -62,20 +137,12 @@ def ensure_three_sentences(text: str, agent_name: str) -> None:
         raise ValueError(f"{agent_name} 출력은 정확히 3문장이어야 합니다: {text}")
 
 
-def extract_keywords(text: str) -> List[str]:
-    words = re.findall(r"[가-힣A-Za-z0-9]{2,}", text)
-    seen = set()
-    keywords = []
-    for word in words:
-        w = word.lower()
-        if w not in seen:
-            seen.add(w)
-            keywords.append(word)
-    return keywords
+def extract_keywords(text: str, limit: Optional[int] = None) -> List[str]:
+    return scan_keywords(text, fold_case=True, limit=limit)
 
 
-def extract_salient_keywords(text: str) -> List[str]:
-    return [w for w in extract_keywords(text) if w.lower() not in STOPWORDS]
+def extract_salient_keywords(text: str, limit: Optional[int] = None) -> List[str]:
+    return scan_keywords(text, stopwords=STOPWORDS, fold_case=True, limit=limit)
 
 
 def validate_con_first_sentence(con_text: str, pro_text: str) -> None:
@@ -83,73 +150,25 @@ def validate_con_first_sentence(con_text: str, pro_text: str) -> None:
     if not sentences:
         raise ValueError("Con 출력이 비어 있습니다.")
     first = sentences[0]
-    pro_keywords = extract_salient_keywords(pro_text)
+    pro_keywords = extract_salient_keywords(pro_text, limit=5)
     if not pro_keywords:
         return
-    if not any(keyword in first for keyword in pro_keywords[:5]):
+    if not any(keyword in first for keyword in pro_keywords):
         raise ValueError("Con 첫 문장이 Pro 발언 키워드를 직접 참조하지 않았습니다.")
 
 
 def validate_con_topic_relevance(con_text: str, topic: str) -> None:
-    topic_keywords = extract_salient_keywords(topic)
+    topic_keywords = extract_salient_keywords(topic, limit=5)
     if not topic_keywords:
         return
-    if not any(keyword in con_text for keyword in topic_keywords[:5]):
+    if not any(keyword in con_text for keyword in topic_keywords):
         raise ValueError("Con 출력이 주제 키워드를 충분히 반영하지 않았습니다.")
 
 
 def validate_structure_json(data: Dict[str, object], user_note: str) -> None:
-    expected_keys = [
-        "claim",
-        "reasons",
-        "assumptions",
-        "counterpoints",
-        "missing_info",
-        "next_revision",
-    ]
-    if list(data.keys()) != expected_keys:
-        raise ValueError("Structure JSON 키 순서/구조가 스키마와 다릅니다.")
-
-    for key in expected_keys:
-        if key not in data:
-            raise ValueError(f"Structure JSON 누락 키: {key}")
-
-    for key in ["reasons", "assumptions", "counterpoints", "missing_info"]:
-        if not isinstance(data[key], list):
-            raise ValueError(f"{key}는 배열이어야 합니다.")
-
-    if not isinstance(data["claim"], str) or not isinstance(data["next_revision"], str):
-        raise ValueError("claim/next_revision은 문자열이어야 합니다.")
-
-    compact = json.dumps(data, ensure_ascii=False)
-    if "\n" in compact or "\r" in compact:
-        raise ValueError("Structure JSON 값에 줄바꿈이 있으면 안 됩니다.")
-
-    if len(user_note.strip()) < SHORT_NOTE_THRESHOLD:
-        if data["claim"] != "입장이 아직 명확히 정리되지 않았습니다.":
-            raise ValueError("짧은 user_note 규칙 claim 불일치")
-        if data["reasons"] != [] or data["assumptions"] != [] or data["counterpoints"] != []:
-            raise ValueError("짧은 user_note 규칙 배열이 비어 있어야 합니다.")
-        expected_missing = ["주장을 1문장으로 명확히 작성하세요", "근거를 최소 2개 제시하세요"]
-        if data["missing_info"] != expected_missing:
-            raise ValueError("짧은 user_note 규칙 missing_info 불일치")
-        expected_next = (
-            "주장을 1문장으로 정리하십시오. 그 주장을 뒷받침하는 근거 2가지를 추가하십시오. "
-            "반대 의견에 대한 대비를 포함하십시오."
-        )
-        if data["next_revision"] != expected_next:
-            raise ValueError("짧은 user_note 규칙 next_revision 불일치")
-    else:
-        if not 2 <= len(data["reasons"]) <= 3:
-            raise ValueError("reasons는 2~3개여야 합니다.")
-        if not 1 <= len(data["assumptions"]) <= 2:
-            raise ValueError("assumptions는 1~2개여야 합니다.")
-        if not 1 <= len(data["counterpoints"]) <= 2:
-            raise ValueError("counterpoints는 1~2개여야 합니다.")
-        if not 1 <= len(data["missing_info"]) <= 2:
-            raise ValueError("missing_info는 1~2개여야 합니다.")
-        if sentence_count(data["next_revision"]) != 3:
-            raise ValueError("next_revision은 정확히 3문장이어야 합니다.")
+    # 스키마는 backend/schemas.py에 있으며 백엔드 엔진과 공유합니다. 위반 사항은 경로와 함께 한 번에 모입니다.
+    schema = STRUCTURE_SHORT_NOTE if len(user_note.strip()) < SHORT_NOTE_THRESHOLD else STRUCTURE_AGENT
+    schema.validate(data, "Structure JSON 스키마 위반")
 
 
 def parse_structure_json(text: str, user_note: str) -> Dict[str, object]:
@@ -171,32 +190,7 @@ def extract_section(report: str, section_title: str, next_section_title: str) ->
 
 
 def validate_summary_report(report: str) -> None:
-    required_headers = [
-        "# 📝 ThinkGym 세션 리포트",
-        "## 1. 오늘의 질문",
-        "## 2. 찬반 핵심 요약",
-        "## 3. 사용자의 입장",
-        "## 4. 논리 구조 개선 포인트",
-        "## 5. 다음 라운드 추천 질문",
-    ]
-    for header in required_headers:
-        if header not in report:
-            raise ValueError(f"Summary 리포트 헤더 누락: {header}")
-
-    user_section = extract_section(report, "## 3. 사용자의 입장", "## 4. 논리 구조 개선 포인트")
-    user_lines = [line.strip() for line in user_section.splitlines() if line.strip()]
-    if len(user_lines) != 3:
-        raise ValueError("사용자의 입장 섹션은 정확히 3줄이어야 합니다.")
-
-    improve_section = extract_section(report, "## 4. 논리 구조 개선 포인트", "## 5. 다음 라운드 추천 질문")
-    improve_lines = [line.strip() for line in improve_section.splitlines() if line.strip().startswith("-")]
-    if len(improve_lines) != 3:
-        raise ValueError("논리 구조 개선 포인트는 정확히 3개여야 합니다.")
-
-    next_q_section = extract_section(report, "## 5. 다음 라운드 추천 질문", "")
-    next_lines = [line.strip() for line in next_q_section.splitlines() if line.strip()]
-    if len(next_lines) != 1:
-        raise ValueError("다음 라운드 추천 질문은 정확히 1줄이어야 합니다.")
+    REPORT.validate(report, "Summary 리포트 형식 위반")
 
 
 def make_debate_transcript(pro_text: str, con_text: str) -> str:
@@ -213,7 +207,7 @@ def mock_pro(topic: str, user_note: str) -> str:
 
 
 def mock_con(topic: str, pro_statement: str) -> str:
-    pro_keywords = extract_salient_keywords(pro_statement)
+    pro_keywords = extract_salient_keywords(pro_statement, limit=1)
     keyword = pro_keywords[0] if pro_keywords else "핵심 근거"
     return (
         f"저는 '{topic}'에 반대하며, 찬성 측의 '{keyword}'만으로는 정책 전환의 타당성을 충분히 입증하기 어렵다고 봅니다. "
@@ -263,6 +257,8 @@ def mock_summary(topic: str, pro_text: str, con_text: str, user_note: str, struc
         user_line1 = f"사용자는 '{user_note[:35]}'를 중심으로 입장을 정리했습니다."
 
     next_question = "현재 입장을 유지하면서도 실패 비용을 최소화하기 위한 첫 번째 검증 지표는 무엇인가요?"
+    pro_sentences = split_sentences(pro_text)
+    con_sentences = split_sentences(con_text)
 
     return "\n".join(
         [
@@ -273,13 +269,13 @@ def mock_summary(topic: str, pro_text: str, con_text: str, user_note: str, struc
             "",
             "## 2. 찬반 핵심 요약",
             "- **찬성:**",
-            f"  1) {split_sentences(pro_text)[0]}",
-            f"  2) {split_sentences(pro_text)[1]}",
-            f"  3) {split_sentences(pro_text)[2]}",
+            f"  1) {pro_sentences[0]}",
+            f"  2) {pro_sentences[1]}",
+            f"  3) {pro_sentences[2]}",
             "- **반대:**",
-            f"  1) {split_sentences(con_text)[0]}",
-            f"  2) {split_sentences(con_text)[1]}",
-            f"  3) {split_sentences(con_text)[2]}",
+            f"  1) {con_sentences[0]}",
+            f"  2) {con_sentences[1]}",
+            f"  3) {con_sentences[2]}",
             "",
             "## 3. 사용자의 입장",
             user_line1,
@@ -297,13 +293,9 @@ def mock_summary(topic: str, pro_text: str, con_text: str, user_note: str, struc
     )
 
 
-def build_full_prompt(system_text: str, user_text: str, variables: Dict[str, str]) -> str:
-    return (
-        "[SYSTEM]\n"
-        + render_template(system_text, variables)
-        + "\n\n[USER]\n"
-        + render_template(user_text, variables)
-    )
+def render_agent_prompt(kind: str, variables: Dict[str, str]) -> str:
+    system, user = load_agent_templates(kind)
+    return "".join(["[SYSTEM]\n", system.render(variables), "\n\n[USER]\n", user.render(variables)])
 
 
 def run_agent(kind: str, variables: Dict[str, str], mock_mode: bool) -> str:
@@ -325,31 +317,134 @@ def run_agent(kind: str, variables: Dict[str, str], mock_mode: bool) -> str:
             )
         raise ValueError(f"알 수 없는 kind: {kind}")
 
-    raise RuntimeError("MVP는 현재 --mock 모드만 지원합니다. 실제 모델 연동은 후속 단계에서 연결하세요.")
+    if AGENT_MODEL is None:
+        raise RuntimeError(NO_MODEL_MESSAGE)
+    return AGENT_MODEL.complete(kind, build_agent_prompt(kind, variables), variables)
+
 
+def validate_agent_output(kind: str, text: str, variables: Dict[str, str]):
+    if kind == "pro":
+        ensure_three_sentences(text, "Pro")
+        return text
+    if kind == "con":
+        ensure_three_sentences(text, "Con")
+        validate_con_first_sentence(text, variables["pro_statement"])
+        validate_con_topic_relevance(text, variables["topic"])
+        return text
+    if kind == "structure":
+        return parse_structure_json(text, variables["user_note"])
+    if kind == "summary":
+        validate_summary_report(text)
+        return text
+    raise ValueError(f"지원하지 않는 kind: {kind}")
 
-def generate_with_retry(kind: str, variables: Dict[str, str], mock_mode: bool, max_retries: int = 2):
-    errors = []
-    for _ in range(max_retries + 1):
-        text = run_agent(kind, variables, mock_mode)
+
+@dataclass
+class RetryMetrics:
+    attempts: int = 0
+    retries: int = 0
+    validation_failures: int = 0
+    transient_failures: int = 0
+    fatal_failures: int = 0
+    backoff_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "validation_failures": self.validation_failures,
+            "transient_failures": self.transient_failures,
+            "fatal_failures": self.fatal_failures,
+            "backoff_seconds": round(self.backoff_seconds, 3),
+        }
+
+
+@dataclass
+class RetryPolicy:
+    """검증 실패는 즉시(피드백 포함) 재시도, 일시 장애는 지수 백오프+지터 후 재시도, 그 외는 즉시 실패."""
+
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    jitter: float = 0.5
+    session_budget: Optional[float] = None
+
+    def classify(self, exc: BaseException) -> str:
+        if isinstance(exc, ValueError):
+            return "validation"
+        if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError, OSError, ModelUnavailable)):
+            return "transient"
+        return "fatal"
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def session(self, metrics: Optional[RetryMetrics] = None) -> "RetrySession":
+        deadline = time.monotonic() + self.session_budget if self.session_budget is not None else None
+        return RetrySession(self, metrics if metrics is not None else RetryMetrics(), deadline)
+
+
+@dataclass
+class RetrySession:
+    policy: RetryPolicy
+    metrics: RetryMetrics = field(default_factory=RetryMetrics)
+    deadline: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def on_failure(self, kind: str, exc: BaseException, attempt: int, variables: Dict[str, str], errors: List[str]) -> Optional[float]:
+        """실패를 기록하고 다음 시도 전 대기 시간을 돌려줍니다. None이면 재시도하지 않을 예외입니다."""
+        category = self.policy.classify(exc)
+        errors.append(str(exc) or type(exc).__name__)
+        if category == "fatal":
+            self.metrics.fatal_failures += 1
+            return None
+        if category == "validation":
+            self.metrics.validation_failures += 1
+            # 다음 시도에서 모델이 같은 규칙을 다시 어기지 않도록 구체적인 실패 사유를 넘깁니다.
+            variables["retry_feedback"] = str(exc)
+            delay = 0.0
+        else:
+            self.metrics.transient_failures += 1
+            delay = self.policy.backoff(attempt)
+
+        if attempt >= self.policy.max_retries:
+            return 0.0
+        remaining = self.remaining()
+        if remaining is not None and remaining <= delay:
+            raise RuntimeError(f"{kind} 생성 실패 (세션 시간 예산 초과): {' | '.join(errors)}")
+        self.metrics.retries += 1
+        self.metrics.backoff_seconds += delay
+        return delay
+
+
+def generate_with_retry(
+    kind: str,
+    variables: Dict[str, str],
+    mock_mode: bool,
+    max_retries: int = 2,
+    session: Optional[RetrySession] = None,
+):
+    session = session or RetryPolicy(max_retries=max_retries).session()
+    variables = dict(variables)
+    errors: List[str] = []
+    for attempt in range(session.policy.max_retries + 1):
+        session.metrics.attempts += 1
         try:
-            if kind == "pro":
-                ensure_three_sentences(text, "Pro")
-                return text
-            if kind == "con":
-                ensure_three_sentences(text, "Con")
-                validate_con_first_sentence(text, variables["pro_statement"])
-                validate_con_topic_relevance(text, variables["topic"])
-                return text
-            if kind == "structure":
-                parsed = parse_structure_json(text, variables["user_note"])
-                return parsed
-            if kind == "summary":
-                validate_summary_report(text)
-                return text
-            raise ValueError(f"지원하지 않는 kind: {kind}")
+            with stage(f"agent.{kind}"):
+                text = run_agent(kind, variables, mock_mode)
+            with stage(f"validate.{kind}"):
+                return validate_agent_output(kind, text, variables)
         except Exception as exc:  # pylint: disable=broad-except
-            errors.append(str(exc))
+            delay = session.on_failure(kind, exc, attempt, variables, errors)
+            if delay is None:
+                raise
+            if delay:
+                time.sleep(delay)
 
     raise RuntimeError(f"{kind} 생성 실패: {' | '.join(errors)}")
 
@@ -362,6 +457,61 @@ def pick_user_note(round_no: int, notes: List[str], interactive: bool) -> str:
     return ""
 
 
+# 세션 로그의 session 이벤트에 남기는 엔진 이름. 백엔드와 기록 형태가 달라 서로의 세션은 이어 쓰지 않습니다.
+SESSION_ENGINE = "thinkgym-mini"
+
+
+def foreign_session_check(state: Optional[SessionState], session_id: str) -> None:
+    if state is not None and state.engine != SESSION_ENGINE:
+        raise ValueError(f"세션 {session_id}은(는) {state.engine} 엔진이 기록한 세션이라 이어 쓸 수 없습니다. 다른 --session-id를 쓰세요.")
+
+
+def session_recorder(store: SessionStore, session_id: str) -> RoundSink:
+    """완료된 라운드를 백엔드와 같은 세션 로그(backend/session_store.py)에 덧붙입니다.
+    라운드의 모든 이벤트는 checkpoint와 함께 한 트랜잭션으로 기록되므로 중간에 죽어도 반쯤 기록된 라운드는 없습니다.
+    다른 엔진이 연 세션이면 ValueError."""
+    state = store.load(session_id)
+    foreign_session_check(state, session_id)
+    opened = state is not None
+
+    def record(result: RoundResult) -> None:
+        nonlocal opened
+        n = result.round_no
+        events: List[Tuple[int, str, object]] = []
+        if not opened:
+            events.append((0, "session", {"topic": result.topic, "seed": None, "engine": SESSION_ENGINE}))
+            opened = True
+        events += [
+            (n, "topic", result.topic),
+            (n, "debate", [{"role": "pro", "text": result.pro_statement}, {"role": "con", "text": result.con_statement}]),
+            (n, "note", result.user_note),
+            (n, "structure", result.structure_feedback),
+            (n, "report", result.summary_report),
+            (n, "checkpoint", {"result": asdict(result), "next_topic": result.next_question, "previous_note": result.user_note}),
+        ]
+        store.append(session_id, events)
+
+    return record
+
+
+def load_checkpoint(store: SessionStore, session_id: str) -> Optional[SessionCheckpoint]:
+    """1라운드부터 연속으로 checkpoint가 있는 라운드까지 복원합니다. 기록이 없으면 None.
+    다른 엔진이 연 세션이면 ValueError (그 라운드는 checkpoint와 섞이면 안 됩니다)."""
+    state = store.load(session_id)
+    if state is None:
+        return None
+    foreign_session_check(state, session_id)
+    completed: List[RoundResult] = []
+    chained = {"next_topic": state.topic or "", "previous_note": ""}
+    for round_no in range(1, state.last_round + 1):
+        checkpoint = state.get(round_no, "checkpoint")
+        if checkpoint is None:
+            break
+        completed.append(RoundResult(**checkpoint["result"]))
+        chained = checkpoint
+    return SessionCheckpoint(completed, chained["next_topic"], chained["previous_note"])
+
+
 def extract_next_question(summary_report: str, fallback_topic: str) -> str:
     section = extract_section(summary_report, "## 5. 다음 라운드 추천 질문", "")
     lines = [line.strip() for line in section.splitlines() if line.strip()]
@@ -370,38 +520,186 @@ def extract_next_question(summary_report: str, fallback_topic: str) -> str:
     return lines[0]
 
 
-def run_session(topic: str, rounds: int, notes: List[str], mock_mode: bool, interactive: bool) -> List[RoundResult]:
-    results: List[RoundResult] = []
-    current_topic = topic
-    previous_note = ""
+def run_session(
+    topic: str,
+    rounds: int,
+    notes: List[str],
+    mock_mode: bool,
+    interactive: bool,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_metrics: Optional[RetryMetrics] = None,
+    on_round: Optional[RoundSink] = None,
+    resume: Optional[SessionCheckpoint] = None,
+) -> List[RoundResult]:
+    session = (retry_policy or RetryPolicy()).session(retry_metrics)
+    results: List[RoundResult] = list(resume.completed) if resume else []
+    current_topic = resume.current_topic if resume else topic
+    previous_note = resume.previous_note if resume else ""
+
+    # 재개 시 완료된 라운드는 다시 생성하지 않습니다.
+    for round_no in range(len(results) + 1, rounds + 1):
+        timer = StageTimer()
+        with use_timer(timer), sentence_scope():
+            pro_statement = generate_with_retry(
+                "pro",
+                {"topic": current_topic, "user_note": previous_note},
+                mock_mode,
+                session=session,
+            )
 
-    for round_no in range(1, rounds + 1):
-        pro_statement = generate_with_retry(
-            "pro",
-            {"topic": current_topic, "user_note": previous_note},
-            mock_mode,
-        )
+            con_statement = generate_with_retry(
+                "con",
+                {"topic": current_topic, "pro_statement": pro_statement},
+                mock_mode,
+                session=session,
+            )
 
-        con_statement = generate_with_retry(
-            "con",
-            {"topic": current_topic, "pro_statement": pro_statement},
-            mock_mode,
-        )
+            debate_transcript = make_debate_transcript(pro_statement, con_statement)
+            user_note = pick_user_note(round_no, notes, interactive)
+
+            structure_feedback = generate_with_retry(
+                "structure",
+                {
+                    "topic": current_topic,
+                    "debate_transcript": debate_transcript,
+                    "user_note": user_note,
+                },
+                mock_mode,
+                session=session,
+            )
 
-        debate_transcript = make_debate_transcript(pro_statement, con_statement)
-        user_note = pick_user_note(round_no, notes, interactive)
+            summary_report = generate_with_retry(
+                "summary",
+                {
+                    "topic": current_topic,
+                    "debate_transcript": debate_transcript,
+                    "user_note": user_note,
+                    "structure_feedback": json.dumps(structure_feedback, ensure_ascii=False),
+                    "pro_statement": pro_statement,
+                    "con_statement": con_statement,
+                },
+                mock_mode,
+                session=session,
+            )
+
+            next_question = extract_next_question(summary_report, current_topic)
+
+            results.append(
+                RoundResult(
+                    round_no=round_no,
+                    topic=current_topic,
+                    pro_statement=pro_statement,
+                    con_statement=con_statement,
+                    user_note=user_note,
+                    structure_feedback=structure_feedback,
+                    summary_report=summary_report,
+                    next_question=next_question,
+                    timings=timer.as_dict(),
+                )
+            )
+        if on_round is not None:
+            on_round(results[-1])
+
+        current_topic = next_question
+        previous_note = user_note
+
+    return results
+
+
+class AsyncAgentBackend(Protocol):
+    async def generate(self, kind: str, variables: Dict[str, str]) -> str:
+        ...
+
+
+class MockAsyncBackend:
+    """run_agent의 mock 응답을 비동기 인터페이스로 감쌉니다."""
+
+    async def generate(self, kind: str, variables: Dict[str, str]) -> str:
+        return run_agent(kind, variables, mock_mode=True)
+
+
+class ModelAsyncBackend:
+    """공용 모델 백엔드(backend/model_backend.py)를 비동기 인터페이스로 감쌉니다.
+    호출은 스레드에서 실행되고, 호스트별 keep-alive 연결 풀을 모든 세션이 함께 씁니다."""
+
+    def __init__(self, model: ModelBackend) -> None:
+        self.model = model
 
-        structure_feedback = generate_with_retry(
+    async def generate(self, kind: str, variables: Dict[str, str]) -> str:
+        return await asyncio.to_thread(self.model.complete, kind, build_agent_prompt(kind, variables), variables)
+
+
+def build_agent_prompt(kind: str, variables: Dict[str, str]) -> str:
+    prompt = render_agent_prompt(kind, variables)
+    feedback = variables.get("retry_feedback")
+    if feedback:
+        prompt += f"\n\n[RETRY FEEDBACK]\n이전 출력이 다음 검증에 실패했습니다. 이 규칙을 지켜 다시 작성하세요: {feedback}"
+    return prompt
+
+
+async def generate_with_retry_async(
+    kind: str,
+    variables: Dict[str, str],
+    backend: AsyncAgentBackend,
+    limiter: asyncio.Semaphore,
+    agent_timeout: Optional[float],
+    session: RetrySession,
+):
+    variables = dict(variables)
+    errors: List[str] = []
+    for attempt in range(session.policy.max_retries + 1):
+        session.metrics.attempts += 1
+        timeout = agent_timeout
+        remaining = session.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            async with limiter:
+                with stage(f"agent.{kind}"):
+                    text = await asyncio.wait_for(backend.generate(kind, variables), timeout)
+            with stage(f"validate.{kind}"):
+                return validate_agent_output(kind, text, variables)
+        except asyncio.TimeoutError:
+            delay = session.on_failure(kind, TimeoutError(f"{timeout}s 시간 초과"), attempt, variables, errors)
+        except Exception as exc:  # pylint: disable=broad-except
+            delay = session.on_failure(kind, exc, attempt, variables, errors)
+            if delay is None:
+                raise
+        if delay:
+            await asyncio.sleep(delay)
+
+    raise RuntimeError(f"{kind} 생성 실패: {' | '.join(errors)}")
+
+
+async def run_round_async(
+    round_no: int,
+    current_topic: str,
+    previous_note: str,
+    user_note: str,
+    backend: AsyncAgentBackend,
+    limiter: asyncio.Semaphore,
+    agent_timeout: Optional[float],
+    session: RetrySession,
+) -> RoundResult:
+    # 라운드 내부 DAG: pro -> con -> (transcript + note) -> structure -> summary
+    timer = StageTimer()
+    with use_timer(timer), sentence_scope():
+        pro_statement = await generate_with_retry_async(
+            "pro", {"topic": current_topic, "user_note": previous_note}, backend, limiter, agent_timeout, session
+        )
+        con_statement = await generate_with_retry_async(
+            "con", {"topic": current_topic, "pro_statement": pro_statement}, backend, limiter, agent_timeout, session
+        )
+        debate_transcript = make_debate_transcript(pro_statement, con_statement)
+        structure_feedback = await generate_with_retry_async(
             "structure",
-            {
-                "topic": current_topic,
-                "debate_transcript": debate_transcript,
-                "user_note": user_note,
-            },
-            mock_mode,
+            {"topic": current_topic, "debate_transcript": debate_transcript, "user_note": user_note},
+            backend,
+            limiter,
+            agent_timeout,
+            session,
         )
-
-        summary_report = generate_with_retry(
+        summary_report = await generate_with_retry_async(
             "summary",
             {
                 "topic": current_topic,
@@ -411,31 +709,80 @@ def run_session(topic: str, rounds: int, notes: List[str], mock_mode: bool, inte
                 "pro_statement": pro_statement,
                 "con_statement": con_statement,
             },
-            mock_mode,
+            backend,
+            limiter,
+            agent_timeout,
+            session,
         )
-
-        next_question = extract_next_question(summary_report, current_topic)
-
-        results.append(
-            RoundResult(
-                round_no=round_no,
-                topic=current_topic,
-                pro_statement=pro_statement,
-                con_statement=con_statement,
-                user_note=user_note,
-                structure_feedback=structure_feedback,
-                summary_report=summary_report,
-                next_question=next_question,
-            )
+        return RoundResult(
+            round_no=round_no,
+            topic=current_topic,
+            pro_statement=pro_statement,
+            con_statement=con_statement,
+            user_note=user_note,
+            structure_feedback=structure_feedback,
+            summary_report=summary_report,
+            next_question=extract_next_question(summary_report, current_topic),
+            timings=timer.as_dict(),
         )
 
-        current_topic = next_question
-        previous_note = user_note
 
+async def run_session_async(
+    topic: str,
+    rounds: int,
+    notes: List[str],
+    backend: AsyncAgentBackend,
+    limiter: asyncio.Semaphore,
+    agent_timeout: Optional[float] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_metrics: Optional[RetryMetrics] = None,
+    on_round: Optional[RoundSink] = None,
+    resume: Optional[SessionCheckpoint] = None,
+) -> List[RoundResult]:
+    session = (retry_policy or RetryPolicy()).session(retry_metrics)
+    # 다음 라운드 질문이 이전 리포트에서 나오므로 라운드는 순서대로, 세션끼리는 동시에 실행됩니다.
+    results: List[RoundResult] = list(resume.completed) if resume else []
+    current_topic = resume.current_topic if resume else topic
+    previous_note = resume.previous_note if resume else ""
+    for round_no in range(len(results) + 1, rounds + 1):
+        user_note = pick_user_note(round_no, notes, interactive=False)
+        result = await run_round_async(
+            round_no, current_topic, previous_note, user_note, backend, limiter, agent_timeout, session
+        )
+        results.append(result)
+        if on_round is not None:
+            on_round(result)
+        current_topic = result.next_question
+        previous_note = user_note
     return results
 
 
-def print_round_output(result: RoundResult) -> None:
+async def run_sessions_async(
+    topics: List[str],
+    rounds: int,
+    notes: List[str],
+    backend: AsyncAgentBackend,
+    concurrency: int = 4,
+    agent_timeout: Optional[float] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_metrics: Optional[RetryMetrics] = None,
+    recorders: Optional[List[Optional[RoundSink]]] = None,
+    checkpoints: Optional[List[Optional[SessionCheckpoint]]] = None,
+) -> List[List[RoundResult]]:
+    limiter = asyncio.Semaphore(concurrency)
+    recorders = recorders or [None] * len(topics)
+    checkpoints = checkpoints or [None] * len(topics)
+    return await asyncio.gather(
+        *(
+            run_session_async(
+                topic, rounds, notes, backend, limiter, agent_timeout, retry_policy, retry_metrics, recorder, checkpoint
+            )
+            for topic, recorder, checkpoint in zip(topics, recorders, checkpoints)
+        )
+    )
+
+
+def print_round_output(result: RoundResult, show_timings: bool = False) -> None:
     print(f"\n===== Round {result.round_no} =====")
     print(f"질문: {result.topic}")
     print(f"\n[찬성]\n{result.pro_statement}")
@@ -446,46 +793,157 @@ def print_round_output(result: RoundResult) -> None:
     print("\n[세션 리포트]")
     print(result.summary_report)
     print(f"\n[다음 라운드 질문]\n{result.next_question}")
+    if show_timings:
+        print("\n[단계별 시간(ms)]")
+        print(json.dumps(result.timings, ensure_ascii=False))
+
+
+def print_retry_stats(metrics: RetryMetrics) -> None:
+    print("\n[재시도 통계]")
+    print(json.dumps(metrics.as_dict(), ensure_ascii=False))
+
+
+def print_model_stats(model: Optional[ModelBackend]) -> None:
+    print("\n[모델 연결 통계]")
+    print(json.dumps(model.stats() if model is not None else {"mock": True}, ensure_ascii=False))
 
 
 def verify_prompt_files() -> None:
-    required = [
-        "pro_agent_system.txt",
-        "pro_agent_user.txt",
-        "con_agent_system.txt",
-        "con_agent_user.txt",
-        "structure_agent_system.txt",
-        "structure_agent_user.txt",
-        "summary_agent_system.txt",
-        "summary_agent_user.txt",
-    ]
-    for filename in required:
-        _ = load_prompt(filename)
+    for kind in AGENT_KINDS:
+        load_agent_templates(kind)
+
+
+@contextmanager
+def resume_hint(session_id: Optional[str]) -> Iterator[None]:
+    """재시도를 모두 소진해 세션이 중단되면, 저장된 라운드부터 이어 가는 방법을 안내합니다."""
+    try:
+        yield
+    except RuntimeError:
+        if session_id:
+            print(f"\n[resume] 완료된 라운드는 세션 {session_id}에 저장되어 있습니다. --resume으로 이어서 실행하세요.", file=sys.stderr)
+        raise
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="ThinkGym Mini Flow MVP Runner")
-    parser.add_argument("--topic", required=True, help="첫 라운드 질문")
+    parser.add_argument("--topic", help="첫 라운드 질문")
+    parser.add_argument("--topics-file", default=None, help="세션별 첫 질문 목록 파일 (한 줄에 하나, --async에서 동시 실행)")
     parser.add_argument("--rounds", type=int, default=2, help="라운드 수 (기본 2)")
     parser.add_argument("--user-note", action="append", default=[], help="라운드별 사용자 생각 (순서대로 반복 입력)")
     parser.add_argument("--mock", action="store_true", help="모의 응답 모드")
     parser.add_argument("--non-interactive", action="store_true", help="입력 프롬프트 없이 실행")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="asyncio 오케스트레이션 (항상 비대화형)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 에이전트 호출 수 상한 (--async)")
+    parser.add_argument("--agent-timeout", type=float, default=None, help="에이전트 호출당 제한 시간(초) (--async)")
+    parser.add_argument("--agent-url", default=None, help="모델(에이전트) 서버 URL (미지정 시 THINKGYM_MODEL_URL, --mock이면 사용 안 함)")
+    parser.add_argument("--agent-connections", type=int, default=None, help="모델 서버 호스트당 keep-alive 연결 수 상한 (기본: --concurrency)")
+    parser.add_argument("--model-stats", action="store_true", help="종료 시 모델 연결 풀 통계(재사용, 지연) 출력")
+    parser.add_argument("--max-retries", type=int, default=2, help="에이전트 호출당 최대 재시도 횟수")
+    parser.add_argument("--retry-base-delay", type=float, default=0.5, help="일시 장애 재시도 기본 대기(초), 지수 증가+지터")
+    parser.add_argument("--session-budget", type=float, default=None, help="세션당 전체 시간 예산(초)")
+    parser.add_argument("--retry-stats", action="store_true", help="종료 시 재시도 통계 출력")
+    parser.add_argument("--timings", action="store_true", help="라운드별 에이전트 호출/검증 단계 시간(ms) 출력")
+    parser.add_argument("--profile", default=None, help="세션 전체 프로파일 저장 경로")
+    parser.add_argument("--profile-format", choices=["pstats", "collapsed"], default="pstats", help="cProfile 통계 또는 샘플링 스택")
+    parser.add_argument("--session-id", default=None, help="완료된 라운드를 기록할 세션 ID (여러 질문이면 ID-1, ID-2 ...)")
+    parser.add_argument("--session-db", default=DEFAULT_SESSION_DB, help="세션 로그 sqlite 파일")
+    parser.add_argument("--resume", action="store_true", help="--session-id의 완료된 라운드는 건너뛰고 이어서 실행")
     args = parser.parse_args()
 
     if args.rounds < 1:
         raise ValueError("--rounds는 1 이상이어야 합니다.")
+    if args.concurrency < 1:
+        raise ValueError("--concurrency는 1 이상이어야 합니다.")
+    if args.agent_connections is not None and args.agent_connections < 1:
+        raise ValueError("--agent-connections는 1 이상이어야 합니다.")
+
+    topics = [args.topic] if args.topic else []
+    if args.topics_file:
+        lines = Path(args.topics_file).read_text(encoding="utf-8").splitlines()
+        topics.extend(line.strip() for line in lines if line.strip())
+    if not topics:
+        parser.error("--topic 또는 --topics-file이 필요합니다.")
+    if args.resume and not args.session_id:
+        parser.error("--resume에는 --session-id가 필요합니다.")
 
     verify_prompt_files()
-    results = run_session(
-        topic=args.topic,
-        rounds=args.rounds,
-        notes=args.user_note,
-        mock_mode=args.mock,
-        interactive=not args.non_interactive,
+    global AGENT_MODEL
+    # --agent-url은 --mock보다 우선합니다 (이전 --async 동작과 같음).
+    if args.agent_url or not args.mock:
+        AGENT_MODEL = model_backend_from_env(args.agent_url, args.agent_connections or args.concurrency)
+        if AGENT_MODEL is None:
+            raise RuntimeError(NO_MODEL_MESSAGE)
+    retry_policy = RetryPolicy(
+        max_retries=args.max_retries,
+        base_delay=args.retry_base_delay,
+        session_budget=args.session_budget,
     )
+    retry_metrics = RetryMetrics()
+    recorders: List[Optional[RoundSink]] = [None] * len(topics)
+    checkpoints: List[Optional[SessionCheckpoint]] = [None] * len(topics)
+    if args.session_id:
+        store = SessionStore(args.session_db)
+        ids = [args.session_id] if len(topics) == 1 else [f"{args.session_id}-{i}" for i in range(1, len(topics) + 1)]
+        try:
+            recorders = [session_recorder(store, session_id) for session_id in ids]
+        except ValueError as ex:
+            parser.error(str(ex))
+        if args.resume:
+            try:
+                checkpoints = [load_checkpoint(store, session_id) for session_id in ids]
+            except ValueError as ex:
+                parser.error(str(ex))
+            for session_id, topic, checkpoint in zip(ids, topics, checkpoints):
+                if checkpoint is None:
+                    continue
+                if checkpoint.completed and checkpoint.completed[0].topic != topic:
+                    parser.error(f"세션 {session_id}의 첫 질문이 --topic과 다릅니다: {checkpoint.completed[0].topic}")
+                print(f"[resume] {session_id}: {len(checkpoint.completed)}라운드 완료, 이어서 실행합니다.", file=sys.stderr)
+
+    if args.use_async or len(topics) > 1:
+        backend: AsyncAgentBackend = MockAsyncBackend() if AGENT_MODEL is None else ModelAsyncBackend(AGENT_MODEL)
+        with profiled(args.profile, args.profile_format), resume_hint(args.session_id):
+            sessions = asyncio.run(
+                run_sessions_async(
+                    topics,
+                    args.rounds,
+                    args.user_note,
+                    backend,
+                    args.concurrency,
+                    args.agent_timeout,
+                    retry_policy,
+                    retry_metrics,
+                    recorders,
+                    checkpoints,
+                )
+            )
+        for results in sessions:
+            for result in results:
+                print_round_output(result, args.timings)
+        if args.retry_stats:
+            print_retry_stats(retry_metrics)
+        if args.model_stats:
+            print_model_stats(AGENT_MODEL)
+        return
+    with profiled(args.profile, args.profile_format), resume_hint(args.session_id):
+        results = run_session(
+            topic=topics[0],
+            rounds=args.rounds,
+            notes=args.user_note,
+            mock_mode=AGENT_MODEL is None,
+            interactive=not args.non_interactive,
+            retry_policy=retry_policy,
+            retry_metrics=retry_metrics,
+            on_round=recorders[0],
+            resume=checkpoints[0],
+        )
 
     for result in results:
-        print_round_output(result)
+        print_round_output(result, args.timings)
+    if args.retry_stats:
+        print_retry_stats(retry_metrics)
+    if args.model_stats:
+        print_model_stats(AGENT_MODEL)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""
+thinkgym-mini run.py: prompt templates (parsed once per file version, unknown and missing
+variables rejected at load time); the retry policy (which failures retry, backoff, the session
+budget) and the validation feedback appended to the retried prompt; session checkpoints
+(round trip, resuming, refusing a session another engine wrote).
+Run from .agents/thinkgym-mini/: python -m unittest test_run
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import run
+from model_backend import ModelBackend, ModelError, ModelUnavailable
+from schemas import SchemaError
+from session_store import SessionStore
+
+PRO_TEXT = "저는 찬성합니다. 효율이 오릅니다. 다만 비용이 듭니다."
+PRO_VARIABLES = {"topic": "AI 교사", "user_note": "메모"}
+TOPIC = "원격근무를 기본 근무제로 전환해야 하는가?"
+NOTES = ["생산성은 오르지만 협업 리듬이 깨질 수 있어요 정말로요", "짧은 메모", "조건부 도입이 맞다고 생각합니다 다만 기준이 필요합니다"]
+
+
+class TemplateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.prompts = Path(directory.name)
+        for path in run.PROMPT_DIR.iterdir():
+            shutil.copy(path, self.prompts / path.name)
+        saved = run.PROMPT_DIR
+        self.addCleanup(setattr, run, "PROMPT_DIR", saved)
+        self.addCleanup(run._TEMPLATE_CACHE.clear)
+        run.PROMPT_DIR = self.prompts
+        run._TEMPLATE_CACHE.clear()
+
+    def rewrite(self, name: str, text: str) -> None:
+        path = self.prompts / name
+        stat = path.stat()
+        path.write_text(text, encoding="utf-8")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_shipped_prompts_pass_the_load_time_check(self) -> None:
+        run.verify_prompt_files()
+
+    def test_templates_render_in_one_pass(self) -> None:
+        template = run.compile_template("{{topic}}: {{user_note}} / {{topic}} {{other}}")
+        self.assertEqual(template.slots, {"topic", "user_note", "other"})
+        self.assertEqual(template.render({"topic": "AI", "user_note": "{{topic}}"}), "AI: {{topic}} / AI {{other}}")
+
+    def test_a_file_is_parsed_once_per_version(self) -> None:
+        first = run.load_template("pro_agent_user.txt")
+        self.assertIs(run.load_template("pro_agent_user.txt"), first)
+        self.rewrite("pro_agent_user.txt", "주제: {{topic}}")
+        second = run.load_template("pro_agent_user.txt")
+        self.assertEqual((second.text, second.slots), ("주제: {{topic}}", {"topic"}))
+
+    def test_unknown_variables_fail_at_load_time(self) -> None:
+        self.rewrite("con_agent_user.txt", "{{topic}} {{user_note}}")
+        with self.assertRaisesRegex(ValueError, r"con_agent_user\.txt: .*\['user_note'\]"):
+            run.verify_prompt_files()
+
+    def test_missing_variables_fail_at_load_time(self) -> None:
+        text = (self.prompts / "structure_agent_user.txt").read_text(encoding="utf-8")
+        self.rewrite("structure_agent_user.txt", text.replace("{{debate_transcript}}", "(토론 생략)"))
+        with self.assertRaisesRegex(ValueError, r"structure .*\['debate_transcript'\]"):
+            run.verify_prompt_files()
+        with self.assertRaises(ValueError):
+            run.render_agent_prompt("structure", {"topic": "AI", "debate_transcript": "", "user_note": ""})
+
+
+class ScriptedModel(ModelBackend):
+    """Answers (or raises) from a script, one step per call, and keeps every prompt it was sent."""
+
+    def __init__(self, script: List[Union[str, BaseException]]) -> None:
+        self.script = list(script)
+        self.prompts: List[str] = []
+
+    def complete(self, kind: str, prompt: str, variables: Dict[str, str]) -> str:
+        self.prompts.append(prompt)
+        step = self.script.pop(0)
+        if isinstance(step, BaseException):
+            raise step
+        return step
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_classify(self) -> None:
+        policy = run.RetryPolicy()
+        for exc, category in (
+            (ValueError("3문장이 아님"), "validation"),
+            (SchemaError("invalid", [("structure", "must be an object")]), "validation"),
+            (OSError("reset"), "transient"),
+            (ConnectionResetError(), "transient"),
+            (TimeoutError(), "transient"),
+            (asyncio.TimeoutError(), "transient"),
+            (ModelUnavailable("503"), "transient"),
+            (ModelError("400"), "fatal"),
+            (RuntimeError("bug"), "fatal"),
+            (KeyError("topic"), "fatal"),
+        ):
+            with self.subTest(exc=type(exc).__name__):
+                self.assertEqual(policy.classify(exc), category)
+
+    def test_backoff_doubles_up_to_the_cap_within_the_jitter(self) -> None:
+        exact = run.RetryPolicy(base_delay=0.5, max_delay=3.0, jitter=0.0)
+        self.assertEqual([exact.backoff(n) for n in range(5)], [0.5, 1.0, 2.0, 3.0, 3.0])
+        jittered = run.RetryPolicy(base_delay=1.0, jitter=0.5)
+        for _ in range(50):
+            self.assertTrue(1.0 <= jittered.backoff(1) <= 3.0)
+
+
+class RetrySessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        saved = run.AGENT_MODEL
+        self.addCleanup(setattr, run, "AGENT_MODEL", saved)
+
+    def use_model(self, *script: Union[str, BaseException]) -> ScriptedModel:
+        run.AGENT_MODEL = model = ScriptedModel(list(script))
+        return model
+
+    def test_validation_failure_retries_at_once_with_feedback(self) -> None:
+        session = run.RetryPolicy().session()
+        variables: Dict[str, str] = dict(PRO_VARIABLES)
+        errors: List[str] = []
+        exc = ValueError("Pro 출력은 정확히 3문장이어야 합니다")
+        self.assertEqual(session.on_failure("pro", exc, 0, variables, errors), 0.0)
+        self.assertEqual(variables["retry_feedback"], str(exc))
+        self.assertEqual(errors, [str(exc)])
+        self.assertEqual((session.metrics.validation_failures, session.metrics.retries), (1, 1))
+
+    def test_transient_failure_backs_off_without_feedback(self) -> None:
+        session = run.RetryPolicy(base_delay=0.25, jitter=0.0).session()
+        variables: Dict[str, str] = dict(PRO_VARIABLES)
+        self.assertEqual(session.on_failure("pro", TimeoutError(), 1, variables, []), 0.5)
+        self.assertNotIn("retry_feedback", variables)
+        self.assertEqual((session.metrics.transient_failures, session.metrics.backoff_seconds), (1, 0.5))
+
+    def test_fatal_failure_and_the_last_attempt_do_not_retry(self) -> None:
+        session = run.RetryPolicy(max_retries=2).session()
+        self.assertIsNone(session.on_failure("pro", RuntimeError("bug"), 0, {}, []))
+        self.assertEqual(session.on_failure("pro", ValueError("bad"), 2, {}, []), 0.0)
+        self.assertEqual((session.metrics.fatal_failures, session.metrics.retries), (1, 0))
+
+    def test_session_budget_stops_a_backoff_that_would_overrun_it(self) -> None:
+        session = run.RetryPolicy(base_delay=5.0, jitter=0.0, session_budget=1.0).session()
+        with self.assertRaisesRegex(RuntimeError, "세션 시간 예산"):
+            session.on_failure("pro", OSError("down"), 0, {}, [])
+
+    def test_feedback_block_is_appended_to_the_retried_prompt(self) -> None:
+        model = self.use_model("한 문장입니다.", PRO_TEXT)
+        self.assertEqual(run.generate_with_retry("pro", PRO_VARIABLES, mock_mode=False), PRO_TEXT)
+        first, second = model.prompts
+        self.assertEqual(first, run.render_agent_prompt("pro", PRO_VARIABLES))
+        self.assertNotIn("[RETRY FEEDBACK]", first)
+        self.assertTrue(second.startswith(first + "\n\n[RETRY FEEDBACK]\n"))
+        self.assertIn("Pro 출력은 정확히 3문장이어야 합니다", second)
+
+    def test_transient_errors_are_retried_and_fatal_ones_raised(self) -> None:
+        policy = run.RetryPolicy(base_delay=0.0, jitter=0.0)
+        self.use_model(ModelUnavailable("503"), OSError("reset"), PRO_TEXT)
+        session = policy.session()
+        self.assertEqual(run.generate_with_retry("pro", PRO_VARIABLES, False, session=session), PRO_TEXT)
+        self.assertEqual((session.metrics.attempts, session.metrics.transient_failures), (3, 2))
+
+        model = self.use_model(ModelError("400"), PRO_TEXT)
+        session = policy.session()
+        with self.assertRaises(ModelError):
+            run.generate_with_retry("pro", PRO_VARIABLES, False, session=session)
+        self.assertEqual((len(model.prompts), session.metrics.fatal_failures), (1, 1))
+
+    def test_exhausted_retries_report_every_error(self) -> None:
+        self.use_model("하나.", "둘.", "셋.")
+        with self.assertRaisesRegex(RuntimeError, r"pro 생성 실패: .* \| .* \| "):
+            run.generate_with_retry("pro", PRO_VARIABLES, False, max_retries=2)
+
+
+def without_timings(results: List[run.RoundResult]) -> List[Dict[str, Any]]:
+    return [{**asdict(result), "timings": None} for result in results]
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SessionStore(os.path.join(directory.name, "sessions.sqlite3"))
+        self.addCleanup(self.store.close)
+
+    def run_rounds(self, rounds: int, session_id: str = "s", resume: Any = None) -> List[run.RoundResult]:
+        recorder = run.session_recorder(self.store, session_id)
+        return run.run_session(TOPIC, rounds, NOTES, True, False, on_round=recorder, resume=resume)
+
+    def test_round_trip(self) -> None:
+        results = self.run_rounds(2)
+        checkpoint = run.load_checkpoint(self.store, "s")
+        self.assertEqual(checkpoint.completed, results)
+        self.assertEqual(checkpoint.current_topic, results[-1].next_question)
+        self.assertEqual(checkpoint.previous_note, NOTES[1])
+        self.assertIsNone(run.load_checkpoint(self.store, "unknown"))
+
+    def test_resuming_matches_an_uninterrupted_session(self) -> None:
+        uninterrupted = self.run_rounds(3, session_id="whole")
+        self.run_rounds(2)
+        resumed = self.run_rounds(3, resume=run.load_checkpoint(self.store, "s"))
+        self.assertEqual(without_timings(resumed), without_timings(uninterrupted))
+        self.assertEqual(self.store.load("s").events, self.store.load("whole").events)
+
+    def test_restore_stops_at_the_first_round_without_a_checkpoint(self) -> None:
+        self.run_rounds(1)
+        self.store.append("s", [(2, "note", "체크포인트 없이 남은 메모")])
+        self.assertEqual(len(run.load_checkpoint(self.store, "s").completed), 1)
+
+    def test_a_backend_session_is_refused(self) -> None:
+        for session_id, opened in (
+            ("backend", {"topic": TOPIC, "seed": 42, "rng_version": 2, "engine": "backend"}),
+            ("legacy-backend", {"topic": TOPIC, "seed": 42}),  # logged before the engine tag
+        ):
+            self.store.append(session_id, [(0, "session", opened), (1, "debate", [])])
+            with self.subTest(session_id=session_id):
+                with self.assertRaisesRegex(ValueError, "backend"):
+                    run.load_checkpoint(self.store, session_id)
+                with self.assertRaisesRegex(ValueError, "backend"):
+                    run.session_recorder(self.store, session_id)
+                self.assertEqual(self.store.load(session_id).events, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
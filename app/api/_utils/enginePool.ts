@@ -0,0 +1,376 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import path from "path";
+
+// The engine runs as `python3 -m run` rather than `python3 backend/run.py`: a script path is
+// recompiled on every spawn, a module loads from its cached bytecode in backend/__pycache__
+// (written on first import, or up front by `npm run build`'s prebuild step).
+const ENGINE_ARGV = ["-X", "frozen_modules=on", "-m", "run"];
+
+export function spawnEngine(args: string[]): ChildProcessWithoutNullStreams {
+  const backendDir = path.join(process.cwd(), "backend");
+  const pythonPath = process.env.PYTHONPATH ? `${backendDir}${path.delimiter}${process.env.PYTHONPATH}` : backendDir;
+  return spawn("python3", [...ENGINE_ARGV, ...args], {
+    cwd: process.cwd(),
+    env: { ...process.env, PYTHONPATH: pythonPath },
+  });
+}
+
+export type EngineRequest = Record<string, unknown>;
+export type EngineEvent = Record<string, any>;
+
+export type PoolOutcome =
+  | { ok: true; payload: any; stderr: string }
+  | { ok: false; status: number; code: string; message: string; detail?: any };
+
+type Job = {
+  request: EngineRequest;
+  deadline: number;
+  onEvent?: (event: EngineEvent) => void;
+  resolve: (outcome: PoolOutcome) => void;
+  timer?: NodeJS.Timeout;
+  worker?: EngineWorker;
+  done: boolean;
+};
+
+/** Requests sharing one computation: the job's events and outcome go to every waiter. */
+type Flight = {
+  events: EngineEvent[];
+  waiters: Array<{ onEvent?: (event: EngineEvent) => void; settle: (outcome: PoolOutcome) => void }>;
+};
+
+export type PoolOptions = {
+  /** Warm `run.py --serve` processes. */
+  size: number;
+  /** Requests allowed to wait for a worker; beyond that, callers get 429. */
+  maxQueue: number;
+  /** First restart delay after a crash; doubles on crashes in a row, up to 5s. */
+  restartDelayMs: number;
+};
+
+const MAX_STDERR = 4000;
+// A worker that stays up this long counts as a healthy start and clears the crash streak.
+const HEALTHY_AFTER_MS = 1_000;
+
+// Request fields that do not change the computation.
+const TRANSPORT_FIELDS = new Set(["id", "deadline_ms"]);
+
+/** JSON with object keys sorted, so equal requests get equal keys whatever order the route built them in. */
+function canonicalJson(value: unknown): string {
+  if (Array.isArray(value)) return `[${value.map(canonicalJson).join(",")}]`;
+  if (value !== null && typeof value === "object") {
+    const record = value as Record<string, unknown>;
+    const keys = Object.keys(record).filter((k) => record[k] !== undefined).sort();
+    return `{${keys.map((k) => `${JSON.stringify(k)}:${canonicalJson(record[k])}`).join(",")}}`;
+  }
+  return JSON.stringify(value) ?? "null";
+}
+
+/**
+ * Key under which identical requests may share one computation, or null when they must not: only
+ * mock requests are deterministic, and a session request appends to the session log as it runs.
+ */
+function coalesceKey(request: EngineRequest): string | null {
+  if (request.mock !== true || request.session_id != null) return null;
+  const fields = Object.fromEntries(Object.entries(request).filter(([k]) => !TRANSPORT_FIELDS.has(k)));
+  return canonicalJson(fields);
+}
+
+/** One warm engine process answering one request at a time over the --serve line protocol. */
+class EngineWorker {
+  readonly child: ChildProcessWithoutNullStreams;
+  job: Job | null = null;
+  alive = true;
+  /** Killed at a request's deadline: slow, not broken, so its exit is not counted as a crash. */
+  expired = false;
+  private buffered = "";
+  private stderr = "";
+
+  constructor(private readonly pool: EnginePool) {
+    this.child = spawnEngine(["--serve", "--mock"]);
+    this.child.stdin.on("error", () => {});
+    // Decode across chunk boundaries: a Korean character split between two chunks must not turn into U+FFFD.
+    this.child.stdout.setEncoding("utf8");
+    this.child.stderr.setEncoding("utf8");
+    this.child.stdout.on("data", (d: string) => this.onData(d));
+    this.child.stderr.on("data", (d: string) => {
+      this.stderr = (this.stderr + d).slice(-MAX_STDERR);
+    });
+    this.child.on("error", () => this.onGone());
+    this.child.on("exit", () => this.onGone());
+    setTimeout(() => this.alive && this.pool.markHealthy(), HEALTHY_AFTER_MS).unref?.();
+  }
+
+  assign(job: Job, requestId: number) {
+    this.job = job;
+    this.stderr = "";
+    job.worker = this;
+    // The deadline travels with the request, so a worker never starts work nobody waits for.
+    this.child.stdin.write(`${JSON.stringify({ ...job.request, id: requestId, deadline_ms: job.deadline })}\n`);
+  }
+
+  kill() {
+    try {
+      this.child.kill("SIGKILL");
+    } catch {}
+  }
+
+  private onData(chunk: string) {
+    this.buffered += chunk;
+    let newline = this.buffered.indexOf("\n");
+    while (newline >= 0) {
+      const line = this.buffered.slice(0, newline).trim();
+      this.buffered = this.buffered.slice(newline + 1);
+      newline = this.buffered.indexOf("\n");
+      if (line) this.onLine(line);
+    }
+  }
+
+  private onLine(line: string) {
+    const job = this.job;
+    if (!job) return;
+    let parsed: any;
+    try {
+      parsed = JSON.parse(line);
+    } catch {
+      this.pool.finish(job, {
+        ok: false,
+        status: 500,
+        code: "BAD_JSON_FROM_ENGINE",
+        message: "Backend engine did not return valid JSON.",
+        detail: { stdout: line.slice(0, 2000), stderr: this.stderr },
+      });
+      this.kill(); // the protocol is out of sync; start over with a fresh process
+      return;
+    }
+    delete parsed?.id; // the pool's request id, not the caller's
+    if (typeof parsed?.event === "string") {
+      job.onEvent?.(parsed);
+      return;
+    }
+    this.job = null;
+    this.pool.finish(job, { ok: true, payload: parsed, stderr: this.stderr });
+    this.pool.release(this);
+  }
+
+  private onGone() {
+    if (!this.alive) return;
+    this.alive = false;
+    const job = this.job;
+    this.job = null;
+    if (job) {
+      this.pool.finish(job, {
+        ok: false,
+        status: 500,
+        code: "ENGINE_CRASHED",
+        message: "Backend engine exited while handling the request.",
+        detail: { stderr: this.stderr, exitCode: this.child.exitCode },
+      });
+    }
+    this.pool.replace(this);
+  }
+}
+
+/**
+ * Fixed set of warm engine workers behind a bounded FIFO queue.
+ * - Queue full: 429 ENGINE_BUSY; no live worker, or every recent start crashed: 503 ENGINE_UNAVAILABLE
+ * - Per-request deadline: a queued request expires with 504; a running one gets its worker killed
+ *   and restarted at once, so a stuck computation never holds a slot past its deadline (a deadline
+ *   kill is not a crash: it does not add to the streak behind backoff and 503s)
+ * - Single-flight: a mock request identical to one already queued or running joins it instead of
+ *   taking a worker or a queue slot (a class opening the same topic at once costs one computation);
+ *   joiners get the events so far replayed, then the rest live, and the same outcome (the shared run
+ *   keeps the first caller's deadline; each joiner also times out on its own)
+ */
+export class EnginePool {
+  private workers: EngineWorker[] = [];
+  private idle: EngineWorker[] = [];
+  private queue: Job[] = [];
+  private nextRequestId = 1;
+  private crashStreak = 0;
+  private flights = new Map<string, Flight>();
+  private counters = {
+    submitted: 0,
+    completed: 0,
+    failed: 0,
+    rejected: 0,
+    unavailable: 0,
+    timedOut: 0,
+    restarts: 0,
+    coalesced: 0,
+  };
+
+  constructor(private readonly options: PoolOptions) {
+    for (let i = 0; i < options.size; i++) this.addWorker();
+  }
+
+  run(request: EngineRequest, timeoutMs: number, onEvent?: (event: EngineEvent) => void): Promise<PoolOutcome> {
+    const key = coalesceKey(request);
+    const flight = key === null ? undefined : this.flights.get(key);
+    if (flight) return this.join(flight, timeoutMs, onEvent);
+    return new Promise((resolve) => {
+      this.counters.submitted += 1;
+      if (this.workers.length === 0 || this.crashStreak >= this.options.size) {
+        this.counters.unavailable += 1;
+        resolve({ ok: false, status: 503, code: "ENGINE_UNAVAILABLE", message: "Engine workers are down or restarting; retry shortly." });
+        return;
+      }
+      if (this.idle.length === 0 && this.queue.length >= this.options.maxQueue) {
+        this.counters.rejected += 1;
+        resolve({ ok: false, status: 429, code: "ENGINE_BUSY", message: "Engine queue is full; retry shortly." });
+        return;
+      }
+      const job: Job = { request, deadline: Date.now() + timeoutMs, onEvent, resolve, done: false };
+      if (key !== null) this.takeOff(key, job);
+      job.timer = setTimeout(() => this.expire(job), timeoutMs);
+      this.queue.push(job);
+      this.dispatch();
+    });
+  }
+
+  metrics() {
+    const busy = this.workers.length - this.idle.length;
+    return {
+      size: this.options.size,
+      live: this.workers.length,
+      busy,
+      idle: this.idle.length,
+      utilization: this.options.size ? busy / this.options.size : 0,
+      queueDepth: this.queue.length,
+      maxQueue: this.options.maxQueue,
+      inFlight: this.flights.size,
+      ...this.counters,
+    };
+  }
+
+  /** Settle a job exactly once (a response, a crash and a deadline can race). */
+  finish(job: Job, outcome: PoolOutcome) {
+    if (job.done) return;
+    job.done = true;
+    clearTimeout(job.timer);
+    if (outcome.ok) {
+      this.counters.completed += 1;
+    } else {
+      this.counters.failed += 1;
+    }
+    job.resolve(outcome);
+  }
+
+  release(worker: EngineWorker) {
+    if (!worker.alive) return;
+    this.idle.push(worker);
+    this.dispatch();
+  }
+
+  markHealthy() {
+    this.crashStreak = 0;
+  }
+
+  replace(worker: EngineWorker) {
+    this.workers = this.workers.filter((w) => w !== worker);
+    this.idle = this.idle.filter((w) => w !== worker);
+    // A deadline kill restarts at once; only crashes build the streak that leads to backoff and 503s.
+    if (!worker.expired) this.crashStreak += 1;
+    const delay = worker.expired ? 0 : Math.min(this.options.restartDelayMs * 2 ** Math.max(0, this.crashStreak - 1), 5_000);
+    const timer = setTimeout(() => {
+      this.counters.restarts += 1;
+      this.addWorker();
+      this.dispatch();
+    }, delay);
+    timer.unref?.();
+  }
+
+  /** Make `job` the computation for `key`: its events and outcome fan out to later joiners. */
+  private takeOff(key: string, job: Job) {
+    const flight: Flight = { events: [], waiters: [] };
+    this.flights.set(key, flight);
+    const { onEvent, resolve } = job;
+    job.onEvent = (event) => {
+      flight.events.push(event);
+      onEvent?.(event);
+      for (const waiter of flight.waiters) waiter.onEvent?.(event);
+    };
+    job.resolve = (outcome) => {
+      this.flights.delete(key);
+      resolve(outcome);
+      for (const waiter of flight.waiters) waiter.settle(outcome);
+    };
+  }
+
+  /** Wait on a computation already in flight, under this caller's own deadline. */
+  private join(flight: Flight, timeoutMs: number, onEvent?: (event: EngineEvent) => void): Promise<PoolOutcome> {
+    this.counters.submitted += 1;
+    this.counters.coalesced += 1;
+    return new Promise((resolve) => {
+      let settled = false;
+      const waiter = {
+        onEvent,
+        settle: (outcome: PoolOutcome) => {
+          if (settled) return;
+          settled = true;
+          clearTimeout(timer);
+          resolve(outcome);
+        },
+      };
+      const timer = setTimeout(() => {
+        flight.waiters = flight.waiters.filter((w) => w !== waiter);
+        this.counters.timedOut += 1;
+        waiter.settle({ ok: false, status: 504, code: "ENGINE_TIMEOUT", message: "Engine did not answer before the deadline." });
+      }, timeoutMs);
+      for (const event of flight.events) onEvent?.(event);
+      flight.waiters.push(waiter);
+    });
+  }
+
+  private addWorker() {
+    const worker = new EngineWorker(this);
+    this.workers.push(worker);
+    this.idle.push(worker);
+  }
+
+  private dispatch() {
+    while (this.idle.length > 0 && this.queue.length > 0) {
+      const job = this.queue.shift()!;
+      if (job.done) continue;
+      const worker = this.idle.shift()!;
+      worker.assign(job, this.nextRequestId++);
+    }
+  }
+
+  private expire(job: Job) {
+    if (job.done) return;
+    this.counters.timedOut += 1;
+    const running = job.worker;
+    this.queue = this.queue.filter((j) => j !== job);
+    this.finish(job, {
+      ok: false,
+      status: 504,
+      code: "ENGINE_TIMEOUT",
+      message: running ? "Engine did not answer before the deadline." : "Request waited in the engine queue past its deadline.",
+    });
+    if (running) {
+      running.expired = true;
+      running.kill(); // exit handler restarts it
+    }
+  }
+}
+
+const POOL_KEY = Symbol.for("thinkgym.enginePool");
+
+/**
+ * The process-wide pool (kept on globalThis so dev-mode reloads do not fork a new set), or null when
+ * THINKGYM_ENGINE_WORKERS=0 turns pooling off and each request spawns its own process.
+ */
+export function enginePool(): EnginePool | null {
+  const size = Number(process.env.THINKGYM_ENGINE_WORKERS ?? 4);
+  if (!Number.isFinite(size) || size < 1) return null;
+  const holder = globalThis as unknown as Record<symbol, EnginePool | undefined>;
+  if (!holder[POOL_KEY]) {
+    const maxQueue = Number(process.env.THINKGYM_ENGINE_QUEUE ?? 64);
+    holder[POOL_KEY] = new EnginePool({
+      size: Math.floor(size),
+      maxQueue: Number.isFinite(maxQueue) && maxQueue >= 0 ? Math.floor(maxQueue) : 64,
+      restartDelayMs: 250,
+    });
+  }
+  return holder[POOL_KEY]!;
+}
@@ -1,15 +1,86 @@
-import { spawn } from "child_process";
+import { enginePool, spawnEngine, type EngineRequest } from "./enginePool";
 
-type RunResult =
-  | { ok: true; data: any; exitCode: number }
-  | { ok: false; error: { code: string; message: string; detail?: any }; exitCode: number };
+// Engine mock RNG scheme the routes pin: v2, a stream per turn, which regenerating one turn or
+// report section needs. The engine's own default stays v1 for CLI and batch callers.
+export const RNG_VERSION = 2;
 
-export async function runPython(args: string[], timeoutMs = 30_000): Promise<RunResult> {
+type EngineError = { code: string; message: string; status?: number; detail?: any };
+
+type RunResult = { ok: true; data: any; exitCode: number } | { ok: false; error: EngineError; exitCode: number };
+
+function fromEnvelope(parsed: any, stderr: string, exitCode: number): RunResult {
+  if (!parsed?.ok) {
+    return {
+      ok: false,
+      exitCode,
+      error: {
+        code: parsed?.error?.code ?? "ENGINE_ERROR",
+        message: parsed?.error?.message ?? "Engine returned ok:false",
+        detail: { engine: parsed, stderr: stderr.slice(0, 2000), exitCode },
+      },
+    };
+  }
+  return { ok: true, data: { ...parsed, _stderr: stderr }, exitCode };
+}
+
+/** HTTP status and headers for a failed run: pool backpressure first, then the engine's http_hint. */
+export function engineErrorInit(error: EngineError): ResponseInit {
+  const hint = Number(error.status ?? error.detail?.engine?.error?.http_hint);
+  const status = Number.isFinite(hint) && hint >= 400 && hint <= 599 ? hint : 500;
+  return status === 429 || status === 503 ? { status, headers: { "Retry-After": "1" } } : { status };
+}
+
+/**
+ * Run one request document (`{mode, mock, topic, ...}`) on the warm worker pool, or in a process of
+ * its own when pooling is off (THINKGYM_ENGINE_WORKERS=0).
+ */
+export async function runEngine(request: EngineRequest, timeoutMs = 30_000): Promise<RunResult> {
+  const pool = enginePool();
+  if (!pool) return runPython(["--input-file", "-"], timeoutMs, request);
+  const outcome = await pool.run(request, timeoutMs);
+  if (!outcome.ok) {
+    return {
+      ok: false,
+      exitCode: -1,
+      error: { code: outcome.code, message: outcome.message, status: outcome.status, detail: outcome.detail },
+    };
+  }
+  return fromEnvelope(outcome.payload, outcome.stderr, 0);
+}
+
+/** Streaming counterpart of runEngine(): the same server-sent events as streamPython(). */
+export function streamEngine(request: EngineRequest, timeoutMs = 30_000): ReadableStream<Uint8Array> {
+  const pool = enginePool();
+  if (!pool) return streamPython(["--input-file", "-"], timeoutMs, request);
+  const encoder = new TextEncoder();
+
+  return new ReadableStream<Uint8Array>({
+    start(controller) {
+      const send = (event: string, data: unknown) => {
+        controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+      };
+      pool
+        .run({ ...request, stream: true }, timeoutMs, (event) => send(event.event, event))
+        .then((outcome) => {
+          if (outcome.ok) {
+            send("final", { event: "final", result: outcome.payload });
+          } else {
+            send("error", { code: outcome.code, message: outcome.message, status: outcome.status, detail: outcome.detail });
+          }
+          controller.close();
+        });
+    },
+  });
+}
+
+/** Run one engine request in a fresh process; `args` are run.py flags (e.g. ["--input-file", "-"]). */
+export async function runPython(args: string[], timeoutMs = 30_000, input?: unknown): Promise<RunResult> {
   return new Promise((resolve) => {
-    const child = spawn("python3", args, {
-      cwd: process.cwd(),
-      env: process.env,
-    });
+    const child = spawnEngine(args);
+
+    // Request payloads go over stdin (`--input-file -`), never argv, to stay clear of ARG_MAX.
+    child.stdin.on("error", () => {});
+    child.stdin.end(input === undefined ? undefined : JSON.stringify(input));
 
     let stdout = "";
     let stderr = "";
@@ -43,20 +114,69 @@ export async function runPython(args: string[], timeoutMs = 30_000): Promise<Run
         return;
       }
 
-      if (!parsed?.ok) {
-        resolve({
-          ok: false,
-          exitCode,
-          error: {
-            code: parsed?.error?.code ?? "ENGINE_ERROR",
-            message: parsed?.error?.message ?? "Engine returned ok:false",
-            detail: { engine: parsed, stderr: stderr.slice(0, 2000), exitCode },
-          },
-        });
-        return;
-      }
-
-      resolve({ ok: true, data: { ...parsed, _stderr: stderr }, exitCode });
+      resolve(fromEnvelope(parsed, stderr, exitCode));
     });
   });
 }
+
+/**
+ * Run the engine with `--stream` and forward each NDJSON event line as a server-sent event.
+ * The engine's last line is `{event: "final", result: <envelope>}`.
+ */
+export function streamPython(args: string[], timeoutMs = 30_000, input?: unknown): ReadableStream<Uint8Array> {
+  const encoder = new TextEncoder();
+
+  return new ReadableStream<Uint8Array>({
+    start(controller) {
+      const child = spawnEngine([...args, "--stream"]);
+
+      child.stdin.on("error", () => {});
+      child.stdin.end(input === undefined ? undefined : JSON.stringify(input));
+
+      let buffered = "";
+      let sawFinal = false;
+      let stderr = "";
+
+      const send = (event: string, data: unknown) => {
+        controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+      };
+
+      const killTimer = setTimeout(() => {
+        try {
+          child.kill("SIGKILL");
+        } catch {}
+      }, timeoutMs);
+
+      child.stdout.on("data", (d) => {
+        buffered += d.toString("utf-8");
+        let newline = buffered.indexOf("\n");
+        while (newline >= 0) {
+          const line = buffered.slice(0, newline).trim();
+          buffered = buffered.slice(newline + 1);
+          newline = buffered.indexOf("\n");
+          if (!line) continue;
+          try {
+            const parsed = JSON.parse(line);
+            if (parsed?.event === "final") sawFinal = true;
+            send(parsed?.event ?? "message", parsed);
+          } catch {
+            send("error", { code: "BAD_JSON_FROM_ENGINE", message: "Backend engine did not return valid JSON." });
+          }
+        }
+      });
+      child.stderr.on("data", (d) => (stderr += d.toString("utf-8")));
+
+      child.on("close", (code) => {
+        clearTimeout(killTimer);
+        if (!sawFinal) {
+          send("error", {
+            code: "BAD_JSON_FROM_ENGINE",
+            message: "Backend engine ended without a final event.",
+            detail: { stderr: stderr.slice(0, 2000), exitCode: code ?? -1 },
+          });
+        }
+        controller.close();
+      });
+    },
+  });
+}
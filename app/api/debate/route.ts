@@ -1,5 +1,5 @@
 import { NextResponse } from "next/server";
-import { runPython } from "../_utils/runPy";
+import { engineErrorInit, RNG_VERSION, runEngine, streamEngine } from "../_utils/runPy";
 
 export const runtime = "nodejs";
 
@@ -10,33 +10,48 @@ export async function POST(req: Request) {
     const round = Number(body?.round ?? 1);
     const seed = Number(body?.seed ?? 42);
     const userNote = body?.userNote ? String(body.userNote) : "";
+    const sessionId = body?.sessionId ? String(body.sessionId) : "";
 
     if (!topic) {
       return NextResponse.json({ ok: false, error: { code: "INVALID_INPUT", message: "topic is required" } }, { status: 400 });
     }
 
-    const args = [
-      "backend/run.py",
-      "--mode",
-      "debate",
-      "--topic",
-      topic,
-      "--round",
-      String(round),
-      "--seed",
-      String(seed),
-      "--mock",
-    ];
+    const input: Record<string, unknown> = { mode: "debate", mock: true, topic, round, seed, rng_version: RNG_VERSION };
 
     if (userNote) {
-      args.push("--user-note", userNote);
+      input.user_note = userNote;
+    }
+    if (sessionId) {
+      input.session_id = sessionId;
+    }
+    // e.g. { turn: 3 }: redraw one turn (and the con answering it) of the given or session debate.
+    if (body?.regenerate && typeof body.regenerate === "object") {
+      // The session log counts earlier redraws; without one the caller must, or every repeat returns the same draw.
+      if (!sessionId && !Number.isInteger(body.regenerate.variant)) {
+        return NextResponse.json(
+          { ok: false, error: { code: "INVALID_INPUT", message: "regenerate.variant (1, 2, ...) is required without a sessionId" } },
+          { status: 400 },
+        );
+      }
+      input.regenerate = body.regenerate;
+      if (!sessionId && Array.isArray(body?.debate)) {
+        input.debate = body.debate;
+      }
+    }
+
+    if (body?.stream) {
+      return new Response(streamEngine(input, 25_000), {
+        headers: {
+          "Content-Type": "text/event-stream; charset=utf-8",
+          "Cache-Control": "no-cache, no-transform",
+          Connection: "keep-alive",
+        },
+      });
     }
 
-    const r = await runPython(args, 25_000);
+    const r = await runEngine(input, 25_000);
     if (!r.ok) {
-      const hint = Number(r.error?.detail?.engine?.error?.http_hint);
-      const status = Number.isFinite(hint) && hint >= 400 && hint <= 599 ? hint : 500;
-      return NextResponse.json({ ok: false, error: r.error }, { status });
+      return NextResponse.json({ ok: false, error: r.error }, engineErrorInit(r.error));
     }
 
     return NextResponse.json({
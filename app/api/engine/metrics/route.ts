@@ -0,0 +1,10 @@
+import { NextResponse } from "next/server";
+import { enginePool } from "../../_utils/enginePool";
+
+export const runtime = "nodejs";
+export const dynamic = "force-dynamic";
+
+/** Worker pool gauges and counters; `pool` is null when pooling is off (THINKGYM_ENGINE_WORKERS=0). */
+export async function GET() {
+  return NextResponse.json({ ok: true, pool: enginePool()?.metrics() ?? null });
+}
@@ -1,5 +1,5 @@
 import { NextResponse } from "next/server";
-import { runPython } from "../_utils/runPy";
+import { engineErrorInit, RNG_VERSION, runEngine } from "../_utils/runPy";
 
 export const runtime = "nodejs";
 
@@ -10,46 +10,52 @@ export async function POST(req: Request) {
     const topic = String(body?.topic ?? "").trim();
     const round = Number(body?.round ?? 1);
     const seed = Number(body?.seed ?? 42);
-    const userNote = String(body?.userNote ?? "");
+    const userNote = body?.userNote == null ? undefined : String(body.userNote);
     const debate = body?.debate;
     const structure = body?.structure;
+    const sessionId = body?.sessionId ? String(body.sessionId) : "";
 
     if (!topic) {
       return NextResponse.json({ ok: false, error: { code: "INVALID_INPUT", message: "topic is required" } }, { status: 400 });
     }
-    if (!Array.isArray(debate) || debate.length !== 4) {
+    // With a session id the engine loads the round's debate, note, structure and report from the
+    // session log; any of them sent here overrides the logged value (and is logged as the round's new one).
+    if ((!sessionId || debate !== undefined) && (!Array.isArray(debate) || debate.length !== 4)) {
       return NextResponse.json({ ok: false, error: { code: "INVALID_INPUT", message: "debate (4 turns) is required" } }, { status: 400 });
     }
 
-    const debateJson = JSON.stringify(debate);
-
-    const args = [
-      "backend/run.py",
-      "--mode",
-      "report",
-      "--topic",
-      topic,
-      "--round",
-      String(round),
-      "--seed",
-      String(seed),
-      "--debate-json",
-      debateJson,
-      "--mock",
-      "--user-note",
-      userNote,
-    ];
+    const input: Record<string, unknown> = { mode: "report", mock: true, topic, round, seed, rng_version: RNG_VERSION };
 
+    if (sessionId) {
+      input.session_id = sessionId;
+    }
+    if (debate !== undefined) {
+      input.debate = debate;
+    }
+    if (userNote !== undefined || !sessionId) {
+      input.user_note = userNote ?? "";
+    }
     if (structure && typeof structure === "object") {
-      const structureJson = JSON.stringify(structure);
-      args.push("--structure-json", structureJson);
+      input.structure = structure;
+    }
+    if (typeof body?.report === "string") {
+      input.report = body.report;
+    }
+    // e.g. { report_sections: ["4"] }: re-render only those sections (and any whose inputs changed).
+    if (body?.regenerate && typeof body.regenerate === "object") {
+      // The session log counts earlier redraws; without one the caller must, or every repeat returns the same draw.
+      if (!sessionId && !Number.isInteger(body.regenerate.variant)) {
+        return NextResponse.json(
+          { ok: false, error: { code: "INVALID_INPUT", message: "regenerate.variant (1, 2, ...) is required without a sessionId" } },
+          { status: 400 },
+        );
+      }
+      input.regenerate = body.regenerate;
     }
 
-    const r = await runPython(args, 25_000);
+    const r = await runEngine(input, 25_000);
     if (!r.ok) {
-      const hint = Number(r.error?.detail?.engine?.error?.http_hint);
-      const status = Number.isFinite(hint) && hint >= 400 && hint <= 599 ? hint : 500;
-      return NextResponse.json({ ok: false, error: r.error }, { status });
+      return NextResponse.json({ ok: false, error: r.error }, engineErrorInit(r.error));
     }
 
     return NextResponse.json({
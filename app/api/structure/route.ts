@@ -1,5 +1,5 @@
 import { NextResponse } from "next/server";
-import { runPython } from "../_utils/runPy";
+import { engineErrorInit, RNG_VERSION, runEngine } from "../_utils/runPy";
 
 export const runtime = "nodejs";
 
@@ -10,40 +10,34 @@ export async function POST(req: Request) {
     const topic = String(body?.topic ?? "").trim();
     const round = Number(body?.round ?? 1);
     const seed = Number(body?.seed ?? 42);
-    const userNote = String(body?.userNote ?? "");
+    const userNote = body?.userNote == null ? undefined : String(body.userNote);
     const debate = body?.debate;
+    const sessionId = body?.sessionId ? String(body.sessionId) : "";
 
     if (!topic) {
       return NextResponse.json({ ok: false, error: { code: "INVALID_INPUT", message: "topic is required" } }, { status: 400 });
     }
-    if (!Array.isArray(debate) || debate.length !== 4) {
+    // With a session id the engine loads the round's debate and note from the session log; either
+    // one sent here overrides the logged value (and is logged as the round's new one).
+    if ((!sessionId || debate !== undefined) && (!Array.isArray(debate) || debate.length !== 4)) {
       return NextResponse.json({ ok: false, error: { code: "INVALID_INPUT", message: "debate (4 turns) is required" } }, { status: 400 });
     }
 
-    const debateJson = JSON.stringify(debate);
-
-    const args = [
-      "backend/run.py",
-      "--mode",
-      "structure",
-      "--topic",
-      topic,
-      "--round",
-      String(round),
-      "--seed",
-      String(seed),
-      "--debate-json",
-      debateJson,
-      "--mock",
-    ];
-
-    args.push("--user-note", userNote);
-
-    const r = await runPython(args, 25_000);
+    const input: Record<string, unknown> = { mode: "structure", mock: true, topic, round, seed, rng_version: RNG_VERSION };
+
+    if (sessionId) {
+      input.session_id = sessionId;
+    }
+    if (debate !== undefined) {
+      input.debate = debate;
+    }
+    if (userNote !== undefined || !sessionId) {
+      input.user_note = userNote ?? "";
+    }
+
+    const r = await runEngine(input, 25_000);
     if (!r.ok) {
-      const hint = Number(r.error?.detail?.engine?.error?.http_hint);
-      const status = Number.isFinite(hint) && hint >= 400 && hint <= 599 ? hint : 500;
-      return NextResponse.json({ ok: false, error: r.error }, { status });
+      return NextResponse.json({ ok: false, error: r.error }, engineErrorInit(r.error));
     }
 
     return NextResponse.json({
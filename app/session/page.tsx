@@ -25,10 +25,18 @@ const TOPIC_PRESETS = [
   "탄소세를 강하게 도입해야 하는가?",
 ];
 
+function newSessionId(): string {
+  // randomUUID is only available in secure contexts (https / localhost).
+  if (typeof crypto !== "undefined" && typeof crypto.randomUUID === "function") return crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 export default function SessionPage() {
   const [round, setRound] = useState<number>(1);
   const [step, setStep] = useState<Step>(1);
   const [seed] = useState<number>(42);
+  // The engine keeps each round's debate/note/structure in its session log, so later steps send only their delta.
+  const [sessionId, setSessionId] = useState<string>("");
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [errorMessage, setErrorMessage] = useState<string>("");
   const [lastAction, setLastAction] = useState<ApiAction | null>(null);
@@ -137,6 +145,7 @@ ${topic}
   }, [step]);
 
   function resetSession() {
+    setSessionId("");
     setRound(1);
     setStep(1);
     setTopic(TOPIC_PRESETS[0]);
@@ -176,6 +185,8 @@ ${topic}
       return;
     }
 
+    const sid = sessionId || newSessionId();
+    setSessionId(sid);
     setIsLoading(true);
     setLastAction("debate");
     setErrorMessage("");
@@ -185,6 +196,7 @@ ${topic}
         round,
         seed,
         userNote,
+        sessionId: sid,
       });
       setTopic(finalTopic);
       setDebate(body.debate ?? []);
@@ -211,8 +223,8 @@ ${topic}
         topic,
         round,
         seed,
-        debate,
         userNote,
+        sessionId,
       });
       setStructure(body.structure ?? null);
       setStep(4);
@@ -236,9 +248,7 @@ ${topic}
         topic,
         round,
         seed,
-        debate,
-        userNote,
-        structure,
+        sessionId,
       });
       setReport(body.report ?? "");
       setStep(5);
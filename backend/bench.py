@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ThinkGym benchmark harness (offline: mock engines, and a local stub model server).
+- backend/run.py: cold-start process per call (launched like the API routes: `-m run`) vs
+  in-process run_engine, per mode, checked against --cold-budget-ms
+- engine.importtime: `python -X importtime` totals per mode, with the costliest imports
+- thinkgym-mini: run_session for 1..N rounds
+- validators and keyword extraction on large inputs
+- serializers: full-mode payloads through stdlib json.dumps vs the serializer layer
+- model: pooled keep-alive connections vs a fresh connection per call, concurrent complete_many()
+  vs one call after another, and non-mock full mode, all against StubModelServer replaying the
+  mock engine's own outputs
+- Reports p50/p95/p99, throughput and peak RSS; --out writes a JSON baseline,
+  --baseline compares against one and exits 1 past --threshold
+"""
+
+from __future__ import annotations
+
+import argparse
+import compileall
+import importlib.util
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BACKEND_DIR.parent
+THINKGYM_RUN_PY = REPO_ROOT / ".agents" / "thinkgym-mini" / "run.py"
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import model_backend  # noqa: E402
+import run as engine  # noqa: E402
+import serializers  # noqa: E402
+
+TOPIC = "AI가 교사를 대체해야 하는가?"
+USER_NOTE = "생산성은 오르지만 협업 리듬이 깨질 수 있어서 검증 지표를 먼저 합의한 조건부 도입이 필요합니다"
+MODES = ["debate", "structure", "report", "full"]
+
+# Target p50 for one engine.cold_start request, interpreter start-up included; enforced by
+# --cold-budget-ms here and by test_cold_start.py under THINKGYM_BENCH=1.
+COLD_START_BUDGET_MS = 100.0
+# `import time: <self us> | <cumulative us> | <indent><module>`
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def eprint(*args: Any) -> None:
+    print(*args, file=sys.stderr)
+
+
+def load_thinkgym() -> Any:
+    spec = importlib.util.spec_from_file_location("thinkgym_mini_run", THINKGYM_RUN_PY)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    k = (len(sorted_samples) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 2)
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float], children: bool = False) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "mean_ms": round(total / len(ordered) * 1000, 4) if ordered else 0.0,
+        "throughput_per_s": round(len(ordered) / total, 2) if total else 0.0,
+        "peak_rss_mb": peak_rss_mb(children),
+    }
+
+
+def sample_inputs() -> Dict[str, Any]:
+    debate = engine.run_engine("debate", TOPIC, 1, USER_NOTE, None, None, True, 42)["debate"]
+    structure = engine.run_engine("structure", TOPIC, 1, USER_NOTE, debate, None, True, 42)["structure"]
+    return {"debate": debate, "structure": structure}
+
+
+def engine_args(mode: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "mode": mode,
+        "topic": TOPIC,
+        "round_idx": 1,
+        "user_note": USER_NOTE,
+        "debate_json": inputs["debate"] if mode in ("structure", "report") else None,
+        "structure_json": dict(inputs["structure"]) if mode == "report" else None,
+        "mock": True,
+        "seed": 42,
+    }
+
+
+def bench_engine_in_process(iterations: int, inputs: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for mode in MODES:
+        samples = measure(lambda: engine.run_engine(**engine_args(mode, inputs)), iterations)
+        results[f"engine.in_process.{mode}"] = summarize(samples)
+    return results
+
+
+def cold_request(mode: str, inputs: Dict[str, Any]) -> bytes:
+    request = {"mode": mode, "topic": TOPIC, "round": 1, "seed": 42, "user_note": USER_NOTE}
+    if mode in ("structure", "report"):
+        request["debate"] = inputs["debate"]
+    if mode == "report":
+        request["structure"] = inputs["structure"]
+    return json.dumps(request, ensure_ascii=False).encode("utf-8")
+
+
+def engine_command(*python_flags: str) -> List[str]:
+    """Same launch as app/api/_utils/runPy.ts: the engine as a module, so its bytecode is cached."""
+    return [sys.executable, *python_flags, "-X", "frozen_modules=on", "-m", "run", "--mock", "--input-file", "-"]
+
+
+def engine_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def run_engine_process(cmd: List[str], stdin: bytes, label: str) -> subprocess.CompletedProcess:
+    proc = subprocess.run(cmd, input=stdin, capture_output=True, check=False, cwd=REPO_ROOT, env=engine_env())
+    if proc.returncode != 0:
+        raise RuntimeError(f"{label} failed: {proc.stdout[:500]!r} {proc.stderr[:500]!r}")
+    return proc
+
+
+def bench_engine_cold_start(iterations: int, inputs: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Precompile, as `npm run build` does, so the first samples do not pay for compilation.
+    compileall.compile_dir(str(BACKEND_DIR), maxlevels=0, quiet=1)
+    results = {}
+    for mode in MODES:
+        stdin = cold_request(mode, inputs)
+        cmd = engine_command()
+        results[f"engine.cold_start.{mode}"] = summarize(
+            measure(lambda: run_engine_process(cmd, stdin, mode), iterations), children=True
+        )
+    return results
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per top-level import from `-X importtime` output."""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not match.group(3):
+            totals[match.group(4)] = int(match.group(2))
+    return totals
+
+
+def bench_engine_importtime(iterations: int, inputs: Dict[str, Any], top: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Total import time per mode (`import time` lines only; the engine's own stderr is ignored)."""
+    compileall.compile_dir(str(BACKEND_DIR), maxlevels=0, quiet=1)
+    results = {}
+    for mode in MODES:
+        stdin = cold_request(mode, inputs)
+        cmd = engine_command("-X", "importtime")
+        samples: List[float] = []
+        per_module: Dict[str, List[int]] = {}
+        for _ in range(iterations):
+            totals = parse_importtime(run_engine_process(cmd, stdin, mode).stderr.decode("utf-8", errors="replace"))
+            samples.append(sum(totals.values()) / 1_000_000)  # seconds, like measure()
+            for name, us in totals.items():
+                per_module.setdefault(name, []).append(us)
+        stats = summarize(samples, children=True)
+        medians = {name: statistics.median(us) / 1000 for name, us in per_module.items()}
+        stats["top_imports_ms"] = {
+            name: round(ms, 3) for name, ms in sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top]
+        }
+        results[f"engine.importtime.{mode}"] = stats
+    return results
+
+
+def bench_thinkgym_rounds(iterations: int, max_rounds: int) -> Dict[str, Dict[str, Any]]:
+    tg = load_thinkgym()
+    tg.verify_prompt_files()
+    notes = [USER_NOTE] * max_rounds
+    results = {}
+    for rounds in range(1, max_rounds + 1):
+        samples = measure(lambda: tg.run_session(TOPIC, rounds, notes, True, False), iterations)
+        results[f"thinkgym.run_session.rounds_{rounds}"] = summarize(samples)
+    return results
+
+
+def bench_validators(iterations: int, inputs: Dict[str, Any], scale: int) -> Dict[str, Dict[str, Any]]:
+    tg = load_thinkgym()
+    long_text = " ".join(turn["text"] for turn in inputs["debate"]) * scale
+    pro_text = inputs["debate"][0]["text"]
+    con_text = tg.mock_con(TOPIC, pro_text)
+    structure_text = tg.mock_structure(TOPIC, long_text, USER_NOTE)
+    structure = json.loads(structure_text)
+    report = tg.mock_summary(TOPIC, tg.mock_pro(TOPIC, USER_NOTE), con_text, USER_NOTE, structure)
+    long_debate = [{"role": turn["role"], "text": turn["text"] * scale} for turn in inputs["debate"]]
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "validators.backend.validate_debate": lambda: engine.validate_debate(long_debate),
+        "validators.backend.validate_structure": lambda: engine.validate_structure(dict(inputs["structure"])),
+        "validators.backend.normalize_sentences_3": lambda: engine.normalize_sentences_3(long_text),
+        "validators.backend.extract_keywords_koreanish": lambda: engine.extract_keywords_koreanish(long_text),
+        "validators.thinkgym.sentence_count": lambda: tg.sentence_count(long_text),
+        "validators.thinkgym.extract_salient_keywords": lambda: tg.extract_salient_keywords(long_text),
+        "validators.thinkgym.validate_con_first_sentence": lambda: tg.validate_con_first_sentence(con_text, long_text),
+        "validators.thinkgym.validate_structure_json": lambda: tg.validate_structure_json(structure, USER_NOTE),
+        "validators.thinkgym.validate_summary_report": lambda: tg.validate_summary_report(report),
+    }
+    return {name: summarize(measure(fn, iterations)) for name, fn in cases.items()}
+
+
+def bench_serializers(iterations: int, inputs: Dict[str, Any], scale: int) -> Dict[str, Dict[str, Any]]:
+    """Serialize full-mode payloads: one as produced, and one with every text field repeated `scale` times."""
+    payload = engine.run_engine(**engine_args("full", inputs))
+    large = json.loads(json.dumps(payload))
+    large["debate"] = [{"role": turn["role"], "text": turn["text"] * scale} for turn in payload["debate"]]
+    large["report"] = payload["report"] * scale
+
+    candidates: Dict[str, Callable[[Any], Any]] = {
+        # What write_json did before the serializer layer.
+        "json.dumps": lambda p: json.dumps(p, ensure_ascii=False).encode("utf-8"),
+        "stdlib_compact": serializers.stdlib_dumps,
+    }
+    orjson = serializers.optional_module("orjson")
+    if orjson is not None:
+        candidates["orjson"] = orjson.dumps
+    if serializers.optional_module("msgpack") is not None:
+        candidates["msgpack"] = serializers.MsgpackSerializer().dumps
+
+    results = {}
+    for size, doc in (("full", payload), ("full_x_scale", large)):
+        for name, dumps in candidates.items():
+            results[f"serialize.{size}.{name}"] = summarize(measure(lambda: dumps(doc), iterations))
+    return results
+
+
+def canned_model_responses(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Stub replies for run.py's model kinds, taken from the mock engine so they validate."""
+    payload = engine.run_engine(**engine_args("full", inputs))
+    turns = payload["debate"]
+    return {
+        "pro": [turn["text"] for turn in turns if turn["role"] == "pro"],
+        "con": [turn["text"] for turn in turns if turn["role"] == "con"],
+        "structure": json.dumps(payload["structure"], ensure_ascii=False),
+        "report": payload["report"],
+    }
+
+
+def bench_model_backend(iterations: int, inputs: Dict[str, Any], fan_out: int = 8, delay_ms: float = 5.0) -> Dict[str, Dict[str, Any]]:
+    canned = canned_model_responses(inputs)
+    call = ("pro", "bench", {"topic": TOPIC, "user_note": USER_NOTE})
+    results = {}
+    with model_backend.StubModelServer(canned) as stub:
+        pooled = model_backend.HttpModelBackend(stub.url)
+
+        def fresh_connection() -> str:
+            backend = model_backend.HttpModelBackend(stub.url)
+            try:
+                return backend.complete(*call)
+            finally:
+                backend.close()
+
+        results["model.call.keep_alive"] = summarize(measure(lambda: pooled.complete(*call), iterations))
+        results["model.call.fresh_connection"] = summarize(measure(fresh_connection, iterations))
+
+        engine.MODEL_BACKEND = pooled
+        try:
+            full = dict(engine_args("full", inputs), mock=False)
+            results["model.engine.full"] = summarize(measure(lambda: engine.run_engine(**full), iterations))
+        finally:
+            engine.MODEL_BACKEND = None
+        results["model.call.keep_alive"]["reuse_ratio"] = pooled.stats()["reuse_ratio"]
+        pooled.close()
+
+    # With simulated model latency, fan-out is where the per-host pool pays off.
+    with model_backend.StubModelServer(canned, delay_ms=delay_ms) as stub:
+        pooled = model_backend.HttpModelBackend(stub.url, max_per_host=fan_out)
+        calls = [call] * fan_out
+        rounds = max(1, iterations // 10)
+        results[f"model.fan_out_{fan_out}.sequential"] = summarize(
+            measure(lambda: [pooled.complete(*c) for c in calls], rounds)
+        )
+        results[f"model.fan_out_{fan_out}.complete_many"] = summarize(measure(lambda: pooled.complete_many(calls), rounds))
+        pooled.close()
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return one line per case whose p50 slowed down by more than threshold (e.g. 0.25 = +25%)."""
+    regressions = []
+    base_cases = baseline.get("cases", {})
+    for name, stats in current["cases"].items():
+        old = base_cases.get(name)
+        if not old or not old.get("p50_ms"):
+            continue
+        ratio = stats["p50_ms"] / old["p50_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: p50 {old['p50_ms']}ms -> {stats['p50_ms']}ms (x{ratio:.2f})")
+    return regressions
+
+
+def over_budget(cases: Dict[str, Dict[str, Any]], budget_ms: float) -> List[str]:
+    """One line per engine.cold_start case whose p50 exceeds the budget."""
+    return [
+        f"{name}: p50 {stats['p50_ms']}ms > budget {budget_ms}ms"
+        for name, stats in cases.items()
+        if name.startswith("engine.cold_start.") and stats["p50_ms"] > budget_ms
+    ]
+
+
+def print_table(cases: Dict[str, Dict[str, Any]]) -> None:
+    width = max(len(name) for name in cases)
+    print(f"{'case'.ljust(width)}  {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10} {'rss MB':>8}")
+    for name, stats in cases.items():
+        print(
+            f"{name.ljust(width)}  {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f}"
+            f" {stats['throughput_per_s']:>10.1f} {stats['peak_rss_mb']:>8.1f}"
+        )
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ThinkGym benchmark harness")
+    parser.add_argument("--iterations", type=int, default=200, help="Iterations for in-process cases")
+    parser.add_argument("--cold-iterations", type=int, default=20, help="Iterations for process-per-call cases")
+    parser.add_argument("--rounds", type=int, default=5, help="Max rounds for run_session cases")
+    parser.add_argument("--scale", type=int, default=200, help="Repeat factor for large validator inputs")
+    parser.add_argument("--only", default=None, help="Run only cases whose group starts with this prefix")
+    parser.add_argument("--out", default=None, help="Write results as a JSON baseline")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous --out file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument(
+        "--cold-budget-ms",
+        type=float,
+        default=COLD_START_BUDGET_MS,
+        help="Fail when an engine.cold_start p50 exceeds this (0 disables)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> None:
+    args = parse_args(argv)
+    inputs = sample_inputs()
+    groups: Dict[str, Callable[[], Dict[str, Dict[str, Any]]]] = {
+        "engine.in_process": lambda: bench_engine_in_process(args.iterations, inputs),
+        "engine.cold_start": lambda: bench_engine_cold_start(args.cold_iterations, inputs),
+        "engine.importtime": lambda: bench_engine_importtime(args.cold_iterations, inputs),
+        "thinkgym": lambda: bench_thinkgym_rounds(max(1, args.iterations // 10), args.rounds),
+        "validators": lambda: bench_validators(args.iterations, inputs, args.scale),
+        "serialize": lambda: bench_serializers(args.iterations, inputs, args.scale),
+        "model": lambda: bench_model_backend(args.iterations, inputs),
+    }
+
+    cases: Dict[str, Dict[str, Any]] = {}
+    for name, run_group in groups.items():
+        if args.only and not name.startswith(args.only):
+            continue
+        eprint(f"running {name} ...")
+        cases.update(run_group())
+
+    result = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": cases,
+    }
+    print_table(cases)
+    for name, stats in cases.items():
+        if "top_imports_ms" in stats:
+            imports = ", ".join(f"{module} {ms:.1f}" for module, ms in stats["top_imports_ms"].items())
+            print(f"  {name} top imports (ms): {imports}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        eprint(f"wrote {args.out}")
+
+    failed = False
+    if args.cold_budget_ms > 0:
+        exceeded = over_budget(cases, args.cold_budget_ms)
+        if exceeded:
+            print(f"\nCOLD START OVER BUDGET ({args.cold_budget_ms}ms):")
+            for line in exceeded:
+                print(f"- {line}")
+            failed = True
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("\nREGRESSIONS (threshold +{:.0%}):".format(args.threshold))
+            for line in regressions:
+                print(f"- {line}")
+            failed = True
+        else:
+            print(f"\nno regressions vs {args.baseline} (threshold +{args.threshold:.0%})")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
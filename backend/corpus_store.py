@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed corpus of generated debates, structures and reports.
+- Every turn text, structure item and report line is interned once in corpus_blobs (sha256 of the text)
+- An entry stores references to blobs, plus its topic, seed, round, stance, mode, and whether it
+  is mock or model text and which mock RNG scheme drew it (mock, rng_version)
+- Re-recording identical output is a no-op (entries are keyed by the hash of their references)
+- Lookups by topic / seed / round / stance are index scans; load() rehydrates the full payload
+- similar_topics(): near-duplicate topics through a MinHash/LSH index kept beside the entries
+
+Query from the shell:
+  python3 backend/corpus_store.py .thinkgym/corpus.sqlite3 --topic "AI 교사" [--stance 조건부] [--stats]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import topic_index
+from result_cache import canonical_key
+
+DEFAULT_CORPUS_DB = os.path.join(".thinkgym", "corpus.sqlite3")
+INDEXED_FIELDS = ("mode", "topic", "seed", "round", "stance", "mock", "rng_version")
+KINDS = ("debate", "structure", "report")
+
+Blobs = Dict[str, str]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _ref(text: str, blobs: Blobs) -> str:
+    h = text_hash(text)
+    blobs[h] = text
+    return h
+
+
+def _intern_value(value: Any, blobs: Blobs) -> Any:
+    """str -> hash, list of str -> list of hashes; anything else is kept inline as {"value": ...}."""
+    if isinstance(value, str):
+        return _ref(value, blobs)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return [_ref(item, blobs) for item in value]
+    return {"value": value}
+
+
+def intern_debate(debate: List[Dict[str, Any]], blobs: Blobs) -> List[List[str]]:
+    return [[turn["role"], _ref(turn["text"], blobs)] for turn in debate]
+
+
+def intern_structure(structure: Dict[str, Any], blobs: Blobs) -> Dict[str, Any]:
+    return {key: _intern_value(value, blobs) for key, value in structure.items()}
+
+
+def intern_report(report: str, blobs: Blobs) -> List[str]:
+    # Line granularity: template headers and bullet lines repeat across reports.
+    return [_ref(line, blobs) for line in report.split("\n")]
+
+
+def _with_mock_flag(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """sqlite hands the mock column back as 0/1 (None for entries recorded before it existed)."""
+    if entry["mock"] is not None:
+        entry["mock"] = bool(entry["mock"])
+    return entry
+
+
+class CorpusStore:
+    """sqlite-backed corpus. Thread-safe; several processes may record into the same file."""
+
+    def __init__(self, path: str = DEFAULT_CORPUS_DB) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS corpus_blobs (hash TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_entries ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE,"
+            " mode TEXT NOT NULL, topic TEXT NOT NULL, seed INTEGER NOT NULL, round INTEGER NOT NULL,"
+            " stance TEXT NOT NULL, note TEXT, debate TEXT, structure TEXT, report TEXT,"
+            " raw_bytes INTEGER NOT NULL, created_at REAL NOT NULL, mock INTEGER, rng_version INTEGER)"
+        )
+        self._add_missing_columns()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS corpus_topic ON corpus_entries(topic, seed, round)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS corpus_stance ON corpus_entries(stance, topic)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS corpus_generator ON corpus_entries(mock, rng_version, topic)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_topic_bands ("
+            " band INTEGER NOT NULL, bucket TEXT NOT NULL, topic TEXT NOT NULL,"
+            " PRIMARY KEY (band, bucket, topic)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS corpus_topics (topic TEXT PRIMARY KEY)")
+        self._index_missing_topics()
+
+    def _add_missing_columns(self) -> None:
+        """Add the columns of corpora created before they existed. Their entries keep NULL there:
+        how they were generated is unknown, so lookups that filter on it never match them."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(corpus_entries)")}
+        for name in ("mock", "rng_version"):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE corpus_entries ADD COLUMN {name} INTEGER")
+
+    def _index_topic(self, topic: str) -> None:
+        """Add a topic to the LSH index (inside the caller's transaction)."""
+        if self._conn.execute("INSERT OR IGNORE INTO corpus_topics (topic) VALUES (?)", (topic,)).rowcount != 1:
+            return
+        keys = topic_index.band_keys(topic_index.signature(topic_index.shingles(topic)))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO corpus_topic_bands (band, bucket, topic) VALUES (?, ?, ?)",
+            [(band, bucket, topic) for band, bucket in keys],
+        )
+
+    def _index_missing_topics(self) -> None:
+        """Backfill topics recorded before the similarity index existed."""
+        missing = self._conn.execute(
+            "SELECT DISTINCT topic FROM corpus_entries WHERE topic NOT IN (SELECT topic FROM corpus_topics)"
+        ).fetchall()
+        if not missing:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (topic,) in missing:
+                self._index_topic(topic)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def record(
+        self,
+        mode: str,
+        topic: str,
+        seed: int,
+        round_idx: int,
+        stance: str,
+        mock: bool,
+        rng_version: int,
+        user_note: Optional[str] = None,
+        debate: Optional[List[Dict[str, Any]]] = None,
+        structure: Optional[Dict[str, Any]] = None,
+        report: Optional[str] = None,
+    ) -> Tuple[int, bool]:
+        """Intern and store one generation; returns (entry id, whether it was new). `mock` and
+        `rng_version` say how it was generated (rng_version only matters for mock text)."""
+        blobs: Blobs = {}
+        refs = {
+            "note": _ref(user_note, blobs) if user_note else None,
+            "debate": intern_debate(debate, blobs) if debate is not None else None,
+            "structure": intern_structure(structure, blobs) if structure is not None else None,
+            "report": intern_report(report, blobs) if report is not None else None,
+        }
+        meta = {
+            "mode": mode,
+            "topic": topic,
+            "seed": seed,
+            "round": round_idx,
+            "stance": stance,
+            "mock": bool(mock),
+            "rng_version": rng_version,
+        }
+        key = canonical_key({**meta, **refs})
+        columns = {kind: json.dumps(refs[kind]) if refs[kind] is not None else None for kind in KINDS}
+        # What storing the blobs inline would have cost, for stats().
+        raw = {"debate": debate, "structure": structure, "report": report, "note": user_note}
+        raw_bytes = len(json.dumps({k: v for k, v in raw.items() if v is not None}, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT OR IGNORE INTO corpus_blobs (hash, text) VALUES (?, ?)", blobs.items())
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO corpus_entries"
+                    " (key, mode, topic, seed, round, stance, mock, rng_version, note, debate, structure, report,"
+                    " raw_bytes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, mode, topic, seed, round_idx, stance, int(bool(mock)), rng_version, refs["note"],
+                     columns["debate"], columns["structure"], columns["report"], raw_bytes, time.time()),
+                )
+                created = cursor.rowcount == 1
+                if created:
+                    self._index_topic(topic)
+                entry_id = self._conn.execute("SELECT id FROM corpus_entries WHERE key = ?", (key,)).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return entry_id, created
+
+    def find(self, kind: Optional[str] = None, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """Entry summaries matching every given field (INDEXED_FIELDS), oldest first.
+        With `kind`, only entries holding that part (debate, structure or report)."""
+        clauses = []
+        params: List[Any] = []
+        for name, value in filters.items():
+            if name not in INDEXED_FIELDS:
+                raise ValueError(f"unknown corpus field: {name}")
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(int(value) if name == "mock" else value)
+        if kind is not None:
+            if kind not in KINDS:
+                raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+            clauses.append(f"{kind} IS NOT NULL")
+        sql = f"SELECT id, {', '.join(INDEXED_FIELDS)}, created_at FROM corpus_entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        names = ("id",) + INDEXED_FIELDS + ("created_at",)
+        return [_with_mock_flag(dict(zip(names, row))) for row in rows]
+
+    def similar_topics(
+        self, topic: str, threshold: float = topic_index.DEFAULT_THRESHOLD, limit: int = 5
+    ) -> List[Tuple[str, float]]:
+        """Indexed topics whose shingle Jaccard similarity to `topic` is >= threshold, best first.
+        The topic itself is included when it is indexed (similarity 1.0)."""
+        query = topic_index.shingles(topic)
+        keys = topic_index.band_keys(topic_index.signature(query))
+        marks = ",".join("(?, ?)" for _ in keys)
+        params = [value for key in keys for value in key]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT topic FROM corpus_topic_bands WHERE (band, bucket) IN (VALUES {marks})", params
+            ).fetchall()
+        scored = []
+        for (candidate,) in rows:
+            score = topic_index.jaccard(query, topic_index.shingles(candidate))
+            if score >= threshold:
+                scored.append((candidate, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def load(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """The entry with its note, debate, structure and report rehydrated; None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mode, topic, seed, round, stance, mock, rng_version, note, debate, structure, report"
+                " FROM corpus_entries WHERE id = ?",
+                (entry_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            mode, topic, seed, round_idx, stance, mock, rng_version, note, debate, structure, report = row
+            refs = {
+                "debate": json.loads(debate) if debate else None,
+                "structure": json.loads(structure) if structure else None,
+                "report": json.loads(report) if report else None,
+            }
+            texts = self._texts(note, refs)
+        entry: Dict[str, Any] = _with_mock_flag(
+            {
+                "id": entry_id,
+                "mode": mode,
+                "topic": topic,
+                "seed": seed,
+                "round": round_idx,
+                "stance": stance,
+                "mock": mock,
+                "rng_version": rng_version,
+            }
+        )
+        entry["user_note"] = texts[note] if note else None
+        if refs["debate"] is not None:
+            entry["debate"] = [{"role": role, "text": texts[h]} for role, h in refs["debate"]]
+        if refs["structure"] is not None:
+            entry["structure"] = {key: self._rehydrate(value, texts) for key, value in refs["structure"].items()}
+        if refs["report"] is not None:
+            entry["report"] = "\n".join(texts[h] for h in refs["report"])
+        return entry
+
+    def _texts(self, note: Optional[str], refs: Dict[str, Any]) -> Dict[str, str]:
+        """Fetch every blob an entry references in one query."""
+        hashes = set()
+        if note:
+            hashes.add(note)
+        for _, h in refs["debate"] or ():
+            hashes.add(h)
+        for value in (refs["structure"] or {}).values():
+            if isinstance(value, str):
+                hashes.add(value)
+            elif isinstance(value, list):
+                hashes.update(value)
+        hashes.update(refs["report"] or ())
+        if not hashes:
+            return {}
+        marks = ",".join("?" * len(hashes))
+        return dict(self._conn.execute(f"SELECT hash, text FROM corpus_blobs WHERE hash IN ({marks})", list(hashes)).fetchall())
+
+    @staticmethod
+    def _rehydrate(value: Any, texts: Dict[str, str]) -> Any:
+        if isinstance(value, str):
+            return texts[value]
+        if isinstance(value, list):
+            return [texts[h] for h in value]
+        return value["value"]
+
+    def stats(self) -> Dict[str, int]:
+        """Entry, topic and blob counts, interned text bytes vs what inline storage would have used."""
+        with self._lock:
+            entries, raw_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0) FROM corpus_entries"
+            ).fetchone()
+            blobs, blob_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0) FROM corpus_blobs"
+            ).fetchone()
+            topics = self._conn.execute("SELECT COUNT(*) FROM corpus_topics").fetchone()[0]
+        return {"entries": entries, "topics": topics, "blobs": blobs, "blob_bytes": blob_bytes, "raw_bytes": raw_bytes}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Query the ThinkGym debate corpus")
+    parser.add_argument("db", nargs="?", default=DEFAULT_CORPUS_DB, help="corpus sqlite file (run.py --corpus-db)")
+    for name in INDEXED_FIELDS:
+        value_type = int if name in ("seed", "round", "mock", "rng_version") else str
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=value_type, default=None)
+    parser.add_argument("--kind", choices=list(KINDS), default=None, help="Only entries holding this part")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--load", action="store_true", help="Print full entries instead of summaries")
+    parser.add_argument("--stats", action="store_true", help="Print corpus size and deduplication stats")
+    parser.add_argument("--similar", default=None, metavar="TOPIC", help="Print indexed topics similar to TOPIC")
+    parser.add_argument("--threshold", type=float, default=topic_index.DEFAULT_THRESHOLD, help="Similarity cutoff for --similar")
+    args = parser.parse_args(argv)
+
+    store = CorpusStore(args.db)
+    if args.stats:
+        out: Any = store.stats()
+    elif args.similar is not None:
+        out = [{"topic": topic, "similarity": round(score, 3)} for topic, score in store.similar_topics(args.similar, args.threshold)]
+    else:
+        filters = {name: getattr(args, name) for name in INDEXED_FIELDS}
+        out = store.find(kind=args.kind, limit=args.limit, **filters)
+        if args.load:
+            out = [store.load(entry["id"]) for entry in out]
+    json.dump(out, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+Opt-in per-stage timing and profiling, shared by backend/run.py and thinkgym-mini.
+- StageTimer: monotonic, exclusive (nested stages are not double counted) timings in ms
+- stage(name): no-op unless a timer is active in the current context
+- profiled(path, fmt): cProfile pstats dump, or a sampled collapsed-stack file
+  (`frame;frame;frame count` lines, readable by flamegraph.pl / speedscope)
+"""
+
+from __future__ import annotations
+
+import cProfile
+import contextvars
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+_CURRENT_TIMER: "contextvars.ContextVar[Optional[StageTimer]]" = contextvars.ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._child_time: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._child_time.pop()
+            self.timings[name] = self.timings.get(name, 0.0) + (elapsed - children)
+            if self._child_time:
+                self._child_time[-1] += elapsed
+
+    def as_dict(self) -> Dict[str, float]:
+        out = {name: round(seconds * 1000, 3) for name, seconds in self.timings.items()}
+        out["total"] = round((time.perf_counter() - self._started) * 1000, 3)
+        return out
+
+
+@contextmanager
+def use_timer(timer: Optional[StageTimer]) -> Iterator[Optional[StageTimer]]:
+    token = _CURRENT_TIMER.set(timer)
+    try:
+        yield timer
+    finally:
+        _CURRENT_TIMER.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timer = _CURRENT_TIMER.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profiled(path: Optional[str], fmt: str = "pstats") -> Iterator[None]:
+    """Profile the enclosed block into `path` (pstats or collapsed stacks). No-op when path is None."""
+    if path is None:
+        yield
+        return
+    if fmt == "collapsed":
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.dump(path)
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
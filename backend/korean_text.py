@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Shared Korean-ish text utilities for backend/run.py and thinkgym-mini.
+- extract_keywords: one regex scan with length filter, stopwords, order-preserving
+  dedup and an early-stopping limit
+- sentence_spans: (start, end) offsets of sentences, memoized per text inside sentence_scope();
+  iter_spans yields them lazily for callers that only need the first few
+- terminated_sentences: the sentences themselves, each keeping its own "?", "!" or "…" ending
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import re
+from contextlib import contextmanager
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+Span = Tuple[int, int]
+
+# Hangul syllables + ASCII letters/digits, runs of 2+ (thinkgym-mini validators).
+HANGUL_ALNUM = re.compile(r"[가-힣A-Za-z0-9]{2,}")
+# Same character class as str.isalnum() (backend engine), runs of 2+.
+UNICODE_ALNUM = re.compile(r"[^\W_]{2,}")
+
+STOPWORDS = frozenset(
+    {
+        "저는",
+        "나는",
+        "제가",
+        "우리",
+        "그리고",
+        "하지만",
+        "그러나",
+        "다만",
+        "이것",
+        "그것",
+        "주장",
+    }
+)
+
+
+def extract_keywords(
+    text: str,
+    pattern: Pattern[str] = HANGUL_ALNUM,
+    max_len: Optional[int] = None,
+    stopwords: AbstractSet[str] = frozenset(),
+    fold_case: bool = False,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Tokens in first-seen order. With fold_case, dedup and stopword checks use lower().
+    Scanning stops as soon as `limit` keywords are found."""
+    seen = set()
+    out: List[str] = []
+    # findall builds the token list in C; with a limit, finditer lets the scan stop early.
+    words: Iterable[str] = pattern.findall(text) if limit is None else (m.group() for m in pattern.finditer(text))
+    for word in words:
+        if max_len is not None and len(word) > max_len:
+            continue
+        key = word.lower() if fold_case else word
+        if key in seen or key in stopwords:
+            continue
+        seen.add(key)
+        out.append(word)
+        if limit is not None and len(out) >= limit:
+            break
+    return out
+
+
+ABBREVIATIONS = ("e.g", "i.e", "vs", "cf", "dr", "mr", "mrs", "ms", "prof", "st", "no", "fig")
+
+
+def _abbreviation_guard() -> str:
+    """Fixed-width negative lookbehinds (case-insensitive by construction), checked right
+    after a "." so only terminator positions pay for them."""
+    guards = []
+    for abbr in ABBREVIATIONS:
+        body = "".join(f"[{c}{c.upper()}]" if c.isalpha() else re.escape(c) for c in abbr)
+        guards.append(f"(?<!\\b{body}\\.)")
+    return "".join(guards)
+
+
+# A sentence break: terminators (incl. full-width and ellipsis) and any closing
+# quotes/brackets (group 1), then the whitespace before something that can start a
+# sentence. "3.5" or "a.b" never split, abbreviations (Dr., e.g.) never end a sentence,
+# and a quoted sentence followed by a quotative ("좋다." 라고) stays in its sentence.
+SENTENCE_BREAK_PATTERN = (
+    r"([.!?…。！？]"
+    + _abbreviation_guard()
+    + r"[.!?…。！？]*"
+    r"(?:[\"'”’)\]」』]+(?!\s+(?:이?라(?:고|며|는)|하고|하며|고\b))|))"
+    r"\s+(?=[\"'“‘(\[]?[가-힣A-Za-z0-9])"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def sentence_break() -> Pattern[str]:
+    """SENTENCE_BREAK_PATTERN, compiled on first use: the lookbehinds make it the costliest
+    part of importing this module, and debate-only runs never split sentences."""
+    return re.compile(SENTENCE_BREAK_PATTERN)
+
+_SENTENCE_CACHE: "contextvars.ContextVar[Optional[Dict[str, Tuple[Span, ...]]]]" = contextvars.ContextVar(
+    "sentence_cache", default=None
+)
+
+
+def iter_spans(text: str) -> Iterator[Span]:
+    """Lazily yield sentence spans, so callers that need only the first few stop early."""
+    start = len(text) - len(text.lstrip())
+    stop = len(text.rstrip())
+    if start >= stop:
+        return
+    # Breaks consume the whitespace between sentences, so no per-sentence stripping is needed.
+    for match in sentence_break().finditer(text, start, stop):
+        yield start, match.end(1)
+        start = match.end()
+    yield start, stop
+
+
+def sentence_spans(text: str) -> Tuple[Span, ...]:
+    """Sentence offsets into `text`; cached for the enclosing sentence_scope(), if any."""
+    cache = _SENTENCE_CACHE.get()
+    if cache is None:
+        return tuple(iter_spans(text))
+    spans = cache.get(text)
+    if spans is None:
+        spans = cache[text] = tuple(iter_spans(text))
+    return spans
+
+
+def _spans_for(text: str, limit: Optional[int]) -> Iterable[Span]:
+    cache = _SENTENCE_CACHE.get()
+    if limit is None or (cache is not None and text in cache):
+        return sentence_spans(text)
+    return iter_spans(text)
+
+
+@contextmanager
+def sentence_scope() -> Iterator[None]:
+    """Memoize segmentation for one request/round, so each text is split exactly once."""
+    token = _SENTENCE_CACHE.set({})
+    try:
+        yield
+    finally:
+        _SENTENCE_CACHE.reset(token)
+
+
+def split_sentences(text: str, limit: Optional[int] = None) -> List[str]:
+    sentences = []
+    for a, b in _spans_for(text, limit):
+        sentences.append(text[a:b])
+        if limit is not None and len(sentences) >= limit:
+            break
+    return sentences
+
+
+TERMINATORS = ".!?…。！？"
+CLOSERS = "\"'”’)]」』"
+
+
+def terminated_sentences(text: str, limit: Optional[int] = None) -> List[str]:
+    """Sentences ready to be joined with spaces: each keeps its own terminator, trailing periods
+    collapse to one, and "." is added only to a sentence that has no terminator.
+    "됩니다.." -> "됩니다.", "필요한가?" -> "필요한가?", "좋다!" -> "좋다!", "글쎄…" -> "글쎄…",
+    "끝" -> "끝."."""
+    sentences = []
+    for a, b in _spans_for(text, limit):
+        sentence = text[a:b].strip()
+        if sentence.endswith("."):
+            sentence = sentence.rstrip(".").strip()
+            if not sentence:
+                continue
+            sentence += "."
+        elif not sentence.rstrip(CLOSERS).endswith(tuple(TERMINATORS)):
+            sentence += "."
+        sentences.append(sentence)
+        if limit is not None and len(sentences) >= limit:
+            break
+    return sentences
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+
+"""
+Model backend for non-mock generation, shared by backend/run.py and thinkgym-mini.
+- Wire format: POST {"kind", "prompt", "variables"} -> {"text": ...}, the agent-server contract
+  thinkgym-mini's --agent-url already spoke
+- ConnectionPool keeps idle HTTP/1.1 connections per host and reuses them (keep-alive), so the
+  Pro/Con/Structure/Summary calls of a round pay for one TCP/TLS handshake instead of four
+- At most max_per_host connections per host; a caller past the limit waits for one to come back
+- complete_many() fans independent calls out over threads, each on its own pooled connection
+  (http.client has no HTTP/1.1 pipelining)
+- An idle connection the server has closed is dropped before a request goes out on it; a request
+  that fails once sent is not re-sent, since the server may already have acted on it
+- stats(): calls, connections opened/reused/dropped, errors and connect/first-byte/total latency
+- StubModelServer (--stub FILE): local keep-alive server replaying canned responses, for offline
+  runs and bench.py
+http.client, http.server and concurrent.futures are imported on first use: run.py imports this
+module for its exception types on every cold start.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import http.client
+
+MODEL_URL_ENV = "THINKGYM_MODEL_URL"
+MODEL_API_KEY_ENV = "THINKGYM_MODEL_API_KEY"
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_TIMEOUT = 30.0
+LATENCY_WINDOW = 1024
+
+Origin = Tuple[str, str, int]
+Call = Tuple[str, str, Dict[str, str]]
+
+
+class ModelError(RuntimeError):
+    """The model server answered, but not with something usable (4xx, malformed body, bad output)."""
+
+    code = "MODEL_ERROR"
+    http_hint = 502
+
+
+class ModelUnavailable(ModelError):
+    """The model server could not be reached, timed out, or answered 429/5xx; worth retrying."""
+
+    code = "MODEL_UNAVAILABLE"
+    http_hint = 503
+
+
+def split_url(url: str) -> Tuple[Origin, str]:
+    """((scheme, host, port), path with query) for an http(s) URL."""
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"model URL must be http(s)://host[:port]/path, got {url!r}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return (parts.scheme, parts.hostname, port), path
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def connection_dropped(conn: http.client.HTTPConnection) -> bool:
+    """True when an idle keep-alive connection can no longer carry a request: its socket is gone,
+    or readable, which for a connection with no request outstanding means the server closed it
+    (or sent something unasked, which would desynchronize the next response anyway)."""
+    import select
+
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections, at most max_per_host open per (scheme, host, port).
+    A connection is checked out for one request/response at a time and returned once its
+    response has been read in full; one the server marked Connection: close is dropped."""
+
+    def __init__(self, max_per_host: int = DEFAULT_MAX_PER_HOST, timeout: float = DEFAULT_TIMEOUT) -> None:
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be >= 1")
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[Origin, List[http.client.HTTPConnection]] = {}
+        self._slots: Dict[Origin, threading.BoundedSemaphore] = {}
+        self._open: Dict[Origin, int] = {}
+        self._counters = {"requests": 0, "errors": 0, "opened": 0, "reused": 0, "dropped": 0}
+        self._connect_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._first_byte_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._total_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def request(self, method: str, url: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        """Send one request and read its response in full; (status, body)."""
+        origin, path = split_url(url)
+        slot = self._slot(origin)
+        if not slot.acquire(timeout=self.timeout):
+            raise TimeoutError(f"no free connection to {origin[1]}:{origin[2]} within {self.timeout}s")
+        try:
+            return self._send(origin, method, path, body, headers)
+        finally:
+            slot.release()
+
+    def _send(self, origin: Origin, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        conn, reused = self._checkout(origin)
+        started = time.perf_counter()
+        connect_ms = 0.0
+        try:
+            if not reused:
+                conn.connect()
+                connect_ms = (time.perf_counter() - started) * 1000
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            first_byte = time.perf_counter()
+            data = response.read()
+        except BaseException:
+            # Not retried: once any of the request went out, the server may have acted on it.
+            self._discard(origin, conn)
+            self._count("errors")
+            raise
+        finished = time.perf_counter()
+        if response.will_close:
+            self._discard(origin, conn)
+        else:
+            self._checkin(origin, conn)
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["reused" if reused else "opened"] += 1
+            if not reused:
+                self._connect_ms.append(connect_ms)
+            self._first_byte_ms.append((first_byte - started) * 1000)
+            self._total_ms.append((finished - started) * 1000)
+        return response.status, data
+
+    def _slot(self, origin: Origin) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(origin)
+            if slot is None:
+                slot = self._slots[origin] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _checkout(self, origin: Origin) -> Tuple[http.client.HTTPConnection, bool]:
+        """(an idle connection, True) or (a new, unconnected one, False). Idle connections the
+        server closed while they waited are dropped here, before anything is sent on them."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(origin)
+                conn = idle.pop() if idle else None
+                if conn is None:
+                    self._open[origin] = self._open.get(origin, 0) + 1
+                    break
+            if not connection_dropped(conn):
+                return conn, True
+            self._discard(origin, conn)
+            self._count("dropped")
+        import http.client
+
+        scheme, host, port = origin
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _checkin(self, origin: Origin, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.setdefault(origin, []).append(conn)
+
+    def _discard(self, origin: Origin, conn: http.client.HTTPConnection) -> None:
+        conn.close()
+        with self._lock:
+            self._open[origin] -= 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            connect, first_byte, total = list(self._connect_ms), list(self._first_byte_ms), list(self._total_ms)
+            hosts = {
+                f"{host}:{port}": {"open": self._open.get((scheme, host, port), 0), "idle": len(self._idle.get((scheme, host, port), []))}
+                for scheme, host, port in self._slots
+            }
+        requests = counters["requests"]
+        return {
+            **counters,
+            "reuse_ratio": round(counters["reused"] / requests, 3) if requests else 0.0,
+            "connect_ms_p50": round(percentile(connect, 0.5), 3),
+            "first_byte_ms_p50": round(percentile(first_byte, 0.5), 3),
+            "total_ms_p50": round(percentile(total, 0.5), 3),
+            "total_ms_p95": round(percentile(total, 0.95), 3),
+            "hosts": hosts,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for origin, idle in self._idle.items():
+                for conn in idle:
+                    conn.close()
+                self._open[origin] -= len(idle)
+            self._idle.clear()
+
+
+class ModelBackend(ABC):
+    """Turns (kind, prompt, variables) into the model's text."""
+
+    @abstractmethod
+    def complete(self, kind: str, prompt: str, variables: Dict[str, str]) -> str:
+        """The model's text for one call; ModelError / ModelUnavailable when there is none."""
+
+    def complete_many(self, calls: Sequence[Call]) -> List[str]:
+        """Answers for independent calls, in order."""
+        return [self.complete(*call) for call in calls]
+
+    def stats(self) -> Dict[str, Any]:
+        """Transport counters; empty for a backend that keeps none."""
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class HttpModelBackend(ModelBackend):
+    """The agent-server wire format over a ConnectionPool (its own unless one is passed in)."""
+
+    def __init__(
+        self,
+        url: str,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        api_key: Optional[str] = None,
+        pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        split_url(url)  # fail on a bad URL at startup, not on the first call
+        self.url = url
+        self.pool = pool or ConnectionPool(max_per_host, timeout)
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    def complete(self, kind: str, prompt: str, variables: Dict[str, str]) -> str:
+        import http.client
+
+        body = json.dumps({"kind": kind, "prompt": prompt, "variables": variables}, ensure_ascii=False).encode("utf-8")
+        try:
+            status, data = self.pool.request("POST", self.url, body, self.headers)
+        except (OSError, http.client.HTTPException) as ex:
+            raise ModelUnavailable(f"model server {self.url} unreachable ({ex!r})") from ex
+        if status == 429 or status >= 500:
+            raise ModelUnavailable(f"model server answered {status} for {kind}")
+        if status != 200:
+            raise ModelError(f"model server answered {status} for {kind}: {data[:200].decode('utf-8', 'replace')}")
+        try:
+            text = json.loads(data)["text"]
+        except (ValueError, KeyError, TypeError) as ex:
+            raise ModelError(f"model server sent no text for {kind} ({ex!r})") from ex
+        if not isinstance(text, str):
+            raise ModelError(f"model server sent a non-string text for {kind}")
+        return text
+
+    def complete_many(self, calls: Sequence[Call]) -> List[str]:
+        """A thread fan-out: one complete() per thread, each on its own pooled connection, up to
+        the per-host limit; calls beyond it queue for a connection."""
+        if len(calls) < 2:
+            return super().complete_many(calls)
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.pool.max_per_host)) as executor:
+            return list(executor.map(lambda call: self.complete(*call), calls))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.pool.stats()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def model_backend_from_env(
+    url: Optional[str] = None, max_per_host: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT
+) -> Optional[HttpModelBackend]:
+    """An HttpModelBackend for `url`, else $THINKGYM_MODEL_URL; None when neither is set.
+    $THINKGYM_MODEL_API_KEY, when set, goes out as a bearer token."""
+    url = url or os.environ.get(MODEL_URL_ENV)
+    if not url:
+        return None
+    return HttpModelBackend(
+        url,
+        max_per_host=max_per_host or DEFAULT_MAX_PER_HOST,
+        timeout=timeout,
+        api_key=os.environ.get(MODEL_API_KEY_ENV),
+    )
+
+
+class StubModelServer:
+    """Local HTTP/1.1 keep-alive model server replaying canned responses: {kind: text or [texts]},
+    each kind's list cycled in order ("*" answers any other kind). A reply may also be an object
+    {"text"?, "status"?, "delay_ms"?, "close"?, "drop"?}: an error status, a slow answer, a
+    connection closed after answering without saying so (a stale keep-alive connection for the
+    client), or one closed after reading the request, without answering it.
+    Counts the connections it accepts, so callers can check that the client reuses them."""
+
+    def __init__(self, responses: Dict[str, Any], host: str = "127.0.0.1", port: int = 0, delay_ms: float = 0.0) -> None:
+        import http.server
+
+        self._replies: Dict[str, Iterator[str]] = {
+            kind: itertools.cycle([texts] if isinstance(texts, (str, dict)) else list(texts)) for kind, texts in responses.items()
+        }
+        self._lock = threading.Lock()
+        self.delay = delay_ms / 1000
+        self.connections = 0
+        self.requests = 0
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle on, the body waits for a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    kind = json.loads(body)["kind"]
+                except (ValueError, KeyError, TypeError):
+                    self.reply(400, {"error": "body must be a JSON object with a kind"})
+                    return
+                reply = stub.next_reply(kind)
+                if not isinstance(reply, dict):
+                    reply = {"text": reply}
+                if reply.get("drop"):
+                    self.close_connection = True
+                    return
+                delay = reply.get("delay_ms", stub.delay * 1000) / 1000
+                if delay:
+                    time.sleep(delay)
+                if reply.get("text") is None and "status" not in reply:
+                    self.reply(404, {"error": f"no canned response for kind {kind!r}"})
+                elif reply.get("status", 200) != 200:
+                    self.reply(reply["status"], {"error": f"canned {reply['status']} for kind {kind!r}"})
+                else:
+                    self.reply(200, {"text": reply["text"]})
+                if reply.get("close"):
+                    self.close_connection = True
+
+            def reply(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client gave up waiting (its timeout)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1/generate"
+
+    def next_reply(self, kind: str) -> Any:
+        with self._lock:
+            self.requests += 1
+            replies = self._replies.get(kind) or self._replies.get("*")
+            return next(replies) if replies is not None else None
+
+    def start(self) -> StubModelServer:
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> StubModelServer:
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main(argv: List[str]) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stub model server replaying canned responses")
+    parser.add_argument("--stub", metavar="FILE", required=True, help='JSON file of canned responses: {"kind": text or [texts]}')
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Simulated model latency per call")
+    args = parser.parse_args(argv)
+    with open(args.stub, "r", encoding="utf-8") as fh:
+        responses = json.load(fh)
+    stub = StubModelServer(responses, args.host, args.port, args.delay_ms)
+    print(f"stub model server on {stub.url}", file=sys.stderr)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+Dependency bookkeeping for partial regeneration (the `regenerate` request option of backend/run.py).
+- Every generated part names the inputs it reads: "topic", "user_note", "turn:<i>" and
+  "structure.<field>"
+- A debate turn reads the topic and the note (pro) or the preceding pro turn (con); the report
+  sections read the table in REPORT_SECTION_INPUTS, section 2 only the turns its summary lines
+  come from (report_section_inputs)
+- changed_inputs() diffs the inputs a previous result was built from against the current ones;
+  a part is recomputed only when one of its inputs changed or the caller names it
+- Reports are split at their '## N.' headers, so one section is replaced in place and the others
+  come back byte-for-byte
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+REPORT_SECTION_NUMBERS = ("1", "2", "3", "4", "5")
+
+# What each report section is rendered from. Section 2's turns depend on the debate, see
+# report_section_inputs(). Section 5 only draws its question at random, so it changes only when
+# asked for explicitly.
+REPORT_SECTION_INPUTS: Dict[str, Tuple[str, ...]] = {
+    "1": ("topic",),
+    "2": (),
+    "3": ("user_note",),
+    "4": ("structure.assumptions", "structure.counterpoints", "structure.missing_info"),
+    "5": (),
+}
+
+_SECTION_HEADER = re.compile(r"^## (\d+)\. ", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Regenerate:
+    """A parsed `regenerate` option. `variant` picks which alternative draw the named parts get
+    (0 is the original one). When the request leaves it out, it is one past the last variant the
+    session drew for the round, or 1, so repeating a request gives a new draw each time; `pinned`
+    marks a variant the request named, which is returned even when it repeats the current text."""
+
+    turns: FrozenSet[int] = frozenset()
+    report_sections: FrozenSet[str] = frozenset()
+    variant: int = 1
+    pinned: bool = False
+
+
+def parse_regenerate(value: Any, mode: str, turn_count: int, default_variant: int = 1) -> Regenerate:
+    """Validate a request's `regenerate` object; ValueError names the offending option."""
+    if not isinstance(value, dict):
+        raise ValueError("regenerate must be an object")
+    if mode == "structure":
+        raise ValueError("regenerate applies to debate, report and full mode")
+    unknown = sorted(set(value) - {"turn", "report_sections", "variant"})
+    if unknown:
+        raise ValueError(f"regenerate has unknown option(s): {', '.join(map(str, unknown))}")
+
+    turns: List[Any] = []
+    if value.get("turn") is not None:
+        turns = value["turn"] if isinstance(value["turn"], list) else [value["turn"]]
+        if not all(isinstance(t, int) and not isinstance(t, bool) and 0 <= t < turn_count for t in turns):
+            raise ValueError(f"regenerate.turn must be a turn index 0..{turn_count - 1} or a list of them")
+        if mode not in ("debate", "full"):
+            raise ValueError("regenerate.turn applies to debate and full mode")
+
+    sections: List[str] = []
+    if value.get("report_sections") is not None:
+        raw = value["report_sections"]
+        sections = [str(s) for s in raw if not isinstance(s, bool)] if isinstance(raw, list) else []
+        if not isinstance(raw, list) or len(sections) != len(raw) or not set(sections) <= set(REPORT_SECTION_NUMBERS):
+            raise ValueError(f"regenerate.report_sections must list section numbers {', '.join(REPORT_SECTION_NUMBERS)}")
+        if mode not in ("report", "full"):
+            raise ValueError("regenerate.report_sections applies to report and full mode")
+
+    variant = value.get("variant", default_variant)
+    if isinstance(variant, bool) or not isinstance(variant, int) or variant < 1:
+        raise ValueError("regenerate.variant must be an integer >= 1")
+    return Regenerate(frozenset(turns), frozenset(sections), variant, "variant" in value)
+
+
+def turn_inputs(roles: Sequence[str], index: int) -> Tuple[str, ...]:
+    """A pro turn argues from the topic and the note; a con turn answers the turn before it."""
+    if roles[index] == "con" and index > 0:
+        return ("topic", f"turn:{index - 1}")
+    return ("topic", "user_note")
+
+
+def structure_inputs(turn_count: int, mock: bool) -> Tuple[str, ...]:
+    """The mock structure is built from the note alone; the model also reads the transcript."""
+    if mock:
+        return ("topic", "user_note")
+    return ("topic", "user_note") + tuple(f"turn:{i}" for i in range(turn_count))
+
+
+def report_section_inputs(number: str, summarized_turns: Iterable[int]) -> Tuple[str, ...]:
+    """A section's inputs; section 2 reads only `summarized_turns`, the turns its pro/con lines are
+    taken from. Which turns those are can only shift after an earlier turn of the same role
+    changed, and that turn is read, so the current debate's set is enough."""
+    if number == "2":
+        return tuple(f"turn:{index}" for index in summarized_turns)
+    return REPORT_SECTION_INPUTS.get(number, ())
+
+
+def structure_changes(before: Any, after: Dict[str, Any]) -> Set[str]:
+    """The structure.<field> inputs that differ; every field when `before` is unknown."""
+    if not isinstance(before, dict):
+        return {f"structure.{name}" for name in after}
+    return {f"structure.{name}" for name in set(before) | set(after) if before.get(name) != after.get(name)}
+
+
+def changed_inputs(before: Dict[str, Any], after: Dict[str, Any]) -> Set[str]:
+    """Inputs that differ between two {topic, user_note, debate, structure} sets. An input that
+    `before` does not record (missing or None) counts as unchanged."""
+    changed: Set[str] = set()
+    for name in ("topic", "user_note"):
+        if before.get(name) is not None and (before[name] or "").strip() != (after.get(name) or "").strip():
+            changed.add(name)
+    old_debate, new_debate = before.get("debate"), after.get("debate")
+    if isinstance(old_debate, list) and isinstance(new_debate, list):
+        for index in range(max(len(old_debate), len(new_debate))):
+            old = old_debate[index] if index < len(old_debate) else None
+            new = new_debate[index] if index < len(new_debate) else None
+            if old != new:
+                changed.add(f"turn:{index}")
+    if isinstance(before.get("structure"), dict) and isinstance(after.get("structure"), dict):
+        changed |= structure_changes(before["structure"], after["structure"])
+    return changed
+
+
+def invalidated(inputs: Iterable[str], changed: Set[str]) -> bool:
+    return any(name in changed for name in inputs)
+
+
+def split_report(report: str) -> Tuple[str, Dict[str, str]]:
+    """(text before the first section, {number: section text}). A section's text runs from its
+    header to the next one, trailing blank lines included."""
+    starts = [(match.start(), match.group(1)) for match in _SECTION_HEADER.finditer(report)]
+    sections: Dict[str, str] = {}
+    for i, (start, number) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(report)
+        if number in sections:
+            raise ValueError(f"report has section {number} twice")
+        sections[number] = report[start:end]
+    missing = [n for n in REPORT_SECTION_NUMBERS if n not in sections]
+    if missing:
+        raise ValueError(f"report has no section {', '.join(missing)} to regenerate from")
+    return report[: starts[0][0]], sections
+
+
+def replace_section(old: str, new: str) -> str:
+    """`new` (a section's text without trailing newlines) in place of `old`, keeping the blank
+    lines that separated `old` from what followed it."""
+    body = old.rstrip("\n")
+    return new.rstrip("\n") + old[len(body):]
+
+
+def join_report(preamble: str, sections: Dict[str, str]) -> str:
+    return preamble + "".join(sections.values())
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed result cache for the ThinkGym engine.
+- Key: sha256 of the canonical JSON of the normalized engine inputs
+- Tier 1: in-memory LRU (server mode)
+- Tier 2: optional sqlite file, evicted least-recently-used beyond a byte budget
+- Values are stored as JSON text so callers always get a fresh object
+- SingleFlight: concurrent computations of one key collapse into one (the burst that arrives
+  before any cache entry exists)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def canonical_key(fields: Dict[str, Any]) -> str:
+    """Stable hash of the inputs: key order and JSON whitespace do not matter."""
+    blob = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """sqlite-backed tier. Eviction drops least-recently-used rows until under max_bytes.
+    The connection is opened on first use in each process: a sqlite connection must not be
+    carried across a fork, so a forked batch worker opens its own instead of its parent's."""
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._inherited: Optional[sqlite3.Connection] = None
+        # This process's estimate of the stored bytes: the exact SUM when the connection was
+        # opened plus every put since. Other processes' writes are only seen when it crosses
+        # max_bytes and _evict() re-sums, so a put costs no table scan.
+        self._bytes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        if self._conn is not None:
+            # Inherited through a fork: never used or closed here (closing would checkpoint the
+            # parent's WAL), only kept referenced.
+            self._inherited = self._conn
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results(used_at)")
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connection()
+        row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        self._connection().execute(
+            "INSERT OR REPLACE INTO results (key, value, size, used_at) VALUES (?, ?, ?, ?)",
+            (key, value, size, time.time()),
+        )
+        # A replaced row is counted twice; the re-sum in _evict() corrects that.
+        self._bytes += size
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        doomed = []
+        if total > self.max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM results ORDER BY used_at ASC"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self._bytes = total
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+class ResultCache:
+    """Two-tier cache. Thread-safe; counters are per process."""
+
+    def __init__(self, max_entries: int = 256, disk_path: Optional[str] = None, disk_max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = DiskTier(disk_path, disk_max_bytes) if disk_path else None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            elif self._disk is not None:
+                value = self._disk.get(key)
+                if value is not None:
+                    self._remember(key, value)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(value)
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        value = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, value)
+            if self._disk is not None:
+                self._disk.put(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    waiters: int = 0
+    value: Optional[str] = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """The first caller for a key (the leader) computes; callers arriving while it runs wait and
+    each get a fresh copy of its payload, or its exception. Nothing outlives the computation:
+    repeats after it finishes are the cache's job. Thread-safe; counters are per process."""
+
+    def __init__(self) -> None:
+        self.leaders = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def run(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """(payload, shared): shared is True when this call waited on another's computation."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            assert flight.value is not None
+            return json.loads(flight.value), True
+        try:
+            payload = compute()
+        except BaseException as ex:
+            flight.error = ex
+            self._land(key, flight, None)
+            raise
+        self._land(key, flight, payload)
+        return payload, False
+
+    def _land(self, key: str, flight: _Flight, payload: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            del self._flights[key]
+            shared = flight.waiters > 0
+        if shared and payload is not None:
+            # Snapshot before waking anyone: the leader goes on to add its own meta fields.
+            flight.value = json.dumps(payload, ensure_ascii=False)
+        flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": in_flight}
@@ -11,25 +11,114 @@ ThinkGym backend engine (mock-first).
 
 from __future__ import annotations
 
-import argparse
+import functools
+import itertools
 import json
+import os
 import random
 import sys
-from typing import Any, Dict, List, Literal, Optional
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Literal, Optional, TextIO, Tuple
+
+from instrument import StageTimer, profiled, stage, use_timer
+from korean_text import UNICODE_ALNUM, extract_keywords, sentence_scope, terminated_sentences
+from model_backend import ModelError
+from schemas import DEBATE, STRUCTURE
+from serializers import FORMATS, JsonSerializer, Serializer, get_serializer, write_frame
+
+if TYPE_CHECKING:
+    import argparse
+
+    from corpus_store import CorpusStore
+    from model_backend import ModelBackend
+    from result_cache import ResultCache, SingleFlight
+    from session_store import SessionState, SessionStore
 
 Mode = Literal["debate", "structure", "report", "full"]
 Role = Literal["pro", "con"]
 
+EventSink = Callable[[Dict[str, Any]], None]
+
+MODES = ("debate", "structure", "report", "full")
+DEBATE_ROLES: List[Role] = ["pro", "con", "pro", "con"]
+RNG_VERSIONS = (1, 2)
+# v1 until callers opt in: v2 changes every mock output for a given seed.
+DEFAULT_RNG_VERSION = 1
+# Variants a regeneration tries before it settles for a draw that repeats the current text.
+REDRAW_ATTEMPTS = 8
+REPORT_TITLE = "# 📝 ThinkGym 세션 리포트"
+REPORT_SECTIONS: Dict[str, str] = {
+    "1": "오늘의 질문",
+    "2": "찬반 핵심 요약",
+    "3": "사용자의 입장",
+    "4": "논리 구조 개선 포인트",
+    "5": "다음 라운드 추천 질문",
+}
+
+# Single-shot output is always JSON, via the stdlib encoder: importing orjson costs more than
+# it saves on one response. SERIALIZER frames --serve / --batch-file responses (--format).
+JSON_SERIALIZER = JsonSerializer(use_orjson=False)
+SERIALIZER: Serializer = JSON_SERIALIZER
+
+# Set by main() when caching is enabled (default on for --serve), through open_cache().
+RESULT_CACHE: Optional[ResultCache] = None
+CACHE_SETTINGS: Optional[Dict[str, Any]] = None
+# Set by main() for --serve --socket, the one mode where requests run concurrently in a process
+# (one thread per connection). A stdin --serve worker answers one line at a time, and the API's
+# pool coalesces identical requests before they reach one (enginePool.ts).
+INFLIGHT: Optional[SingleFlight] = None
+
+# Set by main() from --timings / --profile / --profile-format.
+TIMINGS_ENABLED = False
+PROFILE_DIR: Optional[str] = None
+PROFILE_FORMAT = "pstats"
+_PROFILE_COUNTER = itertools.count(1)
+
+# Opened on first use of a session id; the path comes from --session-db (None: the store's default).
+SESSION_DB_PATH: Optional[str] = None
+SESSION_STORE: Optional[SessionStore] = None
+_SESSION_STORE_LOCK = threading.Lock()
+
+# Set by main() from --corpus-db; None leaves the corpus off.
+CORPUS_DB_PATH: Optional[str] = None
+# Set by main() from --reuse-threshold (needs --corpus-db); None generates every debate.
+REUSE_THRESHOLD: Optional[float] = None
+CORPUS_STORE: Optional[CorpusStore] = None
+_CORPUS_STORE_LOCK = threading.Lock()
+
+# Set by main() from --rng-version: the RNG scheme for requests that do not name one (and whose
+# session has not recorded one); None means DEFAULT_RNG_VERSION.
+RNG_VERSION: Optional[int] = None
+
+# Set by main() from --model-url (or $THINKGYM_MODEL_URL); non-mock requests need it.
+MODEL_BACKEND: Optional[ModelBackend] = None
+
 
 def eprint(*args: Any) -> None:
     """Debug logs to stderr only."""
     print(*args, file=sys.stderr)
 
 
+def log_serialize_time(started: float) -> None:
+    """Serialization runs after meta is built, so its timing goes to stderr."""
+    if TIMINGS_ENABLED:
+        eprint(f"timings.serialize_ms={(time.perf_counter() - started) * 1000:.3f}")
+
+
 def write_json(payload: Dict[str, Any]) -> None:
-    """Print JSON to stdout only."""
-    sys.stdout.write(json.dumps(payload, ensure_ascii=False))
-    sys.stdout.flush()
+    """Print JSON to stdout only (bytes go straight to stdout's buffer)."""
+    started = time.perf_counter()
+    write_frame(JSON_SERIALIZER.dumps(payload), sys.stdout)
+    log_serialize_time(started)
+
+
+def write_json_line(payload: Dict[str, Any], stream: TextIO) -> None:
+    """Write one frame (server/batch mode): an NDJSON line, or a MessagePack object with --format msgpack."""
+    started = time.perf_counter()
+    write_frame(SERIALIZER.frame(payload), stream)
+    log_serialize_time(started)
 
 
 def ok_response(payload: Dict[str, Any]) -> None:
@@ -38,9 +127,9 @@ def ok_response(payload: Dict[str, Any]) -> None:
     raise SystemExit(0)
 
 
-def err_response(mode: str, code: str, message: str, http_hint: int = 400, exit_code: int = 1) -> None:
-    """Write error JSON and exit with requested exit code."""
-    payload = {
+def error_payload(mode: str, code: str, message: str, http_hint: int = 400) -> Dict[str, Any]:
+    """Build the error envelope shared by single-shot and server modes."""
+    return {
         "ok": False,
         "mode": mode,
         "error": {
@@ -49,7 +138,11 @@ def err_response(mode: str, code: str, message: str, http_hint: int = 400, exit_
             "http_hint": http_hint,
         },
     }
-    write_json(payload)
+
+
+def err_response(mode: str, code: str, message: str, http_hint: int = 400, exit_code: int = 1) -> None:
+    """Write error JSON and exit with requested exit code."""
+    write_json(error_payload(mode, code, message, http_hint))
     raise SystemExit(exit_code)
 
 
@@ -60,68 +153,45 @@ def safe_json_loads(s: str, field: str) -> Any:
         raise ValueError(f"{field} must be valid JSON string ({ex})")
 
 
+def load_json_field(value: Any, field: str) -> Any:
+    """Accept either a JSON string (argv) or an already-decoded value (server requests)."""
+    if isinstance(value, str):
+        return safe_json_loads(value, field)
+    return value
+
+
+def has_value(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    return True
+
+
 def normalize_sentences_3(text: str) -> str:
-    """Normalize a text into exactly 3 period-separated sentences."""
-    parts = [p.strip() for p in text.replace("\n", " ").split(".") if p.strip()]
+    """Normalize a text into exactly 3 sentences, each keeping its own terminator ("." added when it has none)."""
+    parts = terminated_sentences(text.replace("\n", " "), limit=3)
     if len(parts) >= 3:
         parts = parts[:3]
     else:
         while len(parts) < 3:
-            parts.append("다음 라운드에서 주장과 근거를 더 명확히 보완하십시오")
-    return ". ".join(parts) + "."
+            parts.append("다음 라운드에서 주장과 근거를 더 명확히 보완하십시오.")
+    return " ".join(parts)
 
 
 def validate_structure(structure: Dict[str, Any]) -> None:
-    required_keys = ["claim", "reasons", "assumptions", "counterpoints", "missing_info", "next_revision"]
-    for key in required_keys:
-        if key not in structure:
-            raise ValueError(f"structure missing key: {key}")
-
-    for arr_key in ["reasons", "assumptions", "counterpoints", "missing_info"]:
-        if not isinstance(structure[arr_key], list):
-            raise ValueError(f"structure.{arr_key} must be a list")
-
-    if not isinstance(structure["next_revision"], str):
-        raise ValueError("structure.next_revision must be a string")
-
+    STRUCTURE.validate(structure)
     if "\n" in structure["next_revision"] or "\r" in structure["next_revision"]:
         structure["next_revision"] = structure["next_revision"].replace("\r", " ").replace("\n", " ").strip()
     structure["next_revision"] = normalize_sentences_3(structure["next_revision"])
 
 
 def validate_debate(debate: List[Dict[str, Any]]) -> None:
-    if not isinstance(debate, list) or len(debate) != 4:
-        raise ValueError("debate must be a list of exactly 4 turns")
-    for i, turn in enumerate(debate):
-        if "role" not in turn or "text" not in turn:
-            raise ValueError(f"debate[{i}] must have role and text")
-        if turn["role"] not in ("pro", "con"):
-            raise ValueError(f"debate[{i}].role must be 'pro' or 'con'")
-        if not isinstance(turn["text"], str) or not turn["text"].strip():
-            raise ValueError(f"debate[{i}].text must be a non-empty string")
+    DEBATE.validate(debate)
 
 
 def extract_keywords_koreanish(text: str) -> List[str]:
-    tokens: List[str] = []
-    cur: List[str] = []
-    for ch in text:
-        if ch.isalnum() or ("가" <= ch <= "힣"):
-            cur.append(ch)
-        else:
-            if cur:
-                tokens.append("".join(cur))
-                cur = []
-    if cur:
-        tokens.append("".join(cur))
-
-    filtered = [t for t in tokens if 2 <= len(t) <= 6]
-    seen = set()
-    out: List[str] = []
-    for t in filtered:
-        if t not in seen:
-            out.append(t)
-            seen.add(t)
-    return out[:8]
+    return extract_keywords(text, pattern=UNICODE_ALNUM, max_len=6, limit=8)
 
 
 def infer_stance_korean(note: str) -> str:
@@ -133,14 +203,22 @@ def infer_stance_korean(note: str) -> str:
     return "조건부"
 
 
+def role_line_sources(debate: List[Dict[str, Any]], role: Role, n: int) -> List[Tuple[int, str]]:
+    """The role's first n sentences, each with the index of the turn it came from."""
+    sources: List[Tuple[int, str]] = []
+    for index, turn in enumerate(debate):
+        text = turn["text"].strip()
+        if turn["role"] != role or not text:
+            continue
+        for sentence in terminated_sentences(text):
+            if len(sources) >= n:
+                return sources
+            sources.append((index, sentence))
+    return sources
+
+
 def summarize_role_lines(debate: List[Dict[str, Any]], role: Role, n: int) -> List[str]:
-    texts = [t["text"].strip() for t in debate if t["role"] == role and t["text"].strip()]
-    lines: List[str] = []
-    for text in texts:
-        sentences = [p.strip() for p in text.split(".") if p.strip()]
-        for sentence in sentences:
-            if len(lines) < n:
-                lines.append(sentence + ".")
+    lines = [sentence for _, sentence in role_line_sources(debate, role, n)]
     while len(lines) < n:
         lines.append("핵심 논지를 더 명확히 정리할 여지가 있습니다.")
     return lines[:n]
@@ -153,8 +231,7 @@ def summarize_text_lines(text: str, n: int) -> List[str]:
 
     raw = [p.strip() for p in t.replace("\r", "\n").split("\n") if p.strip()]
     if len(raw) < n:
-        sentences = [p.strip() for p in t.split(".") if p.strip()]
-        raw = raw + [s + "." for s in sentences]
+        raw = raw + terminated_sentences(t)
 
     lines: List[str] = []
     for p in raw:
@@ -261,44 +338,211 @@ def mock_structure(topic: str, debate: List[Dict[str, Any]], user_note: str, rng
     return structure
 
 
-def mock_report(topic: str, debate: List[Dict[str, Any]], user_note: str, structure: Dict[str, Any], rng: random.Random) -> str:
-    pro_lines = summarize_role_lines(debate, "pro", 3)
-    con_lines = summarize_role_lines(debate, "con", 3)
-    user_lines = summarize_text_lines(user_note, 3)
-
-    a = (structure.get("assumptions") or ["가정이 명확하지 않습니다"])[0]
-    c = (structure.get("counterpoints") or ["반론 고려가 부족합니다"])[0]
-    m = (structure.get("missing_info") or ["추가 정보가 필요합니다"])[0]
+def mock_report_section(
+    number: str, topic: str, debate: List[Dict[str, Any]], user_note: str, structure: Dict[str, Any], rng: random.Random
+) -> str:
+    """One report section, header line included, without trailing newlines. Only section 5 draws from `rng`."""
+    header = f"## {number}. {REPORT_SECTIONS[number]}"
+    if number == "1":
+        return f"{header}\n{topic}"
+    if number == "2":
+        pro_lines = summarize_role_lines(debate, "pro", 3)
+        con_lines = summarize_role_lines(debate, "con", 3)
+        return (
+            f"{header}\n"
+            f"- **찬성:** {pro_lines[0]}\n"
+            f"  {pro_lines[1]}\n"
+            f"  {pro_lines[2]}\n"
+            f"- **반대:** {con_lines[0]}\n"
+            f"  {con_lines[1]}\n"
+            f"  {con_lines[2]}"
+        )
+    if number == "3":
+        user_lines = summarize_text_lines(user_note, 3)
+        return f"{header}\n{user_lines[0]}\n{user_lines[1]}\n{user_lines[2]}"
+    if number == "4":
+        a = (structure.get("assumptions") or ["가정이 명확하지 않습니다"])[0]
+        c = (structure.get("counterpoints") or ["반론 고려가 부족합니다"])[0]
+        m = (structure.get("missing_info") or ["추가 정보가 필요합니다"])[0]
+        return f"{header}\n- {a}\n- {c}\n- {m}"
 
     next_q_candidates = [
         "이 주장을 검증할 수 있는 지표(성과/부작용)는 무엇인가?",
         "가장 강한 반대 논리는 무엇이며, 그에 대한 반박은 무엇인가?",
         "조건부 도입을 한다면 어떤 범위와 안전장치가 필요한가?",
     ]
-    next_q = rng.choice(next_q_candidates)
-
-    return (
-        "# 📝 ThinkGym 세션 리포트\n\n"
-        "## 1. 오늘의 질문\n"
-        f"{topic}\n\n"
-        "## 2. 찬반 핵심 요약\n"
-        f"- **찬성:** {pro_lines[0]}\n"
-        f"  {pro_lines[1]}\n"
-        f"  {pro_lines[2]}\n"
-        f"- **반대:** {con_lines[0]}\n"
-        f"  {con_lines[1]}\n"
-        f"  {con_lines[2]}\n\n"
-        "## 3. 사용자의 입장\n"
-        f"{user_lines[0]}\n"
-        f"{user_lines[1]}\n"
-        f"{user_lines[2]}\n\n"
-        "## 4. 논리 구조 개선 포인트\n"
-        f"- {a}\n"
-        f"- {c}\n"
-        f"- {m}\n\n"
-        "## 5. 다음 라운드 추천 질문\n"
-        f"{next_q}\n"
-    )
+    return f"{header}\n{rng.choice(next_q_candidates)}"
+
+
+def mock_report(topic: str, debate: List[Dict[str, Any]], user_note: str, structure: Dict[str, Any], rng: random.Random) -> str:
+    sections = [mock_report_section(number, topic, debate, user_note, structure, rng) for number in REPORT_SECTIONS]
+    return f"{REPORT_TITLE}\n\n" + "\n\n".join(sections) + "\n"
+
+
+# What each model call is asked for; the model-backed counterparts of the mock_* generators.
+MODEL_INSTRUCTIONS: Dict[str, str] = {
+    "pro": "Argue FOR the topic in exactly 3 Korean sentences, building on the user's note when there is one.",
+    "con": "Argue AGAINST the topic in exactly 3 Korean sentences; the first sentence answers the pro statement.",
+    "structure": (
+        "Analyse the user's note against the debate. Reply with one JSON object: claim (string), reasons, "
+        "assumptions, counterpoints, missing_info (arrays of Korean strings) and next_revision (3 Korean sentences)."
+    ),
+    "report": (
+        "Write the Korean markdown session report with the sections '## 1. 오늘의 질문' through "
+        "'## 5. 다음 라운드 추천 질문', ending with one question for the next round."
+    ),
+    "report_section": (
+        "Rewrite only the given section of the Korean markdown session report, in the same format as the "
+        "full report. Reply with the section's body, without its header line."
+    ),
+}
+
+
+def model_prompt(kind: str, variables: Dict[str, str]) -> str:
+    user = "\n".join(f"{name}: {value}" for name, value in variables.items())
+    return f"[SYSTEM]\n{MODEL_INSTRUCTIONS[kind]}\n\n[USER]\n{user}"
+
+
+def model_complete(kind: str, variables: Dict[str, str]) -> str:
+    if MODEL_BACKEND is None:
+        raise ModelError("no model backend configured (--model-url)")
+    with stage("model"):
+        text = MODEL_BACKEND.complete(kind, model_prompt(kind, variables), variables)
+    if not text.strip():
+        raise ModelError(f"model returned an empty {kind}")
+    return text
+
+
+class RngStreams:
+    """Where each mock generation step draws its randomness from.
+    - v2: a stream per (seed, round, stage, index), seeded from that tuple alone, so one turn or
+      stage can be recomputed, or run out of order, and still come out the same
+    - v1 (legacy): one Random(seed + round * 1000) shared in call order, so every step depends on
+      how many draws the steps before it took; kept to reproduce results recorded before v2
+    """
+
+    def __init__(self, seed: int, round_idx: int, version: int = DEFAULT_RNG_VERSION) -> None:
+        self.seed = seed
+        self.round_idx = round_idx
+        self.version = version
+        self._shared = random.Random(seed + round_idx * 1000) if version == 1 else None
+
+    def stream(self, stage_name: str, index: int = 0, variant: int = 0) -> random.Random:
+        """`variant` > 0 is an alternative draw for the same step (partial regeneration)."""
+        if self._shared is not None:
+            return self._shared
+        # str seeds are hashed with SHA-512, stable across processes and Python versions.
+        key = f"thinkgym-rng-v2:{self.seed}:{self.round_idx}:{stage_name}:{index}"
+        return random.Random(f"{key}:{variant}" if variant else key)
+
+
+def debate_transcript(debate: List[Dict[str, Any]]) -> str:
+    return "\n".join(f"[{turn['role']}] {turn['text']}" for turn in debate)
+
+
+def generate_turn(role: Role, topic: str, user_ctx: Optional[str], previous: Optional[str], rng: random.Random, mock: bool) -> str:
+    if role == "pro":
+        if mock:
+            return mock_pro(topic, user_ctx, rng)
+        return normalize_sentences_3(model_complete("pro", {"topic": topic, "user_note": user_ctx or ""}))
+    if mock:
+        return mock_con(topic, previous or "", rng)
+    return normalize_sentences_3(model_complete("con", {"topic": topic, "pro_statement": previous or ""}))
+
+
+def generate_structure(topic: str, debate: List[Dict[str, Any]], note: str, rng: random.Random, mock: bool) -> Dict[str, Any]:
+    if mock:
+        return mock_structure(topic, debate, note, rng)
+    text = model_complete("structure", {"topic": topic, "debate_transcript": debate_transcript(debate), "user_note": note})
+    try:
+        structure = json.loads(text)
+        if not isinstance(structure, dict):
+            raise ValueError("not a JSON object")
+        validate_structure(structure)
+    except ValueError as ex:
+        # The model's fault, not the caller's: a 502, not INVALID_INPUT.
+        raise ModelError(f"model returned an invalid structure ({ex})") from ex
+    return structure
+
+
+def generate_report(
+    topic: str, debate: List[Dict[str, Any]], note: str, structure: Dict[str, Any], rng: random.Random, mock: bool
+) -> str:
+    if mock:
+        return mock_report(topic, debate, note, structure, rng)
+    variables = {
+        "topic": topic,
+        "debate_transcript": debate_transcript(debate),
+        "user_note": note,
+        "structure": json.dumps(structure, ensure_ascii=False),
+    }
+    return model_complete("report", variables)
+
+
+def generate_report_section(
+    number: str, topic: str, debate: List[Dict[str, Any]], note: str, structure: Dict[str, Any], rng: random.Random, mock: bool
+) -> str:
+    if mock:
+        return mock_report_section(number, topic, debate, note, structure, rng)
+    header = f"## {number}. {REPORT_SECTIONS[number]}"
+    variables = {
+        "topic": topic,
+        "debate_transcript": debate_transcript(debate),
+        "user_note": note,
+        "structure": json.dumps(structure, ensure_ascii=False),
+        "section": header,
+    }
+    body = model_complete("report_section", variables).strip()
+    if body.startswith(header):
+        body = body[len(header):].strip()
+    return f"{header}\n{body}"
+
+
+def generate_debate(
+    topic: str, user_note: Optional[str], streams: RngStreams, emit: Optional[EventSink] = None, mock: bool = True
+) -> List[Dict[str, Any]]:
+    """Build the 4 debate turns in order (pro, con, pro, con); each con answers the preceding pro.
+    Turn i draws from streams.stream("turn", i)."""
+    user_ctx = (user_note or "").strip() or None
+    debate: List[Dict[str, Any]] = []
+    for index, role in enumerate(DEBATE_ROLES):
+        if emit:
+            emit({"event": "turn_started", "index": index, "role": role})
+        with stage("generate"):
+            previous = debate[-1]["text"] if debate else None
+            text = generate_turn(role, topic, user_ctx, previous, streams.stream("turn", index), mock)
+        debate.append({"role": role, "text": text})
+        if emit:
+            emit({"event": "turn_completed", "index": index, "role": role, "text": text})
+    with stage("validate"):
+        validate_debate(debate)
+    return debate
+
+
+def replay_events(payload: Dict[str, Any], emit: EventSink) -> None:
+    """Emit the progress events for an already-computed payload (e.g. a cache hit)."""
+    for index, turn in enumerate(payload.get("debate") or []):
+        emit({"event": "turn_started", "index": index, "role": turn["role"]})
+        emit({"event": "turn_completed", "index": index, "role": turn["role"], "text": turn["text"]})
+    if "structure" in payload:
+        emit({"event": "structure_ready", "structure": payload["structure"]})
+    if "report" in payload:
+        emit({"event": "report_ready", "report": payload["report"]})
+
+
+def reused_or_generated_debate(
+    topic: str,
+    user_note: Optional[str],
+    streams: RngStreams,
+    emit: Optional[EventSink],
+    reused_debate: Optional[List[Dict[str, Any]]],
+    mock: bool = True,
+) -> List[Dict[str, Any]]:
+    if reused_debate is None:
+        return generate_debate(topic, user_note, streams, emit, mock)
+    if emit:
+        replay_events({"debate": reused_debate}, emit)
+    return reused_debate
 
 
 def run_engine(
@@ -306,95 +550,99 @@ def run_engine(
     topic: str,
     round_idx: int,
     user_note: Optional[str],
-    debate_json: Optional[str],
-    structure_json: Optional[str],
+    debate_json: Optional[Any],
+    structure_json: Optional[Any],
     mock: bool,
     seed: int,
+    emit: Optional[EventSink] = None,
+    reused_debate: Optional[List[Dict[str, Any]]] = None,
+    rng_version: int = DEFAULT_RNG_VERSION,
 ) -> Dict[str, Any]:
-    rng = random.Random(seed + round_idx * 1000)
+    """`reused_debate` (debate/full) stands in for generate_debate(); see find_reusable_debate().
+    Without `mock`, every generation step is a MODEL_BACKEND call."""
+    streams = RngStreams(seed, round_idx, rng_version)
+    meta: Dict[str, Any] = {"mock": mock, "seed": seed, "rng_version": rng_version}
 
     if mode == "debate":
-        user_ctx = (user_note or "").strip() or None
-        pro1 = mock_pro(topic, user_ctx, rng)
-        con1 = mock_con(topic, pro1, rng)
-        pro2 = mock_pro(topic, user_ctx, rng)
-        con2 = mock_con(topic, pro2, rng)
-        debate = [
-            {"role": "pro", "text": pro1},
-            {"role": "con", "text": con1},
-            {"role": "pro", "text": pro2},
-            {"role": "con", "text": con2},
-        ]
-        validate_debate(debate)
+        debate = reused_or_generated_debate(topic, user_note, streams, emit, reused_debate, mock)
         return {
             "ok": True,
             "mode": "debate",
             "topic": topic,
             "round": round_idx,
             "debate": debate,
-            "meta": {"mock": mock, "seed": seed},
+            "meta": meta,
         }
 
     if mode in ("structure", "report"):
-        if debate_json is None or not str(debate_json).strip():
+        if not has_value(debate_json):
             raise ValueError("debate_json is required for structure/report mode")
-        debate = safe_json_loads(debate_json, "debate_json")
-        validate_debate(debate)
+        with stage("parse"):
+            debate = load_json_field(debate_json, "debate_json")
+        with stage("validate"):
+            validate_debate(debate)
 
     if mode == "structure":
         note = (user_note or "").strip()
-        structure = mock_structure(topic, debate, note, rng)
-        validate_structure(structure)
+        with stage("generate"):
+            structure = generate_structure(topic, debate, note, streams.stream("structure"), mock)
+        with stage("validate"):
+            validate_structure(structure)
+        if emit:
+            emit({"event": "structure_ready", "structure": structure})
         return {
             "ok": True,
             "mode": "structure",
             "topic": topic,
             "round": round_idx,
             "structure": structure,
-            "meta": {"mock": mock, "seed": seed},
+            "meta": meta,
         }
 
     if mode == "report":
         note = (user_note or "").strip()
-        if structure_json is not None and str(structure_json).strip():
-            structure = safe_json_loads(structure_json, "structure_json")
+        if has_value(structure_json):
+            with stage("parse"):
+                structure = load_json_field(structure_json, "structure_json")
             if not isinstance(structure, dict):
                 raise ValueError("structure_json must decode to an object")
-            validate_structure(structure)
+            with stage("validate"):
+                validate_structure(structure)
             structure_source = "input"
         else:
-            structure = mock_structure(topic, debate, note, rng)
-            validate_structure(structure)
+            with stage("generate"):
+                structure = generate_structure(topic, debate, note, streams.stream("structure"), mock)
+            with stage("validate"):
+                validate_structure(structure)
             structure_source = "generated"
 
-        report = mock_report(topic, debate, note, structure, rng)
+        with stage("generate"):
+            report = generate_report(topic, debate, note, structure, streams.stream("report"), mock)
+        if emit:
+            emit({"event": "report_ready", "report": report})
         return {
             "ok": True,
             "mode": "report",
             "topic": topic,
             "round": round_idx,
             "report": report,
-            "meta": {"mock": mock, "seed": seed, "structure_source": structure_source},
+            "meta": {**meta, "structure_source": structure_source},
         }
 
     if mode == "full":
-        user_ctx = (user_note or "").strip() or None
-        pro1 = mock_pro(topic, user_ctx, rng)
-        con1 = mock_con(topic, pro1, rng)
-        pro2 = mock_pro(topic, user_ctx, rng)
-        con2 = mock_con(topic, pro2, rng)
-        debate = [
-            {"role": "pro", "text": pro1},
-            {"role": "con", "text": con1},
-            {"role": "pro", "text": pro2},
-            {"role": "con", "text": con2},
-        ]
-        validate_debate(debate)
+        debate = reused_or_generated_debate(topic, user_note, streams, emit, reused_debate, mock)
 
         note = (user_note or "").strip()
-        structure = mock_structure(topic, debate, note, rng)
-        validate_structure(structure)
-        report = mock_report(topic, debate, note, structure, rng)
+        with stage("generate"):
+            structure = generate_structure(topic, debate, note, streams.stream("structure"), mock)
+        with stage("validate"):
+            validate_structure(structure)
+        if emit:
+            emit({"event": "structure_ready", "structure": structure})
+        with stage("generate"):
+            report = generate_report(topic, debate, note, structure, streams.stream("report"), mock)
+        if emit:
+            emit({"event": "report_ready", "report": report})
 
         return {
             "ok": True,
@@ -404,58 +652,1099 @@ def run_engine(
             "debate": debate,
             "structure": structure,
             "report": report,
-            "meta": {"mock": mock, "seed": seed},
+            "meta": meta,
         }
 
     raise ValueError(f"Unknown mode: {mode}")
 
 
-def parse_args(argv: List[str]) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="ThinkGym run.py (mock-first engine)")
-    parser.add_argument("--mode", required=True, choices=["debate", "structure", "report", "full"])
-    parser.add_argument("--topic", required=True, help="Debate topic")
-    parser.add_argument("--round", type=int, default=1, help="Round index (1-based)")
-    parser.add_argument("--user-note", default=None, help="User note text (optional for structure/report/full)")
-    parser.add_argument("--debate-json", default=None, help="Debate turns JSON string (required for structure/report)")
-    parser.add_argument("--structure-json", default=None, help="Structure JSON string (optional for report; preferred if Step4 result exists)")
-    parser.add_argument("--mock", action="store_true", help="Use mock generation (no LLM)")
-    parser.add_argument("--seed", type=int, default=42, help="Deterministic seed for mock")
-    return parser.parse_args(argv)
+def regenerate_engine(
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    user_note: Optional[str],
+    debate_json: Optional[Any],
+    structure_json: Optional[Any],
+    report: Optional[str],
+    regenerate: Any,
+    mock: bool,
+    seed: int,
+    emit: Optional[EventSink] = None,
+    rng_version: int = DEFAULT_RNG_VERSION,
+    baseline: Optional[Dict[str, Any]] = None,
+    default_variant: int = 1,
+) -> Dict[str, Any]:
+    """Partial regeneration: recompute the turns and report sections `regenerate` names, plus
+    whatever their new text, or an input changed since `baseline` (the inputs the given result was
+    built from, when known), invalidates. Everything else is returned as given. The named parts
+    get an alternative draw (regenerate.variant, else `default_variant`, reported back in
+    meta.regenerated.variant); parts recomputed because an input changed keep their own stream,
+    so they come out as a full run over the new inputs would."""
+    from regeneration import (
+        changed_inputs,
+        invalidated,
+        join_report,
+        parse_regenerate,
+        replace_section,
+        report_section_inputs,
+        split_report,
+        structure_changes,
+        structure_inputs,
+        turn_inputs,
+    )
 
+    options = parse_regenerate(load_json_field(regenerate, "regenerate"), mode, len(DEBATE_ROLES), default_variant)
+    if rng_version == 1:
+        raise ValueError("regenerate needs rng_version 2 (a stream per turn); make the request, or open its session, with rng_version 2")
+    streams = RngStreams(seed, round_idx, rng_version)
+    note = (user_note or "").strip()
+    done: Dict[str, Any] = {"turns": [], "structure": False, "report_sections": [], "variant": options.variant}
+
+    def redraw(generate: Callable[[int], str], current: str) -> str:
+        """A named part's alternative draw. Mock text comes from short candidate lists, so a draw can
+        repeat `current`; unless the caller pinned the variant, the next variants are tried until
+        one differs, and meta.regenerated.variant reports the last one used."""
+        text = generate(options.variant)
+        if options.pinned or text != current:
+            return text
+        for variant in range(options.variant + 1, options.variant + REDRAW_ATTEMPTS):
+            candidate = generate(variant)
+            if candidate != current:
+                done["variant"] = max(done["variant"], variant)
+                return candidate
+        return text
+
+    debate = None
+    if has_value(debate_json):
+        with stage("parse"):
+            debate = load_json_field(debate_json, "debate_json")
+        with stage("validate"):
+            validate_debate(debate)
+    structure = None
+    if mode in ("report", "full") and has_value(structure_json):
+        with stage("parse"):
+            structure = load_json_field(structure_json, "structure_json")
+        if not isinstance(structure, dict):
+            raise ValueError("structure_json must decode to an object")
+        with stage("validate"):
+            validate_structure(structure)
+    changed = changed_inputs(baseline or {}, {"topic": topic, "user_note": note, "debate": debate, "structure": structure})
+
+    if mode in ("debate", "full"):
+        if debate is None:
+            raise ValueError("regenerate needs the debate to regenerate from (debate, or a session round that has one)")
+        debate = [dict(turn) for turn in debate]
+        for index, role in enumerate(DEBATE_ROLES):
+            if index not in options.turns and not invalidated(turn_inputs(DEBATE_ROLES, index), changed):
+                continue
+            if emit:
+                emit({"event": "turn_started", "index": index, "role": role})
+            with stage("generate"):
+                previous = debate[index - 1]["text"] if index else None
+
+                def generate(variant: int) -> str:
+                    return generate_turn(role, topic, note or None, previous, streams.stream("turn", index, variant), mock)
+
+                text = redraw(generate, debate[index]["text"]) if index in options.turns else generate(0)
+            if text != debate[index]["text"]:
+                changed.add(f"turn:{index}")
+            debate[index] = {"role": role, "text": text}
+            done["turns"].append(index)
+            if emit:
+                emit({"event": "turn_completed", "index": index, "role": role, "text": text})
+        with stage("validate"):
+            validate_debate(debate)
+    if mode == "debate":
+        return {
+            "ok": True,
+            "mode": "debate",
+            "topic": topic,
+            "round": round_idx,
+            "debate": debate,
+            "meta": {"mock": mock, "seed": seed, "rng_version": rng_version, "regenerated": done},
+        }
 
-def main(argv: List[str]) -> None:
-    args = parse_args(argv)
-    mode: Mode = args.mode
-    topic = (args.topic or "").strip()
+    if debate is None:
+        raise ValueError("debate_json is required for structure/report mode")
+    structure_source = "input" if structure is not None else "generated"
+    if structure is None or (mode == "full" and invalidated(structure_inputs(len(debate), mock), changed)):
+        previous_structure = structure if structure is not None else (baseline or {}).get("structure")
+        with stage("generate"):
+            structure = generate_structure(topic, debate, note, streams.stream("structure"), mock)
+        with stage("validate"):
+            validate_structure(structure)
+        changed |= structure_changes(previous_structure, structure)
+        done["structure"] = True
+        if emit:
+            emit({"event": "structure_ready", "structure": structure})
+
+    if has_value(report):
+        preamble, sections = split_report(report)
+        if mock:
+            summarized = {index for role in ("pro", "con") for index, _ in role_line_sources(debate, role, 3)}
+        else:
+            summarized = set(range(len(debate)))  # the model summarizes from the whole transcript
+        for number in sections:
+            named = number in options.report_sections
+            if not named and not invalidated(report_section_inputs(number, sorted(summarized)), changed):
+                continue
+            with stage("generate"):
+
+                def generate(variant: int) -> str:
+                    rng = streams.stream("report", 0, variant)
+                    return generate_report_section(number, topic, debate, note, structure, rng, mock)
+
+                text = redraw(generate, sections[number].rstrip("\n")) if named else generate(0)
+            sections[number] = replace_section(sections[number], text)
+            done["report_sections"].append(number)
+        report = join_report(preamble, sections)
+    elif options.report_sections:
+        raise ValueError("regenerate.report_sections needs the report to regenerate from (report, or a session round that has one)")
+    else:
+        with stage("generate"):
+            report = generate_report(topic, debate, note, structure, streams.stream("report"), mock)
+        done["report_sections"] = list(REPORT_SECTIONS)
+    if emit and done["report_sections"]:
+        emit({"event": "report_ready", "report": report})
 
-    if not topic:
-        err_response(mode, "INVALID_INPUT", "topic is required", 400, exit_code=1)
+    meta: Dict[str, Any] = {"mock": mock, "seed": seed, "rng_version": rng_version, "regenerated": done}
+    if mode == "report":
+        return {
+            "ok": True,
+            "mode": "report",
+            "topic": topic,
+            "round": round_idx,
+            "report": report,
+            "meta": {**meta, "structure_source": structure_source},
+        }
+    return {
+        "ok": True,
+        "mode": "full",
+        "topic": topic,
+        "round": round_idx,
+        "debate": debate,
+        "structure": structure,
+        "report": report,
+        "meta": meta,
+    }
 
-    if args.round < 1:
-        err_response(mode, "INVALID_INPUT", "round must be >= 1", 400, exit_code=1)
 
-    if not args.mock:
-        err_response(mode, "NOT_IMPLEMENTED", "Non-mock (LLM) mode is not implemented yet. Use --mock.", 501, exit_code=1)
+def engine_cache_key(
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    user_note: Optional[str],
+    debate: Optional[Any],
+    structure: Optional[Any],
+    seed: int,
+    rng_version: int = DEFAULT_RNG_VERSION,
+) -> str:
+    """Key over the normalized inputs. Fields a mode ignores are left out so they cannot cause misses,
+    and so is the legacy rng_version 1, so entries cached before RNG v2 still hit."""
+    fields: Dict[str, Any] = {
+        "mode": mode,
+        "topic": topic,
+        "round": round_idx,
+        "seed": seed,
+        "user_note": (user_note or "").strip(),
+    }
+    if mode in ("structure", "report"):
+        fields["debate"] = debate
+    if mode == "report":
+        fields["structure"] = structure
+    if rng_version != 1:
+        fields["rng_version"] = rng_version
+    from result_cache import canonical_key
 
-    try:
+    return canonical_key(fields)
+
+
+def cached_run_engine(
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    user_note: Optional[str],
+    debate_json: Optional[Any],
+    structure_json: Optional[Any],
+    seed: int,
+    emit: Optional[EventSink] = None,
+    rng_version: int = DEFAULT_RNG_VERSION,
+) -> Dict[str, Any]:
+    """run_engine behind RESULT_CACHE. JSON fields are decoded once here and handed on decoded."""
+    with stage("parse"):
+        debate = load_json_field(debate_json, "debate_json") if mode in ("structure", "report") and has_value(debate_json) else None
+        structure = load_json_field(structure_json, "structure_json") if mode == "report" and has_value(structure_json) else None
+
+    with stage("cache"):
+        key = engine_cache_key(mode, topic, round_idx, user_note, debate, structure, seed, rng_version)
+        payload = RESULT_CACHE.get(key)
+    hit = payload is not None
+    if payload is None:
         payload = run_engine(
             mode=mode,
             topic=topic,
+            round_idx=round_idx,
+            user_note=user_note,
+            debate_json=debate,
+            structure_json=structure,
+            mock=True,
+            seed=seed,
+            emit=emit,
+            rng_version=rng_version,
+        )
+        with stage("cache"):
+            RESULT_CACHE.put(key, payload)
+    elif emit:
+        replay_events(payload, emit)
+    payload["meta"]["cache"] = {"hit": hit, **RESULT_CACHE.stats()}
+    return payload
+
+
+def coalesced_run_engine(
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    user_note: Optional[str],
+    debate_json: Optional[Any],
+    structure_json: Optional[Any],
+    seed: int,
+    emit: Optional[EventSink] = None,
+    rng_version: int = DEFAULT_RNG_VERSION,
+) -> Dict[str, Any]:
+    """run_engine (behind RESULT_CACHE when on) through INFLIGHT: a request identical to one
+    already running waits for that result instead of computing it again, and gets its events replayed."""
+    with stage("parse"):
+        debate = load_json_field(debate_json, "debate_json") if mode in ("structure", "report") and has_value(debate_json) else None
+        structure = load_json_field(structure_json, "structure_json") if mode == "report" and has_value(structure_json) else None
+
+    def compute() -> Dict[str, Any]:
+        if RESULT_CACHE is not None:
+            return cached_run_engine(mode, topic, round_idx, user_note, debate, structure, seed, emit, rng_version)
+        return run_engine(
+            mode=mode,
+            topic=topic,
+            round_idx=round_idx,
+            user_note=user_note,
+            debate_json=debate,
+            structure_json=structure,
+            mock=True,
+            seed=seed,
+            emit=emit,
+            rng_version=rng_version,
+        )
+
+    key = engine_cache_key(mode, topic, round_idx, user_note, debate, structure, seed, rng_version)
+    payload, shared = INFLIGHT.run(key, compute)
+    if shared and emit:
+        replay_events(payload, emit)
+    payload["meta"]["inflight"] = {"shared": shared, **INFLIGHT.stats()}
+    return payload
+
+
+def next_profile_path(mode: str) -> Optional[str]:
+    if PROFILE_DIR is None:
+        return None
+    ext = "folded" if PROFILE_FORMAT == "collapsed" else "pstats"
+    return os.path.join(PROFILE_DIR, f"{mode}-{os.getpid()}-{next(_PROFILE_COUNTER)}.{ext}")
+
+
+def open_session_store() -> SessionStore:
+    global SESSION_STORE
+    with _SESSION_STORE_LOCK:
+        if SESSION_STORE is None:
+            from session_store import DEFAULT_SESSION_DB, SessionStore
+
+            SESSION_STORE = SessionStore(SESSION_DB_PATH or DEFAULT_SESSION_DB)
+        return SESSION_STORE
+
+
+def session_topic(state: SessionState, round_idx: int) -> Optional[str]:
+    """The round's own topic, else the latest earlier one, else the session's opening topic."""
+    for n in sorted((n for n in state.rounds if n <= round_idx), reverse=True):
+        topic = state.rounds[n].get("topic")
+        if topic is not None:
+            return topic
+    return state.topic
+
+
+def session_events(
+    state: SessionState,
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    seed: int,
+    rng_version: int,
+    user_note: Optional[str],
+    debate: Optional[Any],
+    payload: Dict[str, Any],
+) -> List[Any]:
+    """The delta this request adds to the session: new inputs plus the engine's outputs."""
+    events: List[Any] = []
+    if state.events == 0:
+        events.append((0, "session", {"topic": topic, "seed": seed, "rng_version": rng_version, "engine": "backend"}))
+    elif topic != session_topic(state, round_idx):
+        events.append((round_idx, "topic", topic))
+    changes = {
+        "note": user_note,
+        "debate": payload.get("debate", debate),
+        "structure": payload.get("structure"),
+        "report": payload.get("report"),
+    }
+    for kind, value in changes.items():
+        # Re-running a step with the same result adds nothing to the log.
+        if value is not None and value != state.get(round_idx, kind):
+            events.append((round_idx, kind, value))
+    if "regenerated" in payload["meta"]:
+        # Logged even when the redraw came out the same, so the next one moves on to a new variant.
+        events.append((round_idx, "regenerate", payload["meta"]["regenerated"]))
+    return events
+
+
+def next_regenerate_variant(state: SessionState, round_idx: int) -> int:
+    """One past the variant of the round's last regeneration: asking again draws something new."""
+    last = state.get(round_idx, "regenerate") or {}
+    return int(last.get("variant", 0)) + 1
+
+
+def open_corpus_store() -> CorpusStore:
+    global CORPUS_STORE
+    with _CORPUS_STORE_LOCK:
+        if CORPUS_STORE is None:
+            from corpus_store import CorpusStore
+
+            CORPUS_STORE = CorpusStore(CORPUS_DB_PATH)
+        return CORPUS_STORE
+
+
+def record_corpus(
+    mode: Mode,
+    topic: str,
+    round_idx: int,
+    seed: int,
+    mock: bool,
+    rng_version: int,
+    user_note: Optional[str],
+    debate: Optional[Any],
+    structure: Optional[Any],
+    payload: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Intern what this request saw and produced. The corpus is an archive, so a failure is
+    logged and the response goes out without meta.corpus."""
+    note = (user_note or "").strip()
+    try:
+        entry_id, created = open_corpus_store().record(
+            mode,
+            topic,
+            seed,
+            round_idx,
+            infer_stance_korean(note),
+            mock,
+            rng_version,
+            user_note=note or None,
+            debate=payload.get("debate", debate),
+            structure=payload.get("structure", structure),
+            report=payload.get("report"),
+        )
+    except Exception as ex:  # noqa: BLE001
+        eprint("Corpus store error:", repr(ex))
+        return None
+    return {"id": entry_id, "new": created}
+
+
+def adapt_turn_text(text: str, similar: str, topic: str) -> Optional[str]:
+    """`text` with the other topic replaced by this one, or None when that cannot be done safely.
+    Only quoted occurrences ('<topic>', where the generators put the topic) are known to be the
+    topic itself; any other occurrence may be part of other wording, so the turn is not adapted."""
+    pieces = text.split(f"'{similar}'")
+    if any(similar in piece for piece in pieces):
+        return None
+    return f"'{topic}'".join(pieces)
+
+
+def find_reusable_debate(
+    topic: str, round_idx: int, seed: int, user_note: Optional[str], mock: bool, rng_version: int
+) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """The recorded debate of the most similar other topic (same seed, round, note stance, mock
+    flag and RNG scheme), adapted to this topic, plus its meta.reused_from. An identical topic is
+    left to the result cache, so a new seed still means a new variant."""
+    store = open_corpus_store()
+    stance = infer_stance_korean((user_note or "").strip())
+    for similar, score in store.similar_topics(topic, REUSE_THRESHOLD):
+        if similar == topic:
+            continue
+        entries = store.find(
+            kind="debate", topic=similar, seed=seed, round=round_idx, stance=stance, mock=mock, rng_version=rng_version
+        )
+        for summary in reversed(entries):
+            entry = store.load(summary["id"])
+            texts = [adapt_turn_text(turn["text"], similar, topic) for turn in entry["debate"]]
+            if any(text is None for text in texts):
+                continue
+            debate = [{"role": turn["role"], "text": text} for turn, text in zip(entry["debate"], texts)]
+            validate_debate(debate)
+            return debate, {"id": entry["id"], "topic": similar, "similarity": round(score, 3)}
+    return None
+
+
+def handle_request(
+    mode: Any,
+    topic: Any,
+    round_idx: Any,
+    user_note: Optional[str],
+    debate_json: Optional[Any],
+    structure_json: Optional[Any],
+    mock: bool,
+    seed: Any,
+    emit: Optional[EventSink] = None,
+    session_id: Optional[Any] = None,
+    rng_version: Optional[Any] = None,
+    report: Optional[Any] = None,
+    regenerate: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Validate inputs and run the engine, always returning an ok or error envelope.
+    With a session id, omitted inputs (topic, seed, rng_version, round, note, debate, structure,
+    report) come from the session log. With `regenerate`, only the parts it names or invalidates
+    are recomputed (regenerate_engine)."""
+    mode_label = mode if isinstance(mode, str) else "unknown"
+    if mode not in MODES:
+        return error_payload(mode_label, "INVALID_INPUT", f"mode must be one of {', '.join(MODES)}", 400)
+
+    state: Optional[SessionState] = None
+    baseline: Optional[Dict[str, Any]] = None
+    default_variant = 1
+    if session_id is not None:
+        if not isinstance(session_id, str) or not session_id.strip():
+            return error_payload(mode, "INVALID_INPUT", "session_id must be a non-empty string", 400)
+        try:
+            from session_store import SessionState
+
+            state = open_session_store().load(session_id) or SessionState(session_id)
+        except Exception as ex:  # noqa: BLE001
+            eprint("Session store error:", repr(ex))
+            return error_payload(mode, "INTERNAL_ERROR", "Session store unavailable", 500)
+        if state.events and state.engine != "backend":
+            return error_payload(
+                mode, "INVALID_INPUT", f"session {session_id} was written by {state.engine}, not this engine; use another session id", 409
+            )
+        if round_idx is None:
+            # A new debate opens the next round; the other modes, and regeneration, continue the latest one.
+            round_idx = max(1, state.last_round + (1 if mode in ("debate", "full") and regenerate is None else 0))
+        if seed is None:
+            seed = state.seed
+        if rng_version is None:
+            rng_version = state.rng_version
+        if not has_value(topic):
+            topic = session_topic(state, round_idx) if isinstance(round_idx, int) else state.topic
+        if isinstance(round_idx, int):
+            if user_note is None:
+                user_note = state.get(round_idx, "note")
+            if mode in ("structure", "report") and not has_value(debate_json):
+                debate_json = state.get(round_idx, "debate")
+            if mode == "report" and not has_value(structure_json):
+                structure_json = state.get(round_idx, "structure")
+            if regenerate is not None:
+                # What the round's recorded outputs were built from, to diff the request's inputs against.
+                baseline = {
+                    "topic": session_topic(state, round_idx),
+                    "user_note": state.get(round_idx, "note"),
+                    "debate": state.get(round_idx, "debate"),
+                    "structure": state.get(round_idx, "structure"),
+                }
+                if not has_value(debate_json):
+                    debate_json = state.get(round_idx, "debate")
+                if mode == "full" and not has_value(structure_json):
+                    structure_json = state.get(round_idx, "structure")
+                if mode in ("report", "full") and not has_value(report):
+                    report = state.get(round_idx, "report")
+                default_variant = next_regenerate_variant(state, round_idx)
+    round_idx = 1 if round_idx is None else round_idx
+    seed = 42 if seed is None else seed
+    if rng_version is None:
+        rng_version = RNG_VERSION or DEFAULT_RNG_VERSION
+
+    topic = (topic or "").strip() if isinstance(topic, str) else ""
+    if not topic:
+        return error_payload(mode, "INVALID_INPUT", "topic is required", 400)
+
+    if isinstance(round_idx, bool) or not isinstance(round_idx, int) or isinstance(seed, bool) or not isinstance(seed, int):
+        return error_payload(mode, "INVALID_INPUT", "round and seed must be integers", 400)
+
+    if round_idx < 1:
+        return error_payload(mode, "INVALID_INPUT", "round must be >= 1", 400)
+
+    if isinstance(rng_version, bool) or rng_version not in RNG_VERSIONS:
+        return error_payload(mode, "INVALID_INPUT", f"rng_version must be one of {', '.join(map(str, RNG_VERSIONS))}", 400)
+
+    if not mock and MODEL_BACKEND is None:
+        return error_payload(
+            mode, "NOT_IMPLEMENTED", "Non-mock mode needs a model server: pass --model-url (or set THINKGYM_MODEL_URL), or use --mock.", 501
+        )
+
+    if user_note is not None and not isinstance(user_note, str):
+        return error_payload(mode, "INVALID_INPUT", "user_note must be a string", 400)
+
+    if report is not None and not isinstance(report, str):
+        return error_payload(mode, "INVALID_INPUT", "report must be a string", 400)
+
+    timer = StageTimer() if TIMINGS_ENABLED else None
+    try:
+        with use_timer(timer), sentence_scope(), profiled(next_profile_path(mode), PROFILE_FORMAT):
+            reused = None
+            if REUSE_THRESHOLD is not None and mode in ("debate", "full") and regenerate is None:
+                with stage("reuse"):
+                    try:
+                        reused = find_reusable_debate(topic, round_idx, seed, user_note, mock, rng_version)
+                    except Exception as ex:  # noqa: BLE001
+                        eprint("Topic reuse lookup failed:", repr(ex))
+            if regenerate is not None:
+                # Depends on the result it starts from, so it bypasses the result cache.
+                payload = regenerate_engine(
+                    mode=mode,
+                    topic=topic,
+                    round_idx=round_idx,
+                    user_note=user_note,
+                    debate_json=debate_json,
+                    structure_json=structure_json,
+                    report=report,
+                    regenerate=regenerate,
+                    mock=mock,
+                    seed=seed,
+                    emit=emit,
+                    rng_version=rng_version,
+                    baseline=baseline,
+                    default_variant=default_variant,
+                )
+            elif reused is not None:
+                # Depends on what the corpus holds, so it bypasses the result cache.
+                payload = run_engine(
+                    mode=mode,
+                    topic=topic,
+                    round_idx=round_idx,
+                    user_note=user_note,
+                    debate_json=None,
+                    structure_json=None,
+                    mock=mock,
+                    seed=seed,
+                    emit=emit,
+                    reused_debate=reused[0],
+                    rng_version=rng_version,
+                )
+                payload["meta"]["reused_from"] = reused[1]
+            elif INFLIGHT is not None and mock:
+                payload = coalesced_run_engine(
+                    mode, topic, round_idx, user_note, debate_json, structure_json, seed, emit, rng_version
+                )
+            elif RESULT_CACHE is not None and mock:
+                # Model output is not a function of the inputs, so only mock results are cached.
+                payload = cached_run_engine(mode, topic, round_idx, user_note, debate_json, structure_json, seed, emit, rng_version)
+            else:
+                payload = run_engine(
+                    mode=mode,
+                    topic=topic,
+                    round_idx=round_idx,
+                    user_note=user_note,
+                    debate_json=debate_json,
+                    structure_json=structure_json,
+                    mock=mock,
+                    seed=seed,
+                    emit=emit,
+                    rng_version=rng_version,
+                )
+        recording = state is not None or CORPUS_DB_PATH is not None
+        debate = load_json_field(debate_json, "debate_json") if recording and mode in ("structure", "report") else None
+        if state is not None:
+            with stage("session"):
+                events = session_events(state, mode, topic, round_idx, seed, rng_version, user_note, debate, payload)
+                count = open_session_store().append(state.session_id, events) if events else state.events
+            payload["meta"]["session"] = {"id": state.session_id, "round": round_idx, "events": count}
+        if CORPUS_DB_PATH is not None:
+            with stage("corpus"):
+                structure = load_json_field(structure_json, "structure_json") if mode == "report" and has_value(structure_json) else None
+                corpus = record_corpus(
+                    mode, topic, round_idx, seed, mock, rng_version, user_note, debate, structure, payload
+                )
+            if corpus is not None:
+                payload["meta"]["corpus"] = corpus
+        if timer is not None:
+            payload["meta"]["timings"] = timer.as_dict()
+        return payload
+    except ModelError as me:
+        eprint("Model error:", repr(me))
+        return error_payload(mode, me.code, str(me), me.http_hint)
+    except ValueError as ve:
+        return error_payload(mode, "INVALID_INPUT", str(ve), 400)
+    except Exception as ex:  # noqa: BLE001
+        eprint("Unexpected error:", repr(ex))
+        return error_payload(mode, "INTERNAL_ERROR", "Unexpected server error", 500)
+
+
+def deadline_error(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """An error envelope when the request's deadline_ms (epoch ms, set by a caller that will stop
+    waiting then) is invalid or has already passed; None when it may run."""
+    deadline = request.get("deadline_ms")
+    if deadline is None:
+        return None
+    mode = request.get("mode") if isinstance(request.get("mode"), str) else "unknown"
+    if isinstance(deadline, bool) or not isinstance(deadline, (int, float)):
+        return error_payload(mode, "INVALID_INPUT", "deadline_ms must be a number (epoch milliseconds)", 400)
+    if time.time() * 1000 >= deadline:
+        return error_payload(mode, "DEADLINE_EXCEEDED", "Request deadline passed before the engine started it", 504)
+    return None
+
+
+def handle_request_doc(request: Any, default_mock: bool, emit: Optional[EventSink] = None) -> Dict[str, Any]:
+    """Dispatch one decoded request document. The request `id`, if any, is echoed back."""
+    if not isinstance(request, dict):
+        return error_payload("unknown", "INVALID_INPUT", "request must be a JSON object", 400)
+
+    payload = deadline_error(request) or handle_request(
+        mode=request.get("mode"),
+        topic=request.get("topic"),
+        round_idx=request.get("round"),
+        user_note=request.get("user_note"),
+        debate_json=request.get("debate"),
+        structure_json=request.get("structure"),
+        mock=bool(request.get("mock", default_mock)),
+        seed=request.get("seed"),
+        emit=emit,
+        session_id=request.get("session_id"),
+        rng_version=request.get("rng_version"),
+        report=request.get("report"),
+        regenerate=request.get("regenerate"),
+    )
+    if "id" in request:
+        payload["id"] = request["id"]
+    return payload
+
+
+def handle_request_line(line: str, default_mock: bool, emit: Optional[EventSink] = None) -> Dict[str, Any]:
+    """Decode one NDJSON request and dispatch it. With `emit`, a request asking for
+    "stream": true has its progress events (with its id, if any) sent there first."""
+    try:
+        request = json.loads(line)
+    except Exception as ex:  # noqa: BLE001
+        return error_payload("unknown", "INVALID_INPUT", f"request must be valid JSON ({ex})", 400)
+    if emit is None or not isinstance(request, dict) or not request.get("stream"):
+        return handle_request_doc(request, default_mock)
+    if "id" in request:
+        sink = emit
+
+        def emit(event: Dict[str, Any]) -> None:
+            sink({**event, "id": request["id"]})
+
+    return handle_request_doc(request, default_mock, emit)
+
+
+def read_input_document(path: str, args: argparse.Namespace) -> Any:
+    """Parse the --input-file document once; argv flags only fill in keys it leaves out."""
+    if path == "-":
+        request = json.load(sys.stdin)
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            request = json.load(fh)
+    if isinstance(request, dict):
+        defaults = {
+            "mode": args.mode,
+            "topic": args.topic,
+            "round": args.round,
+            "seed": args.seed,
+            "user_note": args.user_note,
+            "session_id": args.session_id,
+        }
+        for key, value in defaults.items():
+            if value is not None:
+                request.setdefault(key, value)
+    return request
+
+
+def serve_stream(in_stream: TextIO, out_stream: TextIO, default_mock: bool, allow_stream: bool = False) -> int:
+    """Answer NDJSON requests until EOF and return how many were handled. Blank lines are ignored.
+    With allow_stream, "stream": true requests get their event lines ahead of the response."""
+    count = 0
+    emit: Optional[EventSink] = None
+    if allow_stream:
+        def emit(event: Dict[str, Any]) -> None:
+            write_json_line(event, out_stream)
+
+    for line in in_stream:
+        if not line.strip():
+            continue
+        write_json_line(handle_request_line(line, default_mock, emit), out_stream)
+        count += 1
+    return count
+
+
+def handle_batch_line(line: str, default_mock: bool) -> Dict[str, Any]:
+    """handle_request_line for --batch-file. meta.cache is left out: its counters belong to
+    whichever process ran the job, so --workers N output would differ from a serial run."""
+    payload = handle_request_line(line, default_mock)
+    if isinstance(payload.get("meta"), dict):
+        payload["meta"].pop("cache", None)
+    return payload
+
+
+def run_batch_parallel(lines: Iterable[str], out_stream: TextIO, default_mock: bool, workers: int, chunk_size: int) -> int:
+    """Fan jobs out over worker processes. Results are written in input order, so output is
+    byte-identical to a serial run (each job seeds its own RNG), as long as the jobs do not share
+    a session or record into the corpus, whose state depends on the order jobs finish in.
+    Each worker opens its own result cache (open_cache as the pool initializer)."""
+    jobs = [line for line in lines if line.strip()]
+    from concurrent.futures import ProcessPoolExecutor
+
+    handler = functools.partial(handle_batch_line, default_mock=default_mock)
+    with ProcessPoolExecutor(max_workers=workers, initializer=open_cache, initargs=(CACHE_SETTINGS,)) as pool:
+        for payload in pool.map(handler, jobs, chunksize=chunk_size):
+            write_json_line(payload, out_stream)
+    return len(jobs)
+
+
+def run_batch(path: str, out_stream: TextIO, default_mock: bool, workers: int = 1, chunk_size: int = 16) -> int:
+    """Run every job in a JSONL file (`-` for stdin). A bad job yields an error line, not an abort."""
+    if path == "-":
+        # Read stdin, but leave it open: it belongs to the caller.
+        count = run_batch_lines(sys.stdin, out_stream, default_mock, workers, chunk_size)
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            count = run_batch_lines(fh, out_stream, default_mock, workers, chunk_size)
+    eprint(f"batch done: {count} jobs")
+    return count
+
+
+def run_batch_lines(lines: Iterable[str], out_stream: TextIO, default_mock: bool, workers: int, chunk_size: int) -> int:
+    if workers > 1:
+        return run_batch_parallel(lines, out_stream, default_mock, workers, chunk_size)
+    count = 0
+    for line in lines:
+        if line.strip():
+            write_json_line(handle_batch_line(line, default_mock), out_stream)
+            count += 1
+    return count
+
+
+def serve_socket(path: str, default_mock: bool) -> None:
+    """Serve NDJSON over a Unix socket; one thread per connection."""
+    import socketserver
+
+    class EngineRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            def emit(event: Dict[str, Any]) -> None:
+                write_frame(SERIALIZER.frame(event), self.wfile)
+
+            for raw in self.rfile:
+                line = raw.decode("utf-8", errors="replace")
+                if not line.strip():
+                    continue
+                payload = handle_request_line(line, default_mock, emit)
+                write_frame(SERIALIZER.frame(payload), self.wfile)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, EngineRequestHandler) as server:
+        server.daemon_threads = True
+        eprint(f"engine listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+# Defaults for every flag, shared by parse_args() and parse_fast_args().
+CLI_DEFAULTS: Dict[str, Any] = {
+    "mode": None,
+    "topic": None,
+    "round": None,
+    "user_note": None,
+    "debate_json": None,
+    "structure_json": None,
+    "report_md": None,
+    "regenerate_json": None,
+    "mock": False,
+    "seed": None,
+    "rng_version": None,
+    "serve": False,
+    "socket": None,
+    "batch_file": None,
+    "workers": 1,
+    "chunk_size": 16,
+    "cache_size": None,
+    "cache_db": None,
+    "cache_db_max_bytes": 64 * 1024 * 1024,
+    "input_file": None,
+    "stream": False,
+    "timings": False,
+    "profile": None,
+    "profile_format": "pstats",
+    "session_id": None,
+    "session_db": None,
+    "corpus_db": None,
+    "reuse_threshold": None,
+    "model_url": None,
+    "model_connections": None,
+    "format": "json",
+}
+
+# The single-request flags the API routes send: flag -> (dest, type); None marks a switch.
+_FAST_FLAGS: Dict[str, Any] = {
+    "--mode": ("mode", str),
+    "--topic": ("topic", str),
+    "--round": ("round", int),
+    "--user-note": ("user_note", str),
+    "--debate-json": ("debate_json", str),
+    "--structure-json": ("structure_json", str),
+    "--report-md": ("report_md", str),
+    "--regenerate-json": ("regenerate_json", str),
+    "--seed": ("seed", int),
+    "--rng-version": ("rng_version", int),
+    "--input-file": ("input_file", str),
+    "--session-id": ("session_id", str),
+    "--session-db": ("session_db", str),
+    "--corpus-db": ("corpus_db", str),
+    "--reuse-threshold": ("reuse_threshold", float),
+    "--model-url": ("model_url", str),
+    "--mock": ("mock", None),
+    "--stream": ("stream", None),
+    "--timings": ("timings", None),
+}
+
+
+def parse_fast_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """Parse a plain single-request argv without importing argparse (most of a cold start's
+    import time). Returns None for anything else (serve/batch flags, --help, --flag=value,
+    bad values), and parse_args() then handles it, errors included."""
+    values = dict(CLI_DEFAULTS)
+    i = 0
+    while i < len(argv):
+        spec = _FAST_FLAGS.get(argv[i])
+        if spec is None:
+            return None
+        dest, kind = spec
+        if kind is None:
+            values[dest] = True
+            i += 1
+            continue
+        if i + 1 >= len(argv):
+            return None
+        raw = argv[i + 1]
+        if raw.startswith("-") and raw != "-":
+            return None  # argparse reads this as a flag (or a negative number); let it decide
+        try:
+            values[dest] = kind(raw)
+        except ValueError:
+            return None
+        i += 2
+    if values["mode"] is not None and values["mode"] not in MODES:
+        return None
+    if values["rng_version"] is not None and values["rng_version"] not in RNG_VERSIONS:
+        return None
+    if values["reuse_threshold"] is not None and (values["corpus_db"] is None or not 0 < values["reuse_threshold"] <= 1):
+        return None
+    if values["input_file"] is None and (values["mode"] is None or (values["topic"] is None and values["session_id"] is None)):
+        return None
+    return SimpleNamespace(**values)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ThinkGym run.py (mock-first engine)")
+    parser.add_argument("--mode", choices=list(MODES))
+    parser.add_argument("--topic", help="Debate topic")
+    parser.add_argument("--round", type=int, help="Round index (1-based; default 1, or the session's current round)")
+    parser.add_argument("--user-note", help="User note text (optional for structure/report/full)")
+    parser.add_argument("--debate-json", help="Debate turns JSON string (required for structure/report)")
+    parser.add_argument("--structure-json", help="Structure JSON string (optional for report; preferred if Step4 result exists)")
+    parser.add_argument("--report-md", help="Previous report markdown, to regenerate sections of (with --regenerate-json)")
+    parser.add_argument(
+        "--regenerate-json",
+        help='Recompute only part of a result, e.g. {"turn": 3} or {"report_sections": ["4"]}; the rest is returned as given',
+    )
+    parser.add_argument("--mock", action="store_true", help="Use mock generation (no LLM)")
+    parser.add_argument("--seed", type=int, help="Deterministic seed for mock (default 42, or the session's seed)")
+    parser.add_argument(
+        "--rng-version",
+        type=int,
+        choices=list(RNG_VERSIONS),
+        help="Mock RNG scheme: 1 = one shared sequence (default), 2 = a stream per turn/stage (needed for regeneration)",
+    )
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived worker reading NDJSON requests")
+    parser.add_argument("--socket", help="Unix socket path for --serve (default: stdin/stdout)")
+    parser.add_argument("--batch-file", help="JSONL file of jobs to run ('-' for stdin)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --batch-file (default 1: serial)")
+    parser.add_argument("--chunk-size", type=int, help="Jobs handed to a worker at a time for --batch-file")
+    parser.add_argument("--cache-size", type=int, help="In-memory result cache entries (default 256 with --serve, else off)")
+    parser.add_argument("--cache-db", help="sqlite file for the on-disk result cache tier")
+    parser.add_argument("--cache-db-max-bytes", type=int, help="Size budget for --cache-db before LRU eviction")
+    parser.add_argument("--input-file", help="JSON request document ('-' for stdin); replaces --debate-json/--structure-json")
+    parser.add_argument("--stream", action="store_true", help="Write NDJSON progress events, ending with a 'final' event holding the envelope")
+    parser.add_argument("--timings", action="store_true", help="Attach per-stage timings (ms) under meta.timings")
+    parser.add_argument("--profile", metavar="DIR", help="Write one profile per request into DIR (implies --timings)")
+    parser.add_argument("--profile-format", choices=["pstats", "collapsed"], help="cProfile stats or sampled collapsed stacks")
+    parser.add_argument("--session-id", help="Session to continue; omitted inputs are loaded from its log")
+    parser.add_argument("--session-db", help="sqlite file holding the session logs (default .thinkgym/sessions.sqlite3)")
+    parser.add_argument("--corpus-db", help="sqlite corpus to record every generation into (off by default)")
+    parser.add_argument(
+        "--reuse-threshold",
+        type=float,
+        help="Reuse the --corpus-db debate of a topic at least this similar (0-1, e.g. 0.5; off by default)",
+    )
+    parser.add_argument("--model-url", help="Model server for non-mock requests (default $THINKGYM_MODEL_URL)")
+    parser.add_argument("--model-connections", type=int, help="Keep-alive connections per model host (default 4)")
+    parser.add_argument("--format", choices=list(FORMATS), help="Response framing for --serve / --batch-file")
+    parser.set_defaults(**CLI_DEFAULTS)
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be >= 1")
+    if args.reuse_threshold is not None and (args.corpus_db is None or not 0 < args.reuse_threshold <= 1):
+        parser.error("--reuse-threshold needs --corpus-db and a value in (0, 1]")
+    if args.model_connections is not None and args.model_connections < 1:
+        parser.error("--model-connections must be >= 1")
+    if args.format != "json" and not (args.serve or args.batch_file is not None):
+        parser.error("--format msgpack applies to --serve and --batch-file only")
+    if not args.serve and args.batch_file is None and args.input_file is None:
+        if args.mode is None:
+            parser.error("the following arguments are required: --mode")
+        if args.topic is None and args.session_id is None:
+            parser.error("the following arguments are required: --topic (or --session-id)")
+    return args
+
+
+def exit_code_for(payload: Dict[str, Any]) -> int:
+    if payload["ok"]:
+        return 0
+    return 2 if payload["error"]["code"] == "INTERNAL_ERROR" else 1
+
+
+def configure_cache(args: argparse.Namespace) -> None:
+    """The content-addressed result cache (hit/miss counters in meta.cache): on by default for
+    --serve, otherwise only with --cache-size / --cache-db (a sqlite tier shared across processes)."""
+    size = args.cache_size if args.cache_size is not None else (256 if args.serve else 0)
+    if size > 0 or args.cache_db:
+        open_cache({"max_entries": size, "disk_path": args.cache_db, "disk_max_bytes": args.cache_db_max_bytes})
+
+
+def open_cache(settings: Optional[Dict[str, Any]]) -> None:
+    """Open RESULT_CACHE from `settings` (ResultCache keyword arguments; None leaves it off).
+    Batch workers run it as their pool initializer, so no process uses another's cache."""
+    global RESULT_CACHE, CACHE_SETTINGS
+    CACHE_SETTINGS = settings
+    RESULT_CACHE = None
+    if settings is not None:
+        from result_cache import ResultCache
+
+        RESULT_CACHE = ResultCache(**settings)
+
+
+def configure_inflight(args: argparse.Namespace) -> None:
+    """Single-flight for --serve --socket: identical mock requests in flight at the same time share
+    one computation (counters in meta.inflight)."""
+    global INFLIGHT
+    if args.serve and args.socket:
+        from result_cache import SingleFlight
+
+        INFLIGHT = SingleFlight()
+
+
+def configure_instrumentation(args: argparse.Namespace) -> None:
+    """--timings: per-stage timings in meta.timings. --profile DIR: also one pstats (or collapsed
+    stacks) file per request."""
+    global TIMINGS_ENABLED, PROFILE_DIR, PROFILE_FORMAT
+    TIMINGS_ENABLED = bool(args.timings or args.profile)
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+        PROFILE_DIR = args.profile
+        PROFILE_FORMAT = args.profile_format
+
+
+def configure_model(args: argparse.Namespace) -> None:
+    """One pooled backend for the process, so a --serve worker keeps its model connections warm
+    across requests. A single mock request skips it; serve/batch requests may still ask for "mock": false."""
+    global MODEL_BACKEND
+    if args.mock and not args.serve and args.batch_file is None:
+        return
+    from model_backend import model_backend_from_env
+
+    try:
+        MODEL_BACKEND = model_backend_from_env(args.model_url, args.model_connections)
+    except ValueError as ex:
+        err_response(args.mode or "unknown", "INVALID_INPUT", str(ex), 400, exit_code=1)
+
+
+def main(argv: List[str]) -> None:
+    """Configure the process from argv, then run one of:
+    - --serve: a long-lived worker, one JSON request/response per line on stdin or --socket
+      (serve_stream, serve_socket); "deadline_ms" and "stream" are honored per request
+    - --batch-file: a JSONL file of jobs in this interpreter, one result line per job (run_batch)
+    - otherwise one request, from argv payloads or an --input-file document ('-' for stdin); with
+      --stream its progress events (turn_started ... final) come first as NDJSON
+    Plain request argv skips argparse (parse_fast_args), and modules only some paths need are
+    imported on first use. --serve / --batch-file write orjson when installed, or --format msgpack."""
+    global SESSION_DB_PATH, CORPUS_DB_PATH, REUSE_THRESHOLD, RNG_VERSION, SERIALIZER
+    args = parse_fast_args(argv) or parse_args(argv)
+    if args.serve or args.batch_file is not None:
+        try:
+            SERIALIZER = get_serializer(args.format)
+        except RuntimeError as ex:
+            err_response("unknown", "INVALID_INPUT", str(ex), 400, exit_code=1)
+    configure_cache(args)
+    configure_inflight(args)
+    configure_instrumentation(args)
+    configure_model(args)
+    SESSION_DB_PATH = args.session_db
+    CORPUS_DB_PATH = args.corpus_db
+    REUSE_THRESHOLD = args.reuse_threshold
+    RNG_VERSION = args.rng_version
+
+    if args.serve:
+        if args.socket:
+            serve_socket(args.socket, default_mock=args.mock)
+        else:
+            serve_stream(sys.stdin, sys.stdout, default_mock=args.mock, allow_stream=True)
+        return
+
+    if args.batch_file is not None:
+        try:
+            run_batch(args.batch_file, sys.stdout, default_mock=args.mock, workers=args.workers, chunk_size=args.chunk_size)
+        except OSError as ex:
+            err_response("batch", "INVALID_INPUT", f"cannot read batch file ({ex})", 400, exit_code=1)
+        return
+
+    emit: Optional[EventSink] = None
+    if args.stream:
+        def emit(event: Dict[str, Any]) -> None:
+            write_json_line(event, sys.stdout)
+
+    if args.input_file is not None:
+        try:
+            request = read_input_document(args.input_file, args)
+        except OSError as ex:
+            err_response(args.mode or "unknown", "INVALID_INPUT", f"cannot read input file ({ex})", 400, exit_code=1)
+        except ValueError as ex:
+            err_response(args.mode or "unknown", "INVALID_INPUT", f"input must be valid JSON ({ex})", 400, exit_code=1)
+        payload = handle_request_doc(request, default_mock=args.mock, emit=emit)
+    else:
+        payload = handle_request(
+            mode=args.mode,
+            topic=args.topic,
             round_idx=args.round,
             user_note=args.user_note,
             debate_json=args.debate_json,
             structure_json=args.structure_json,
-            mock=True,
+            mock=args.mock,
             seed=args.seed,
+            emit=emit,
+            session_id=args.session_id,
+            report=args.report_md,
+            regenerate=args.regenerate_json,
         )
+    if args.stream:
+        write_json_line({"event": "final", "result": payload}, sys.stdout)
+        raise SystemExit(exit_code_for(payload))
+    if payload["ok"]:
         ok_response(payload)
-    except ValueError as ve:
-        err_response(mode, "INVALID_INPUT", str(ve), 400, exit_code=1)
-    except SystemExit:
-        raise
-    except Exception as ex:  # noqa: BLE001
-        eprint("Unexpected error:", repr(ex))
-        err_response(mode, "INTERNAL_ERROR", "Unexpected server error", 500, exit_code=2)
+    error = payload["error"]
+    err_response(payload["mode"], error["code"], error["message"], error["http_hint"], exit_code=exit_code_for(payload))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+"""
+Declarative payload schemas shared by backend/run.py and thinkgym-mini.
+- A schema is a plain dict (a small JSON-Schema-like subset, see _Compiler.node)
+- CompiledSchema generates one Python function per schema, once, on first use (cheap imports)
+- Validation is a single traversal that collects every violation with its path
+  (e.g. `debate[2].role`) instead of stopping at the first one
+- Markdown reports are checked with one regex scan for all section headers
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from korean_text import split_sentences
+
+Violation = Tuple[str, str]
+Checker = Callable[[Any, str, List[Violation]], List[Violation]]
+
+_TYPES: Dict[str, Tuple[type, ...]] = {"object": (dict,), "array": (list,), "string": (str,), "markdown": (str,)}
+_TYPE_NAMES = {"object": "an object", "array": "a list", "string": "a string", "markdown": "a string"}
+
+
+class SchemaError(ValueError):
+    """All violations found in one payload. Subclasses ValueError so existing handlers still apply."""
+
+    def __init__(self, title: str, violations: Sequence[Violation]) -> None:
+        self.violations = list(violations)
+        super().__init__(f"{title}: " + "; ".join(f"{path}: {message}" for path, message in self.violations))
+
+
+def _count_range(min_count: Optional[int], max_count: Optional[int]) -> str:
+    if min_count == max_count:
+        return f"exactly {min_count}"
+    if max_count is None:
+        return f"at least {min_count}"
+    if min_count is None:
+        return f"at most {max_count}"
+    return f"{min_count}..{max_count}"
+
+
+def _markdown_checker(sections: List[Dict[str, Any]]) -> Callable[[str, str, List[Violation]], None]:
+    """One regex scan finds every header; only sections with line rules are then sliced and counted."""
+    headers = [section["header"] for section in sections]
+    rules = [(section["header"], section["lines"], section.get("line_prefix", "")) for section in sections if "lines" in section]
+    # Factoring out the shared literal prefix ("#") lets the regex engine skip ahead to candidates.
+    prefix = os.path.commonprefix(headers)
+    rests = sorted((header[len(prefix):] for header in headers), key=len, reverse=True)
+    header_re = re.compile(re.escape(prefix) + "(?:" + "|".join(re.escape(rest) for rest in rests) + ")")
+
+    following = dict(zip(headers, headers[1:]))
+
+    def check(value: str, path: str, errors: List[Violation]) -> None:
+        # Every occurrence of every header, in document order.
+        found: Dict[str, List[Tuple[int, int]]] = {}
+        for match in header_re.finditer(value):
+            found.setdefault(match.group(), []).append(match.span())
+        if len(found) != len(headers):
+            for header in headers:
+                if header not in found:
+                    errors.append((path, f"missing header {header!r}"))
+        for header, expected, line_prefix in rules:
+            if header not in found:
+                continue
+            # A body runs from the header's first occurrence to the next header in schema order that
+            # follows it (or to the end), whatever else sits in between.
+            start = found[header][0][1]
+            end = len(value)
+            for next_start, _ in found.get(following.get(header, ""), ()):
+                if next_start >= start:
+                    end = next_start
+                    break
+            count = 0
+            for line in value[start:end].splitlines():
+                line = line.strip()
+                if line and line.startswith(line_prefix):
+                    count += 1
+            if count != expected:
+                kind = f"'{line_prefix}' lines" if line_prefix else "lines"
+                errors.append((f"{path}[{header!r}]", f"must have exactly {expected} {kind}, got {count}"))
+
+    return check
+
+
+class _Compiler:
+    """Emits straight-line Python source for a schema (no per-node calls, paths built only on error)."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {"split_sentences": split_sentences}
+        self._counter = 0
+
+    def name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def const(self, value: Any) -> str:
+        name = self.name("c")
+        self.namespace[name] = value
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def error(self, depth: int, path: str, message: str) -> None:
+        self.emit(depth, f"errors.append(({path}, {message}))")
+
+    def node(self, schema: Dict[str, Any], var: str, path: str, depth: int) -> None:
+        """Supported keys:
+        - type: object | array | string | markdown (markdown values are str)
+        - const / enum: exact value / allowed values
+        - object: properties, required, ordered
+        - array: items, min_items, max_items
+        - string: non_empty, no_newlines, sentences
+        - markdown: sections = [{header, lines?, line_prefix?}]
+        """
+        kind = schema.get("type")
+        guards = []
+        if kind is not None:
+            guards.append((f"not isinstance({var}, {self.const(_TYPES[kind])})", repr(f"must be {_TYPE_NAMES[kind]}")))
+        if "const" in schema:
+            const = schema["const"]
+            guards.append((f"{var} != {self.const(const)}", repr(f"must equal {const!r}")))
+        if "enum" in schema:
+            enum = list(schema["enum"])
+            guards.append((f"{var} not in {self.const(tuple(enum))}", repr(f"must be one of {enum}")))
+        for i, (condition, message) in enumerate(guards):
+            self.emit(depth, f"{'if' if i == 0 else 'elif'} {condition}:")
+            self.error(depth + 1, path, message)
+        body_depth = depth
+        if guards:
+            self.emit(depth, "else:")
+            body_depth = depth + 1
+        start = len(self.lines)
+        if kind is not None:
+            getattr(self, f"_{kind}")(schema, var, path, body_depth)
+        if guards and len(self.lines) == start:
+            self.lines.pop()  # nothing to check past the guards: drop the dangling "else:"
+
+    def _object(self, schema: Dict[str, Any], var: str, path: str, depth: int) -> None:
+        properties: Dict[str, Any] = schema.get("properties", {})
+        required = list(schema.get("required", ()))
+        if schema.get("ordered"):
+            # The exact key list, in order (LLM output is compared against the prompt's JSON shape).
+            keys = list(properties)
+            self.emit(depth, f"if list({var}) != {self.const(keys)} and {var}.keys() >= {self.const(set(required))}:")
+            self.error(depth + 1, path, repr(f"keys must be exactly {keys} in this order"))
+        for key, sub in properties.items():
+            child = self.name("v")
+            child_path = f"{path} + {('.' + key)!r}"
+            self.emit(depth, f"{child} = {var}.get({key!r}, _MISSING)")
+            self.emit(depth, f"if {child} is _MISSING:")
+            if key in required:
+                self.error(depth + 1, child_path, repr("is required"))
+            else:
+                self.emit(depth + 1, "pass")  # optional and absent
+            self.emit(depth, "else:")
+            start = len(self.lines)
+            self.node(sub, child, child_path, depth + 1)
+            if len(self.lines) == start:
+                self.lines.pop()
+
+    def _array(self, schema: Dict[str, Any], var: str, path: str, depth: int) -> None:
+        min_items = schema.get("min_items")
+        max_items = schema.get("max_items")
+        bounds = []
+        if min_items is not None and min_items == max_items:
+            bounds.append(f"len({var}) != {min_items}")
+        elif min_items is not None:
+            bounds.append(f"len({var}) < {min_items}")
+        if max_items is not None and min_items != max_items:
+            bounds.append(f"len({var}) > {max_items}")
+        if bounds:
+            expected = _count_range(min_items, max_items)
+            self.emit(depth, f"if {' or '.join(bounds)}:")
+            self.error(depth + 1, path, f"f'must have {expected} items, got {{len({var})}}'")
+        if "items" in schema:
+            index, item = self.name("i"), self.name("v")
+            self.emit(depth, f"for {index}, {item} in enumerate({var}):")
+            start = len(self.lines)
+            self.node(schema["items"], item, f"{path} + '[' + str({index}) + ']'", depth + 1)
+            if len(self.lines) == start:
+                self.lines.pop()
+
+    def _string(self, schema: Dict[str, Any], var: str, path: str, depth: int) -> None:
+        if schema.get("non_empty"):
+            self.emit(depth, f"if not {var}.strip():")
+            self.error(depth + 1, path, repr("must be a non-empty string"))
+        if schema.get("no_newlines"):
+            self.emit(depth, f"if '\\n' in {var} or '\\r' in {var}:")
+            self.error(depth + 1, path, repr("must not contain line breaks"))
+        if "sentences" in schema:
+            expected = schema["sentences"]
+            count = self.name("n")
+            self.emit(depth, f"{count} = len(split_sentences({var}))")
+            self.emit(depth, f"if {count} != {expected}:")
+            self.error(depth + 1, path, f"f'must have exactly {expected} sentences, got {{{count}}}'")
+
+    def _markdown(self, schema: Dict[str, Any], var: str, path: str, depth: int) -> None:
+        self.emit(depth, f"{self.const(_markdown_checker(schema['sections']))}({var}, {path}, errors)")
+
+    def build(self, schema: Dict[str, Any]) -> Callable[[Any, str, List[Violation]], None]:
+        self.emit(0, "def validate(value, path, errors):")
+        self.node(schema, "value", "path", 1)
+        self.emit(1, "return errors")
+        self.namespace["_MISSING"] = object()
+        exec("\n".join(self.lines), self.namespace)  # noqa: S102 - source is generated from our own schemas
+        return self.namespace["validate"]
+
+
+class CompiledSchema:
+    """A schema compiled into a single-traversal validator on first use. `root` prefixes every path."""
+
+    def __init__(self, schema: Dict[str, Any], root: str) -> None:
+        self.schema = schema
+        self.root = root
+        self._check: Optional[Checker] = None
+        self._source = ""
+
+    def _compile(self) -> Checker:
+        compiler = _Compiler()
+        self._check = compiler.build(self.schema)
+        self._source = "\n".join(compiler.lines)
+        return self._check
+
+    @property
+    def source(self) -> str:
+        if self._check is None:
+            self._compile()
+        return self._source
+
+    def violations(self, value: Any) -> List[Violation]:
+        return (self._check or self._compile())(value, self.root, [])
+
+    def validate(self, value: Any, title: Optional[str] = None) -> None:
+        errors = (self._check or self._compile())(value, self.root, [])
+        if errors:
+            raise SchemaError(title or f"invalid {self.root}", errors)
+
+
+def extend(schema: Dict[str, Any], **properties: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of an object schema with some property schemas refined (merged key by key)."""
+    out = dict(schema)
+    out["properties"] = {
+        key: {**sub, **properties.get(key, {})} for key, sub in schema["properties"].items()
+    }
+    return out
+
+
+STRUCTURE_KEYS = ["claim", "reasons", "assumptions", "counterpoints", "missing_info", "next_revision"]
+STRUCTURE_LIST_KEYS = ["reasons", "assumptions", "counterpoints", "missing_info"]
+
+DEBATE_TURN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "role": {"enum": ["pro", "con"]},
+        "text": {"type": "string", "non_empty": True},
+    },
+    "required": ["role", "text"],
+}
+
+DEBATE_SCHEMA: Dict[str, Any] = {"type": "array", "min_items": 4, "max_items": 4, "items": DEBATE_TURN_SCHEMA}
+
+# Shape both engines agree on. thinkgym-mini refines it below; the backend normalizes
+# next_revision after validation instead of rejecting it.
+STRUCTURE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "claim": {"type": "string"},
+        **{key: {"type": "array", "items": {"type": "string"}} for key in STRUCTURE_LIST_KEYS},
+        "next_revision": {"type": "string"},
+    },
+    "required": STRUCTURE_KEYS,
+}
+
+_NO_NEWLINE_ITEMS = {"items": {"type": "string", "no_newlines": True}}
+
+# Agent (LLM) output for a substantive user note: fixed key order, no line breaks, bounded lists.
+STRUCTURE_AGENT_SCHEMA: Dict[str, Any] = {
+    **extend(
+        STRUCTURE_SCHEMA,
+        claim={"no_newlines": True},
+        reasons={**_NO_NEWLINE_ITEMS, "min_items": 2, "max_items": 3},
+        assumptions={**_NO_NEWLINE_ITEMS, "min_items": 1, "max_items": 2},
+        counterpoints={**_NO_NEWLINE_ITEMS, "min_items": 1, "max_items": 2},
+        missing_info={**_NO_NEWLINE_ITEMS, "min_items": 1, "max_items": 2},
+        next_revision={"no_newlines": True, "sentences": 3},
+    ),
+    "ordered": True,
+}
+
+# Agent output when the user note is too short to analyze: the prompt's fixed fallback answer.
+STRUCTURE_SHORT_NOTE_SCHEMA: Dict[str, Any] = {
+    **extend(
+        STRUCTURE_SCHEMA,
+        claim={"const": "입장이 아직 명확히 정리되지 않았습니다."},
+        reasons={"const": []},
+        assumptions={"const": []},
+        counterpoints={"const": []},
+        missing_info={"const": ["주장을 1문장으로 명확히 작성하세요", "근거를 최소 2개 제시하세요"]},
+        next_revision={
+            "const": (
+                "주장을 1문장으로 정리하십시오. 그 주장을 뒷받침하는 근거 2가지를 추가하십시오. "
+                "반대 의견에 대한 대비를 포함하십시오."
+            )
+        },
+    ),
+    "ordered": True,
+}
+
+REPORT_SCHEMA: Dict[str, Any] = {
+    "type": "markdown",
+    "sections": [
+        {"header": "# 📝 ThinkGym 세션 리포트"},
+        {"header": "## 1. 오늘의 질문"},
+        {"header": "## 2. 찬반 핵심 요약"},
+        {"header": "## 3. 사용자의 입장", "lines": 3},
+        {"header": "## 4. 논리 구조 개선 포인트", "lines": 3, "line_prefix": "-"},
+        {"header": "## 5. 다음 라운드 추천 질문", "lines": 1},
+    ],
+}
+
+DEBATE = CompiledSchema(DEBATE_SCHEMA, "debate")
+STRUCTURE = CompiledSchema(STRUCTURE_SCHEMA, "structure")
+STRUCTURE_AGENT = CompiledSchema(STRUCTURE_AGENT_SCHEMA, "structure")
+STRUCTURE_SHORT_NOTE = CompiledSchema(STRUCTURE_SHORT_NOTE_SCHEMA, "structure")
+REPORT = CompiledSchema(REPORT_SCHEMA, "report")
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+Response serializers for backend/run.py.
+- json: orjson when installed (imported on first use), else a reused stdlib encoder; compact
+  UTF-8 bytes either way. Single-shot run.py output always takes the stdlib encoder (its
+  JSON_SERIALIZER): importing orjson costs a process more than it saves on one response
+- msgpack: optional (needs the msgpack package), for --serve / --batch-file consumers that
+  can decode a stream of self-delimiting MessagePack objects
+- write_frame() writes bytes straight to a text stream's binary buffer
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import io
+import json
+from abc import ABC, abstractmethod
+from types import ModuleType
+from typing import Any, BinaryIO, Callable, Dict, Optional, TextIO, Union
+
+FORMATS = ("json", "msgpack")
+
+# One encoder for the process: json.dumps() with non-default options builds a new one per call.
+_STDLIB_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def stdlib_dumps(payload: Any) -> bytes:
+    return _STDLIB_ENCODER.encode(payload).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[ModuleType]:
+    """Import an optional backend on first use (orjson alone costs more to import than a
+    single-shot run spends encoding); None when it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+class Serializer(ABC):
+    """Turns a payload into one self-delimiting frame of bytes."""
+
+    name = "base"
+
+    @abstractmethod
+    def dumps(self, payload: Any) -> bytes:
+        """The payload encoded in this format."""
+
+    def frame(self, payload: Any) -> bytes:
+        return self.dumps(payload)
+
+
+class JsonSerializer(Serializer):
+    name = "json"
+
+    def __init__(self, use_orjson: bool = True) -> None:
+        self._orjson = optional_module("orjson") if use_orjson else None
+        self.backend = "json" if self._orjson is None else "orjson"
+
+    def dumps(self, payload: Any) -> bytes:
+        if self._orjson is not None:
+            try:
+                return self._orjson.dumps(payload)
+            except TypeError:
+                # orjson rejects what stdlib accepts (e.g. ints past 64 bits in an echoed request id).
+                pass
+        return stdlib_dumps(payload)
+
+    def frame(self, payload: Any) -> bytes:
+        return self.dumps(payload) + b"\n"
+
+
+class MsgpackSerializer(Serializer):
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        msgpack = optional_module("msgpack")
+        if msgpack is None:
+            raise RuntimeError("msgpack output needs the 'msgpack' package (pip install msgpack)")
+        self._packer: Callable[[Any], bytes] = msgpack.Packer(use_bin_type=True).pack
+
+    def dumps(self, payload: Any) -> bytes:
+        return self._packer(payload)
+
+
+def get_serializer(fmt: str = "json") -> Serializer:
+    if fmt == "json":
+        return JsonSerializer()
+    if fmt == "msgpack":
+        return MsgpackSerializer()
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+
+def available_backends() -> Dict[str, bool]:
+    return {name: optional_module(name) is not None for name in ("orjson", "msgpack")}
+
+
+def write_frame(data: bytes, stream: Union[TextIO, BinaryIO]) -> None:
+    """Write bytes to a binary stream, or to a text stream's underlying buffer when it has one."""
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        stream.flush()  # keep ordering with anything already written through the text layer
+        buffer.write(data)
+        buffer.flush()
+        return
+    if isinstance(stream, io.TextIOBase):
+        stream.write(data.decode("utf-8"))
+    else:
+        stream.write(data)  # type: ignore[arg-type]
+    stream.flush()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""
+Append-only session log for multi-round ThinkGym sessions.
+- One sqlite table of events: (session_id, seq, round, kind, data)
+- kinds: session (topic, seed, rng_version, engine), topic, debate, note, structure, report,
+  regenerate (what a partial regeneration redrew, and its variant), and checkpoint (thinkgym-mini:
+  a completed round plus the state chained into the next one)
+- Events are never updated or deleted; SessionState is the fold of a session's log,
+  so callers send only the delta for a round and the engine loads the rest
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SESSION_DB = os.path.join(".thinkgym", "sessions.sqlite3")
+EVENT_KINDS = ("session", "topic", "debate", "note", "structure", "report", "regenerate", "checkpoint")
+# Which engine opened a session. The two record different shapes under the same kinds (thinkgym-mini
+# logs a 2-turn debate and markdown feedback), so each refuses to continue the other's sessions.
+ENGINES = ("backend", "thinkgym-mini")
+
+
+@dataclass
+class SessionState:
+    session_id: str
+    topic: Optional[str] = None
+    seed: Optional[int] = None
+    # The mock RNG scheme the session was opened with (see run.py RngStreams); sessions logged
+    # before the field existed used the legacy scheme, 1.
+    rng_version: Optional[int] = None
+    engine: Optional[str] = None
+    rounds: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    events: int = 0
+
+    @property
+    def last_round(self) -> int:
+        return max(self.rounds, default=0)
+
+    def get(self, round_idx: int, kind: str) -> Any:
+        return self.rounds.get(round_idx, {}).get(kind)
+
+    def apply(self, round_idx: int, kind: str, data: Any) -> None:
+        self.events += 1
+        if kind == "session":
+            self.topic = data.get("topic")
+            self.seed = data.get("seed")
+            self.rng_version = data.get("rng_version", 1)
+            # Logs from before the field: only thinkgym-mini opened sessions without a seed.
+            self.engine = data.get("engine") or ("backend" if data.get("seed") is not None else "thinkgym-mini")
+            return
+        self.rounds.setdefault(round_idx, {})[kind] = data
+
+
+class SessionStore:
+    """sqlite-backed event log. Thread-safe; seq numbers are allocated inside the write transaction,
+    so several processes can append to the same file."""
+
+    def __init__(self, path: str = DEFAULT_SESSION_DB) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_events ("
+            " session_id TEXT NOT NULL, seq INTEGER NOT NULL, round INTEGER NOT NULL,"
+            " kind TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, seq))"
+        )
+
+    def append(self, session_id: str, events: List[Tuple[int, str, Any]]) -> int:
+        """Append (round, kind, data) events atomically; returns the session's new event count."""
+        for _, kind, _ in events:
+            if kind not in EVENT_KINDS:
+                raise ValueError(f"unknown session event kind: {kind}")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM session_events WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                now = time.time()
+                rows = []
+                for round_idx, kind, data in events:
+                    seq += 1
+                    rows.append((session_id, seq, round_idx, kind, json.dumps(data, ensure_ascii=False), now))
+                self._conn.executemany(
+                    "INSERT INTO session_events (session_id, seq, round, kind, data, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return seq
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        """Replay the log into a SessionState; None if the session has no events."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT round, kind, data FROM session_events WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        state = SessionState(session_id)
+        for round_idx, kind, data in rows:
+            state.apply(round_idx, kind, json.loads(data))
+        return state
+
+    def close(self) -> None:
+        self._conn.close()
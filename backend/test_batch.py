@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+--batch-file: a serial run and a --workers run write the same bytes, with and without the
+result cache; `--batch-file -` reads the same jobs from stdin and leaves stdin open.
+Run from backend/: python -m unittest test_batch
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import List
+from unittest import mock
+
+import run
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEBATE = [
+    {"role": "pro", "text": "저는 찬성합니다. 이유는 효율입니다. 다만 위험도 있습니다."},
+    {"role": "con", "text": "효율은 좋지만 아닙니다. 위험이 큽니다. 조건부가 낫습니다."},
+    {"role": "pro", "text": "검증하면 됩니다. 기준을 세우면 됩니다. 단계적으로 갑니다."},
+    {"role": "con", "text": "기준이 없습니다. 책임이 모호합니다. 보류가 낫습니다."},
+]
+JOBS = [
+    {"id": 1, "mode": "full", "topic": "AI 교사", "seed": 1, "user_note": "생산성은 오르지만 협업 리듬이 깨질 수 있어서 조건부 도입이 필요해요"},
+    {"id": 2, "mode": "debate", "topic": "AI 교사", "seed": 7, "round": 2},
+    {"id": 3, "mode": "structure", "topic": "AI 교사", "debate": DEBATE, "user_note": "짧음"},
+    {"id": 4, "mode": "report", "topic": "AI 교사", "debate": DEBATE},
+    {"id": 5, "mode": "debate", "topic": " "},
+    {"id": 6, "mode": "full", "topic": "AI 교사", "seed": 1, "user_note": "생산성은 오르지만 협업 리듬이 깨질 수 있어서 조건부 도입이 필요해요"},
+    {"id": 7, "mode": "debate", "topic": "AI 교사", "seed": 7, "round": 2},
+]
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.jobs = os.path.join(self.dir, "jobs.jsonl")
+        with open(self.jobs, "w", encoding="utf-8") as fh:
+            for job in JOBS:
+                fh.write(json.dumps(job, ensure_ascii=False) + "\n\n")
+
+    def batch(self, *flags: str, path: str = "") -> bytes:
+        cmd = [sys.executable, "run.py", "--batch-file", path or self.jobs, "--mock", *flags]
+        with open(self.jobs, "rb") as stdin:
+            done = subprocess.run(cmd, cwd=BACKEND_DIR, stdin=stdin, capture_output=True, check=True)
+        return done.stdout
+
+    def lines(self, out: bytes) -> List[dict]:
+        return [json.loads(line) for line in out.decode("utf-8").splitlines()]
+
+    def test_serial_run_answers_every_job_in_order(self) -> None:
+        results = self.lines(self.batch())
+        self.assertEqual([r["id"] for r in results], [job["id"] for job in JOBS])
+        self.assertEqual([r["ok"] for r in results], [True, True, True, True, False, True, True])
+        self.assertEqual(results[0], results[5] | {"id": 1})
+
+    def test_workers_match_serial_output(self) -> None:
+        cache_db = os.path.join(self.dir, "cache.sqlite3")
+        for cache in ([], ["--cache-size", "8"], ["--cache-size", "1", "--cache-db", cache_db]):
+            with self.subTest(cache=cache):
+                serial = self.batch(*cache)
+                parallel = self.batch("--workers", "3", "--chunk-size", "1", *cache)
+                self.assertEqual(parallel, serial)
+                self.assertTrue(all("cache" not in r["meta"] for r in self.lines(serial) if r["ok"]))
+
+    def test_stdin_gives_the_same_output(self) -> None:
+        serial = self.batch()
+        self.assertEqual(self.batch(path="-"), serial)
+        self.assertEqual(self.batch("--workers", "2", path="-"), serial)
+
+    def test_stdin_is_left_open(self) -> None:
+        with open(self.jobs, encoding="utf-8") as fh:
+            stdin = io.StringIO(fh.read())
+        out = io.StringIO()
+        for workers in (1, 2):
+            with self.subTest(workers=workers), mock.patch.object(sys, "stdin", stdin):
+                stdin.seek(0)
+                self.assertEqual(run.run_batch("-", out, True, workers=workers), len(JOBS))
+                self.assertFalse(stdin.closed)
+        first, second = out.getvalue().splitlines()[: len(JOBS)], out.getvalue().splitlines()[len(JOBS):]
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
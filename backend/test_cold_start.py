@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cold start of backend/run.py, launched the way the API routes do (`python3 -X frozen_modules=on
+-m run`, via bench.engine_command).
+- Every run: a single request imports none of the modules the engine loads lazily (read from
+  `-X importtime`, so the result does not depend on how fast the host is)
+- With THINKGYM_BENCH=1: the p50 of each mode is under bench.COLD_START_BUDGET_MS, or
+  THINKGYM_COLD_BUDGET_MS when set (wall-clock, so only meaningful on a quiet, known machine)
+- Run from backend/: python -m unittest test_cold_start
+"""
+
+from __future__ import annotations
+
+import compileall
+import os
+import unittest
+
+import bench
+
+ITERATIONS = 9
+# Imported only by the paths that need them (--serve, --batch-file, caches, sessions, the corpus,
+# argparse for anything but the plain argv the routes send).
+LAZY_MODULES = (
+    "argparse",
+    "socketserver",
+    "concurrent",
+    "sqlite3",
+    "orjson",
+    "result_cache",
+    "session_store",
+    "corpus_store",
+    "regeneration",
+    "http",
+)
+
+
+class ColdStartTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # As in bench_engine_cold_start: bytecode is compiled at build time, not on the request path.
+        compileall.compile_dir(str(bench.BACKEND_DIR), maxlevels=0, quiet=1)
+        cls.inputs = bench.sample_inputs()
+
+    def test_single_request_skips_lazy_imports(self) -> None:
+        cmd = bench.engine_command("-X", "importtime")
+        for mode in bench.MODES:
+            with self.subTest(mode=mode):
+                stderr = bench.run_engine_process(cmd, bench.cold_request(mode, self.inputs), mode).stderr
+                lines = stderr.decode("utf-8", errors="replace").splitlines()
+                imported = {match.group(4) for match in map(bench.IMPORTTIME_LINE.match, lines) if match}
+                self.assertIn("korean_text", imported)  # the importtime output was parsed
+                eager = sorted(name for name in imported if name.split(".")[0] in LAZY_MODULES)
+                self.assertEqual(eager, [], f"{mode}: imported on cold start")
+
+    @unittest.skipUnless(os.environ.get("THINKGYM_BENCH") == "1", "wall-clock benchmark; set THINKGYM_BENCH=1")
+    def test_p50_under_budget(self) -> None:
+        budget_ms = float(os.environ.get("THINKGYM_COLD_BUDGET_MS", bench.COLD_START_BUDGET_MS))
+        cmd = bench.engine_command()
+        for mode in bench.MODES:
+            with self.subTest(mode=mode):
+                stdin = bench.cold_request(mode, self.inputs)
+                samples = bench.measure(lambda: bench.run_engine_process(cmd, stdin, mode), ITERATIONS)
+                p50_ms = bench.summarize(samples, children=True)["p50_ms"]
+                self.assertLess(p50_ms, budget_ms, f"{mode}: cold start p50 {p50_ms}ms over budget")
+
+
+if __name__ == "__main__":
+    unittest.main()
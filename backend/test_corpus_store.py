@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+corpus_store: recording, the mock / rng_version columns, lookups and rehydration, and corpora
+created before those columns existed; run.py recording every request and reusing the debate of a
+near-duplicate topic (--corpus-db / --reuse-threshold).
+Run from backend/: python -m unittest test_corpus_store
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import run
+from corpus_store import CorpusStore
+
+DEBATE = [{"role": "pro", "text": "찬성합니다."}, {"role": "con", "text": "반대합니다."}]
+
+
+class CorpusStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "corpus.sqlite3")
+
+    def open(self) -> CorpusStore:
+        store = CorpusStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_records_how_an_entry_was_generated(self) -> None:
+        store = self.open()
+        mock_v1, new = store.record("debate", "AI 교사", 42, 1, "조건부", True, 1, debate=DEBATE)
+        self.assertTrue(new)
+        mock_v2, _ = store.record("debate", "AI 교사", 42, 1, "조건부", True, 2, debate=DEBATE)
+        model, _ = store.record("debate", "AI 교사", 42, 1, "조건부", False, 1, debate=DEBATE)
+        self.assertEqual(len({mock_v1, mock_v2, model}), 3)
+        self.assertEqual(store.record("debate", "AI 교사", 42, 1, "조건부", True, 1, debate=DEBATE), (mock_v1, False))
+
+        self.assertEqual([e["id"] for e in store.find(topic="AI 교사", mock=True)], [mock_v1, mock_v2])
+        self.assertEqual([e["id"] for e in store.find(mock=True, rng_version=2)], [mock_v2])
+        self.assertEqual([e["id"] for e in store.find(mock=False)], [model])
+        entry = store.load(model)
+        self.assertEqual((entry["mock"], entry["rng_version"], entry["debate"]), (False, 1, DEBATE))
+
+    def test_load_rehydrates_every_part(self) -> None:
+        store = self.open()
+        structure = {"claim": "주장.", "reasons": ["근거."], "score": 3}
+        report = "# 제목\n\n## 1. 질문\nAI 교사"
+        entry_id, _ = store.record(
+            "full", "AI 교사", 1, 2, "긍정적인", True, 2, user_note="메모", debate=DEBATE, structure=structure, report=report
+        )
+        entry = store.load(entry_id)
+        self.assertEqual(
+            (entry["user_note"], entry["debate"], entry["structure"], entry["report"]), ("메모", DEBATE, structure, report)
+        )
+        self.assertIsNone(store.load(entry_id + 1))
+        self.assertEqual(store.find(kind="report", round=2)[0]["id"], entry_id)
+        with self.assertRaises(ValueError):
+            store.find(unknown=1)
+
+    def test_entries_from_before_the_columns_match_no_generator(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE corpus_entries ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE,"
+            " mode TEXT NOT NULL, topic TEXT NOT NULL, seed INTEGER NOT NULL, round INTEGER NOT NULL,"
+            " stance TEXT NOT NULL, note TEXT, debate TEXT, structure TEXT, report TEXT,"
+            " raw_bytes INTEGER NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO corpus_entries (key, mode, topic, seed, round, stance, debate, raw_bytes, created_at)"
+            " VALUES ('old', 'debate', 'AI 교사', 42, 1, '조건부', '[]', 0, 0)"
+        )
+        conn.commit()
+        conn.close()
+
+        store = self.open()
+        (old,) = store.find(topic="AI 교사")
+        self.assertEqual((old["mock"], old["rng_version"]), (None, None))
+        self.assertEqual(store.find(topic="AI 교사", mock=True), [])
+        self.assertEqual([topic for topic, _ in store.similar_topics("AI 교사")], ["AI 교사"])
+
+
+class DebateReuseTest(unittest.TestCase):
+    RECORDED = "원격근무를 기본 근무제로 전환해야 하는가"
+    ASKED = "원격근무를 기본 근무제로 전환해야 할까"
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        saved = (run.CORPUS_DB_PATH, run.REUSE_THRESHOLD, run.CORPUS_STORE)
+        self.addCleanup(self.restore, saved)
+        run.CORPUS_DB_PATH = os.path.join(directory.name, "corpus.sqlite3")
+        run.REUSE_THRESHOLD = 0.5
+        run.CORPUS_STORE = None
+
+    @staticmethod
+    def restore(saved: tuple) -> None:
+        if run.CORPUS_STORE is not None:
+            run.CORPUS_STORE.close()
+        run.CORPUS_DB_PATH, run.REUSE_THRESHOLD, run.CORPUS_STORE = saved
+
+    def debate(self, topic: str, rng_version: int = 2) -> dict:
+        payload = run.handle_request("debate", topic, 1, None, None, None, True, 42, rng_version=rng_version)
+        self.assertTrue(payload["ok"], payload)
+        return payload
+
+    def test_every_request_is_recorded(self) -> None:
+        first = self.debate(self.RECORDED)
+        self.assertEqual(first["meta"]["corpus"], {"id": 1, "new": True})
+        entry = run.open_corpus_store().load(1)
+        self.assertEqual((entry["mock"], entry["rng_version"], entry["debate"]), (True, 2, first["debate"]))
+
+    def test_near_duplicate_topic_reuses_the_recorded_debate(self) -> None:
+        recorded = self.debate(self.RECORDED)
+        reused = self.debate(self.ASKED)
+        self.assertEqual(reused["meta"]["reused_from"]["id"], recorded["meta"]["corpus"]["id"])
+        self.assertEqual(reused["meta"]["reused_from"]["topic"], self.RECORDED)
+        self.assertIn(f"'{self.ASKED}'", reused["debate"][0]["text"])
+        self.assertEqual(
+            [turn["text"].replace(f"'{self.ASKED}'", f"'{self.RECORDED}'") for turn in reused["debate"]],
+            [turn["text"] for turn in recorded["debate"]],
+        )
+
+    def test_reuse_needs_the_same_generator(self) -> None:
+        self.debate(self.RECORDED, rng_version=2)
+        self.assertNotIn("reused_from", self.debate(self.ASKED, rng_version=1)["meta"])
+        self.assertIsNone(run.find_reusable_debate(self.ASKED, 1, 42, None, False, 2))
+        self.assertIsNotNone(run.find_reusable_debate(self.ASKED, 1, 42, None, True, 2))
+
+    def test_only_quoted_topics_are_adapted(self) -> None:
+        self.assertEqual(run.adapt_turn_text("저는 'AI'에 찬성합니다.", "AI", "AI 교사"), "저는 'AI 교사'에 찬성합니다.")
+        self.assertEqual(run.adapt_turn_text("효율이 좋습니다.", "AI", "AI 교사"), "효율이 좋습니다.")
+        self.assertIsNone(run.adapt_turn_text("'AI'는 AIDS와 다릅니다.", "AI", "AI 교사"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""
+korean_text: sentence breaks on every terminator, abbreviations and decimals that never end a
+sentence, terminator-preserving normalization (what the report's user-stance lines show for a
+note with "?" or "!"), and span caching that lives only inside its own sentence_scope().
+Run from backend/: python -m unittest test_korean_text
+"""
+
+from __future__ import annotations
+
+import threading
+import unittest
+
+import run
+from korean_text import (
+    _SENTENCE_CACHE,
+    extract_keywords,
+    iter_spans,
+    sentence_scope,
+    sentence_spans,
+    split_sentences,
+    terminated_sentences,
+)
+
+
+class SplitTest(unittest.TestCase):
+    def test_every_terminator_ends_a_sentence(self) -> None:
+        for text, expected in (
+            ("좋다. 나쁘다.", ["좋다.", "나쁘다."]),
+            ("필요한가? 그렇다!", ["필요한가?", "그렇다!"]),
+            ("글쎄… 모르겠다", ["글쎄…", "모르겠다"]),
+            ("정말?! 아니다!! 그래...", ["정말?!", "아니다!!", "그래..."]),
+            ("좋다。 나쁘다？ 몰라！ 끝", ["좋다。", "나쁘다？", "몰라！", "끝"]),
+            ("그는 \"좋다.\" 그리고 떠났다.", ["그는 \"좋다.\"", "그리고 떠났다."]),
+            ("(참고용.) 다음 문장.", ["(참고용.)", "다음 문장."]),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(split_sentences(text), expected)
+
+    def test_a_break_needs_whitespace_and_a_sentence_start(self) -> None:
+        self.assertEqual(split_sentences("3.5배 빠르다. v1.2도 같다."), ["3.5배 빠르다.", "v1.2도 같다."])
+        self.assertEqual(split_sentences("끝났다. - 목록"), ["끝났다. - 목록"])
+        self.assertEqual(split_sentences("  \n "), [])
+        self.assertEqual(split_sentences("  한 문장  "), ["한 문장"])
+
+    def test_abbreviations_do_not_end_a_sentence(self) -> None:
+        for text, expected in (
+            ("Dr. Kim이 말했다. 맞다.", ["Dr. Kim이 말했다.", "맞다."]),
+            ("DR. Kim, prof. Lee 참석.", ["DR. Kim, prof. Lee 참석."]),
+            ("예시(e.g. 독서)가 있다. 끝.", ["예시(e.g. 독서)가 있다.", "끝."]),
+            ("A vs. B를 본다. 그리고 i.e. C도.", ["A vs. B를 본다.", "그리고 i.e. C도."]),
+            ("No. 5를 보라. Fig. 2도.", ["No. 5를 보라.", "Fig. 2도."]),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(split_sentences(text), expected)
+        # A word that merely ends like an abbreviation still ends its sentence.
+        self.assertEqual(split_sentences("그건 radio. 다음."), ["그건 radio.", "다음."])
+
+    def test_a_quotative_keeps_the_quote_in_its_sentence(self) -> None:
+        self.assertEqual(split_sentences("\"좋다.\" 라고 말했다. 끝."), ["\"좋다.\" 라고 말했다.", "끝."])
+        self.assertEqual(split_sentences("'왜?' 하고 물었다."), ["'왜?' 하고 물었다."])
+
+    def test_spans_are_offsets_into_the_text(self) -> None:
+        text = "  첫째다.  둘째다?\n셋째  "
+        spans = sentence_spans(text)
+        self.assertEqual([text[a:b] for a, b in spans], ["첫째다.", "둘째다?", "셋째"])
+        self.assertEqual(list(iter_spans(text)), list(spans))
+
+    def test_limit_stops_early(self) -> None:
+        self.assertEqual(split_sentences("하나. 둘. 셋.", limit=2), ["하나.", "둘."])
+        self.assertEqual(terminated_sentences("하나 . 둘.", limit=1), ["하나."])
+
+
+class TerminatedSentencesTest(unittest.TestCase):
+    def test_each_sentence_keeps_its_own_terminator(self) -> None:
+        for text, expected in (
+            ("됩니다.. 그렇다", ["됩니다.", "그렇다."]),
+            ("필요한가? 좋다! 글쎄…", ["필요한가?", "좋다!", "글쎄…"]),
+            ("이건 좋다... 아니다!! 정말?", ["이건 좋다.", "아니다!!", "정말?"]),
+            ("그는 '정말?' 그렇다", ["그는 '정말?'", "그렇다."]),
+            ("끝", ["끝."]),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(terminated_sentences(text), expected)
+
+    def test_normalize_sentences_3(self) -> None:
+        self.assertEqual(run.normalize_sentences_3("필요한가? 해보자!\n비용은"), "필요한가? 해보자! 비용은.")
+        self.assertEqual(
+            run.normalize_sentences_3("하나. 둘."), "하나. 둘. 다음 라운드에서 주장과 근거를 더 명확히 보완하십시오."
+        )
+
+    def test_user_stance_lines_for_a_question_note(self) -> None:
+        # The baseline split only on ".": these came out as "…협업은? 리듬이 깨질 수 있어요!." and "Dr.".
+        self.assertEqual(
+            run.summarize_text_lines("생산성은 오르지만 협업은? 리듬이 깨질 수 있어요!", 3),
+            ["생산성은 오르지만 협업은? 리듬이 깨질 수 있어요!", "생산성은 오르지만 협업은?", "리듬이 깨질 수 있어요!"],
+        )
+        self.assertEqual(
+            run.summarize_text_lines("Dr. Kim이 말했다. 3.5배 빠르다? 그렇다.", 3),
+            ["Dr. Kim이 말했다. 3.5배 빠르다? 그렇다.", "Dr. Kim이 말했다.", "3.5배 빠르다?"],
+        )
+
+
+class SentenceScopeTest(unittest.TestCase):
+    TEXT = "하나다. 둘이다."
+
+    def test_no_cache_outside_a_scope(self) -> None:
+        self.assertIsNone(_SENTENCE_CACHE.get())
+        self.assertIsNot(sentence_spans(self.TEXT), sentence_spans(self.TEXT))
+
+    def test_each_text_is_split_once_per_scope(self) -> None:
+        with sentence_scope():
+            first = sentence_spans(self.TEXT)
+            self.assertIs(sentence_spans(self.TEXT), first)
+            self.assertEqual(split_sentences(self.TEXT), ["하나다.", "둘이다."])
+            self.assertEqual(list(_SENTENCE_CACHE.get()), [self.TEXT])
+        self.assertIsNone(_SENTENCE_CACHE.get())
+
+    def test_limited_splits_do_not_fill_the_cache(self) -> None:
+        with sentence_scope():
+            split_sentences(self.TEXT, limit=1)
+            self.assertEqual(_SENTENCE_CACHE.get(), {})
+            cached = sentence_spans(self.TEXT)
+            self.assertEqual(split_sentences(self.TEXT, limit=1), ["하나다."])
+            self.assertIs(_SENTENCE_CACHE.get()[self.TEXT], cached)
+
+    def test_scopes_do_not_share_spans(self) -> None:
+        with sentence_scope():
+            outer = sentence_spans(self.TEXT)
+            with sentence_scope():
+                self.assertEqual(_SENTENCE_CACHE.get(), {})
+                inner = sentence_spans(self.TEXT)
+                self.assertIsNot(inner, outer)
+            self.assertIs(sentence_spans(self.TEXT), outer)
+
+    def test_threads_get_their_own_scope(self) -> None:
+        seen = {}
+        inside = threading.Barrier(2, timeout=5)
+
+        def request(name: str) -> None:
+            with sentence_scope():
+                sentence_spans(f"{name}의 문장이다. 끝.")
+                inside.wait()  # both scopes are open at once
+                seen[name] = sorted(_SENTENCE_CACHE.get())
+
+        threads = [threading.Thread(target=request, args=(name,)) for name in ("가", "나")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(seen, {"가": ["가의 문장이다. 끝."], "나": ["나의 문장이다. 끝."]})
+
+
+class KeywordsTest(unittest.TestCase):
+    def test_order_dedup_stopwords_and_limit(self) -> None:
+        text = "저는 AI 교사와 ai 교사를 봅니다"
+        self.assertEqual(extract_keywords(text), ["저는", "AI", "교사와", "ai", "교사를", "봅니다"])
+        self.assertEqual(extract_keywords(text, stopwords={"저는"}, fold_case=True, limit=3), ["AI", "교사와", "교사를"])
+        self.assertEqual(extract_keywords(text, max_len=2), ["저는", "AI", "ai"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+model_backend against a local StubModelServer: keep-alive reuse, the per-host connection limit,
+dropping a stale idle connection before sending, never re-sending a request that went out, and
+how failures map to ModelError / ModelUnavailable.
+Run from backend/: python -m unittest test_model_backend
+"""
+
+from __future__ import annotations
+
+import time
+import unittest
+
+from model_backend import HttpModelBackend, ModelBackend, ModelError, ModelUnavailable, StubModelServer
+
+
+class ModelBackendTest(unittest.TestCase):
+    def serve(self, responses: dict, **kwargs: float) -> StubModelServer:
+        stub = StubModelServer(responses, **kwargs).start()
+        self.addCleanup(stub.stop)
+        return stub
+
+    def backend(self, stub: StubModelServer, **kwargs: float) -> HttpModelBackend:
+        backend = HttpModelBackend(stub.url, **kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_sequential_calls_reuse_one_connection(self) -> None:
+        stub = self.serve({"pro": ["하나.", "둘."], "*": "기타."})
+        backend = self.backend(stub)
+        texts = [backend.complete(kind, "prompt", {}) for kind in ("pro", "pro", "con", "pro")]
+        self.assertEqual(texts, ["하나.", "둘.", "기타.", "하나."])
+        self.assertEqual(stub.connections, 1)
+        stats = backend.stats()
+        self.assertEqual((stats["requests"], stats["opened"], stats["reused"]), (4, 1, 3))
+        self.assertEqual(stats["reuse_ratio"], 0.75)
+
+    def test_concurrent_calls_stay_within_per_host_limit(self) -> None:
+        stub = self.serve({"*": "답."}, delay_ms=30)
+        backend = self.backend(stub, max_per_host=2)
+        calls = [("pro", f"prompt {i}", {}) for i in range(8)]
+        self.assertEqual(backend.complete_many(calls), ["답."] * 8)
+        self.assertLessEqual(stub.connections, 2)
+        self.assertEqual(backend.stats()["opened"], stub.connections)
+        self.assertLessEqual(backend.stats()["hosts"][stub.url.split("/")[2]]["open"], 2)
+
+    def test_stale_connection_is_dropped_before_sending(self) -> None:
+        # The first answer drops its connection without "Connection: close", so the pool keeps a
+        # dead socket; the next call must notice before sending, reconnect and succeed.
+        stub = self.serve({"pro": [{"text": "하나.", "close": True}, "둘."]})
+        backend = self.backend(stub)
+        self.assertEqual(backend.complete("pro", "prompt", {}), "하나.")
+        time.sleep(0.05)  # let the server's FIN arrive
+        self.assertEqual(backend.complete("pro", "prompt", {}), "둘.")
+        stats = backend.stats()
+        self.assertEqual((stats["dropped"], stats["errors"], stats["requests"]), (1, 0, 2))
+        self.assertEqual((stub.connections, stub.requests), (2, 2))
+
+    def test_a_sent_request_is_not_resent(self) -> None:
+        # The server reads the second request on the reused connection and hangs up unanswered:
+        # it may have acted on it, so the call fails instead of going out a second time.
+        stub = self.serve({"pro": ["하나.", {"drop": True}, "셋."]})
+        backend = self.backend(stub)
+        self.assertEqual(backend.complete("pro", "prompt", {}), "하나.")
+        with self.assertRaises(ModelUnavailable):
+            backend.complete("pro", "prompt", {})
+        self.assertEqual(stub.requests, 2)
+        self.assertEqual(backend.stats()["errors"], 1)
+        self.assertEqual(backend.complete("pro", "prompt", {}), "셋.")
+
+    def test_client_errors_are_model_errors(self) -> None:
+        stub = self.serve({"bad": {"status": 400}, "pro": "ok."})
+        backend = self.backend(stub)
+        for kind in ("bad", "unknown-kind"):
+            with self.subTest(kind=kind), self.assertRaises(ModelError) as caught:
+                backend.complete(kind, "prompt", {})
+            self.assertNotIsInstance(caught.exception, ModelUnavailable)
+            self.assertEqual((caught.exception.code, caught.exception.http_hint), ("MODEL_ERROR", 502))
+
+    def test_server_errors_and_timeouts_are_unavailable(self) -> None:
+        stub = self.serve({"busy": {"status": 429}, "down": {"status": 503}, "slow": {"text": "늦음.", "delay_ms": 500}})
+        backend = self.backend(stub, timeout=0.1)
+        for kind in ("busy", "down", "slow"):
+            with self.subTest(kind=kind), self.assertRaises(ModelUnavailable) as caught:
+                backend.complete(kind, "prompt", {})
+            self.assertEqual((caught.exception.code, caught.exception.http_hint), ("MODEL_UNAVAILABLE", 503))
+
+    def test_unreachable_server_is_unavailable(self) -> None:
+        stub = self.serve({"*": "답."})
+        url = stub.url
+        stub.stop()
+        backend = HttpModelBackend(url, timeout=0.5)
+        with self.assertRaises(ModelUnavailable):
+            backend.complete("pro", "prompt", {})
+
+    def test_model_backend_is_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            ModelBackend()  # type: ignore[abstract]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+Partial regeneration through run.handle_request: the named turn or section changes, every other
+turn and section comes back byte-for-byte, and repeating a request within a session draws a new
+variant each time.
+Run from backend/: python -m unittest test_regeneration
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from typing import Any, Dict
+
+import run
+from regeneration import parse_regenerate, split_report
+
+TOPIC = "원격근무를 기본 근무제로 전환해야 하는가"
+NOTE = "생산성은 오르지만 협업 리듬이 깨질 수 있어서 조건부 도입이 필요해요"
+
+
+class RegenerationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        saved = (run.SESSION_DB_PATH, run.SESSION_STORE)
+        self.addCleanup(self.restore, saved)
+        run.SESSION_DB_PATH = os.path.join(directory.name, "sessions.sqlite3")
+        run.SESSION_STORE = None
+
+    @staticmethod
+    def restore(saved: tuple) -> None:
+        if run.SESSION_STORE is not None:
+            run.SESSION_STORE.close()
+        run.SESSION_DB_PATH, run.SESSION_STORE = saved
+
+    def request(self, mode: str, **kwargs: Any) -> Dict[str, Any]:
+        payload = run.handle_request(mode, kwargs.pop("topic", None), None, None, None, None, True, None, **kwargs)
+        self.assertTrue(payload["ok"], payload)
+        return payload
+
+    def full_session(self) -> Dict[str, Any]:
+        return run.handle_request("full", TOPIC, None, NOTE, None, None, True, 42, session_id="s", rng_version=2)
+
+    def test_regenerated_turn_changes_and_the_rest_is_kept(self) -> None:
+        previous = self.full_session()
+        for variant in (1, 2, 3):
+            with self.subTest(variant=variant):
+                current = self.request("full", session_id="s", regenerate={"turn": 3})
+                self.assertEqual(current["meta"]["regenerated"]["variant"], variant)
+                self.assertEqual(current["meta"]["regenerated"]["turns"], [3])
+                self.assertNotEqual(current["debate"][3], previous["debate"][3])
+                self.assertEqual(current["debate"][:3], previous["debate"][:3])
+                self.assertEqual(current["structure"], previous["structure"])
+                self.assertEqual(current["report"], previous["report"])
+                previous = current
+
+    def test_regenerated_section_changes_and_the_rest_is_kept(self) -> None:
+        original = self.full_session()
+        regenerated = self.request("report", session_id="s", regenerate={"report_sections": ["5"]})
+        self.assertEqual(regenerated["meta"]["regenerated"]["report_sections"], ["5"])
+        before_preamble, before = split_report(original["report"])
+        after_preamble, after = split_report(regenerated["report"])
+        self.assertEqual(after_preamble, before_preamble)
+        self.assertNotEqual(after["5"], before["5"])
+        self.assertEqual({n: after[n] for n in "1234"}, {n: before[n] for n in "1234"})
+
+    def test_an_explicit_variant_is_reproducible(self) -> None:
+        self.full_session()
+        first = self.request("full", session_id="s", regenerate={"turn": 1, "variant": 4})
+        second = self.request("full", session_id="s", regenerate={"turn": 1, "variant": 4})
+        self.assertEqual(second["debate"], first["debate"])
+        # The next implicit variant moves past the last one used.
+        third = self.request("full", session_id="s", regenerate={"turn": 1})
+        self.assertEqual(third["meta"]["regenerated"]["variant"], 5)
+
+    def test_without_a_session_the_variant_defaults_to_one(self) -> None:
+        debate = self.full_session()["debate"]
+        payload = run.handle_request(
+            "debate", TOPIC, 1, NOTE, debate, None, True, 42, rng_version=2, regenerate={"turn": 3}
+        )
+        self.assertEqual(payload["meta"]["regenerated"]["variant"], 1)
+        self.assertEqual(payload["debate"][:3], debate[:3])
+
+    def test_parse_regenerate_rejects_bad_options(self) -> None:
+        self.assertEqual(parse_regenerate({"turn": 3}, "debate", 4, default_variant=7).variant, 7)
+        for value, mode in (
+            ([], "debate"),
+            ({"turn": 4}, "debate"),
+            ({"turn": True}, "debate"),
+            ({"turn": 1}, "report"),
+            ({"report_sections": ["6"]}, "report"),
+            ({"report_sections": ["1"]}, "debate"),
+            ({"variant": 0}, "debate"),
+            ({"other": 1}, "debate"),
+            ({}, "structure"),
+        ):
+            with self.subTest(value=value, mode=mode), self.assertRaises(ValueError):
+                parse_regenerate(value, mode, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""
+result_cache: the cache key, LRU eviction in both tiers, disk-tier hits, a forked process
+opening its own sqlite connection, and SingleFlight coalescing (only --serve --socket turns it on).
+Run from backend/: python -m unittest test_result_cache
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from result_cache import DiskTier, ResultCache, SingleFlight, canonical_key
+from run import engine_cache_key
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REQUEST = {"mode": "debate", "topic": "AI 교사", "mock": True}
+
+
+def payload(n: int) -> dict:
+    return {"ok": True, "n": n, "text": "가" * 40}
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_key_order_does_not_matter(self) -> None:
+        self.assertEqual(canonical_key({"a": 1, "b": [1, 2]}), canonical_key({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(canonical_key({"a": 1}), canonical_key({"a": 2}))
+
+    def test_engine_key_leaves_out_what_the_mode_ignores(self) -> None:
+        debate = [{"role": "pro", "text": "찬성."}]
+        base = engine_cache_key("debate", "AI", 1, " 메모 ", None, None, 42)
+        self.assertEqual(base, engine_cache_key("debate", "AI", 1, "메모", debate, {"claim": "x"}, 42))
+        self.assertEqual(base, engine_cache_key("debate", "AI", 1, "메모", None, None, 42, rng_version=1))
+        self.assertNotEqual(base, engine_cache_key("debate", "AI", 1, "메모", None, None, 42, rng_version=2))
+        self.assertNotEqual(base, engine_cache_key("debate", "AI", 1, "메모", None, None, 7))
+        self.assertNotEqual(
+            engine_cache_key("structure", "AI", 1, None, debate, None, 42),
+            engine_cache_key("structure", "AI", 1, None, debate + debate, None, 42),
+        )
+
+
+class ResultCacheTest(unittest.TestCase):
+    def db_path(self) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return os.path.join(directory.name, "cache.sqlite3")
+
+    def test_memory_tier_evicts_least_recently_used(self) -> None:
+        cache = ResultCache(max_entries=2)
+        cache.put("a", payload(1))
+        cache.put("b", payload(2))
+        self.assertEqual(cache.get("a"), payload(1))
+        cache.put("c", payload(3))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get("a"), cache.get("c")], [payload(1), payload(3)])
+        self.assertEqual(cache.stats(), {"hits": 3, "misses": 1})
+
+    def test_get_returns_a_fresh_copy(self) -> None:
+        cache = ResultCache(max_entries=2)
+        cache.put("a", payload(1))
+        cache.get("a")["n"] = 99
+        self.assertEqual(cache.get("a"), payload(1))
+
+    def test_disk_tier_serves_what_memory_evicted(self) -> None:
+        path = self.db_path()
+        cache = ResultCache(max_entries=1, disk_path=path)
+        self.addCleanup(cache._disk.close)
+        cache.put("a", payload(1))
+        cache.put("b", payload(2))
+        self.assertEqual(cache.get("a"), payload(1))
+        # A new process (here: a new cache over the same file) starts with an empty memory tier.
+        fresh = ResultCache(max_entries=0, disk_path=path)
+        self.addCleanup(fresh._disk.close)
+        self.assertEqual((fresh.get("b"), fresh.get("missing")), (payload(2), None))
+        self.assertEqual(fresh.stats(), {"hits": 1, "misses": 1})
+
+    def test_disk_tier_evicts_least_recently_used_beyond_budget(self) -> None:
+        value = "x" * 100
+        tier = DiskTier(self.db_path(), max_bytes=250)
+        self.addCleanup(tier.close)
+        tier.put("a", value)
+        time.sleep(0.01)
+        tier.put("b", value)
+        time.sleep(0.01)
+        self.assertEqual(tier.get("a"), value)
+        time.sleep(0.01)
+        tier.put("c", value)
+        self.assertEqual([tier.get(k) for k in ("a", "b", "c")], [value, None, value])
+        total = tier._connection().execute("SELECT SUM(size) FROM results").fetchone()[0]
+        self.assertLessEqual(total, 250)
+
+    def test_eviction_sees_other_writers(self) -> None:
+        path = self.db_path()
+        first, second = DiskTier(path, max_bytes=250), DiskTier(path, max_bytes=250)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        for tier, key in ((first, "a"), (second, "b"), (first, "c"), (first, "d")):
+            tier.put(key, "x" * 100)
+            time.sleep(0.01)
+        # first's own tally crossed the budget at "d"; the re-sum also counts second's "b".
+        self.assertEqual([first.get(k) is not None for k in "abcd"], [False, False, True, True])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_child_opens_its_own_connection(self) -> None:
+        tier = DiskTier(self.db_path(), max_bytes=1 << 20)
+        self.addCleanup(tier.close)
+        tier.put("parent", "p")
+        parent_conn = tier._connection()
+        pid = os.fork()
+        if pid == 0:
+            ok = tier._connection() is not parent_conn and tier.get("parent") == "p"
+            tier.put("child", "c")
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(tier._connection(), parent_conn)
+        self.assertEqual(tier.get("child"), "c")
+
+
+class SingleFlightTest(unittest.TestCase):
+    def run_concurrently(self, flight: SingleFlight, compute, callers: int) -> list:
+        results: list = [None] * callers
+
+        def call(i: int) -> None:
+            try:
+                results[i] = flight.run("key", compute)
+            except Exception as ex:  # noqa: BLE001
+                results[i] = ex
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_callers_share_one_computation(self) -> None:
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute() -> dict:
+            calls.append(1)
+            release.wait(5)
+            return {"ok": True, "meta": {}}
+
+        threading.Timer(0.2, release.set).start()
+        results = self.run_concurrently(flight, compute, 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertEqual(flight.stats(), {"leaders": 1, "coalesced": 4, "in_flight": 0})
+        payloads = [payload for payload, _ in results]
+        self.assertTrue(all(p == {"ok": True, "meta": {}} for p in payloads))
+        self.assertEqual(len({id(p) for p in payloads}), 5)  # every caller gets its own copy
+
+    def test_waiters_get_the_leaders_exception(self) -> None:
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def compute() -> dict:
+            release.wait(5)
+            raise ValueError("bad input")
+
+        threading.Timer(0.2, release.set).start()
+        results = self.run_concurrently(flight, compute, 3)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_finished_computations_are_not_shared(self) -> None:
+        flight = SingleFlight()
+        self.assertEqual(flight.run("key", lambda: {"n": 1}), ({"n": 1}, False))
+        self.assertEqual(flight.run("key", lambda: {"n": 2}), ({"n": 2}, False))
+
+
+class InflightModeTest(unittest.TestCase):
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+    def test_only_socket_serving_coalesces(self) -> None:
+        line = json.dumps(REQUEST) + "\n"
+        stdin_serve = subprocess.run(
+            [sys.executable, "run.py", "--serve"], cwd=BACKEND_DIR, input=line, capture_output=True, text=True, check=True
+        )
+        self.assertNotIn("inflight", json.loads(stdin_serve.stdout)["meta"])
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "engine.sock")
+        cmd = [sys.executable, "run.py", "--serve", "--socket", path]
+        server = subprocess.Popen(cmd, cwd=BACKEND_DIR, stderr=subprocess.DEVNULL)
+        self.addCleanup(server.wait)
+        self.addCleanup(server.kill)
+        deadline = time.time() + 10
+        while not os.path.exists(path) and time.time() < deadline:
+            time.sleep(0.02)
+        with socket.socket(socket.AF_UNIX) as conn:
+            conn.connect(path)
+            conn.sendall(line.encode("utf-8"))
+            reply = conn.makefile("r", encoding="utf-8").readline()
+        self.assertEqual(json.loads(reply)["meta"]["inflight"]["shared"], False)
+
+
+if __name__ == "__main__":
+    unittest.main()
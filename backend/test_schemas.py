@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+
+"""
+schemas: the generated validators report every violation with its path, and accept and reject
+the same documents as the hand-written validators they replaced (reference copies below, taken
+from the baseline backend/run.py and .agents/thinkgym-mini/run.py).
+Run from backend/: python -m unittest test_schemas
+"""
+
+from __future__ import annotations
+
+import copy
+import unittest
+from typing import Any, Callable, Dict, List
+
+from korean_text import split_sentences
+from schemas import (
+    DEBATE,
+    REPORT,
+    STRUCTURE,
+    STRUCTURE_AGENT,
+    STRUCTURE_SHORT_NOTE,
+    CompiledSchema,
+    SchemaError,
+    extend,
+)
+
+SHORT_NOTE_THRESHOLD = 20
+STRUCTURE_KEYS = ["claim", "reasons", "assumptions", "counterpoints", "missing_info", "next_revision"]
+REPORT_HEADERS = [
+    "# 📝 ThinkGym 세션 리포트",
+    "## 1. 오늘의 질문",
+    "## 2. 찬반 핵심 요약",
+    "## 3. 사용자의 입장",
+    "## 4. 논리 구조 개선 포인트",
+    "## 5. 다음 라운드 추천 질문",
+]
+
+
+# --- Reference validators (baseline behavior; only the checks, not the backend's normalization) ---
+
+
+def old_validate_debate(debate: List[Dict[str, Any]]) -> None:
+    if not isinstance(debate, list) or len(debate) != 4:
+        raise ValueError("debate must be a list of exactly 4 turns")
+    for i, turn in enumerate(debate):
+        if "role" not in turn or "text" not in turn:
+            raise ValueError(f"debate[{i}] must have role and text")
+        if turn["role"] not in ("pro", "con"):
+            raise ValueError(f"debate[{i}].role must be 'pro' or 'con'")
+        if not isinstance(turn["text"], str) or not turn["text"].strip():
+            raise ValueError(f"debate[{i}].text must be a non-empty string")
+
+
+def old_validate_structure(structure: Dict[str, Any]) -> None:
+    for key in STRUCTURE_KEYS:
+        if key not in structure:
+            raise ValueError(f"structure missing key: {key}")
+    for arr_key in ["reasons", "assumptions", "counterpoints", "missing_info"]:
+        if not isinstance(structure[arr_key], list):
+            raise ValueError(f"structure.{arr_key} must be a list")
+    if not isinstance(structure["next_revision"], str):
+        raise ValueError("structure.next_revision must be a string")
+
+
+def old_validate_structure_json(data: Dict[str, Any], user_note: str) -> None:
+    if list(data.keys()) != STRUCTURE_KEYS:
+        raise ValueError("Structure JSON 키 순서/구조가 스키마와 다릅니다.")
+    for key in ["reasons", "assumptions", "counterpoints", "missing_info"]:
+        if not isinstance(data[key], list):
+            raise ValueError(f"{key}는 배열이어야 합니다.")
+    if not isinstance(data["claim"], str) or not isinstance(data["next_revision"], str):
+        raise ValueError("claim/next_revision은 문자열이어야 합니다.")
+    if len(user_note.strip()) < SHORT_NOTE_THRESHOLD:
+        if data != SHORT_NOTE_ANSWER:
+            raise ValueError("짧은 user_note 규칙 불일치")
+    else:
+        for key, low, high in (("reasons", 2, 3), ("assumptions", 1, 2), ("counterpoints", 1, 2), ("missing_info", 1, 2)):
+            if not low <= len(data[key]) <= high:
+                raise ValueError(f"{key}는 {low}~{high}개여야 합니다.")
+        if len(split_sentences(data["next_revision"])) != 3:
+            raise ValueError("next_revision은 정확히 3문장이어야 합니다.")
+
+
+def old_extract_section(report: str, section_title: str, next_section_title: str) -> str:
+    start = report.find(section_title)
+    if start < 0:
+        return ""
+    if not next_section_title:
+        return report[start + len(section_title):].strip()
+    end = report.find(next_section_title, start + len(section_title))
+    if end < 0:
+        return report[start + len(section_title):].strip()
+    return report[start + len(section_title):end].strip()
+
+
+def old_validate_summary_report(report: str) -> None:
+    for header in REPORT_HEADERS:
+        if header not in report:
+            raise ValueError(f"Summary 리포트 헤더 누락: {header}")
+    user_section = old_extract_section(report, REPORT_HEADERS[3], REPORT_HEADERS[4])
+    if len([line for line in user_section.splitlines() if line.strip()]) != 3:
+        raise ValueError("사용자의 입장 섹션은 정확히 3줄이어야 합니다.")
+    improve_section = old_extract_section(report, REPORT_HEADERS[4], REPORT_HEADERS[5])
+    if len([line for line in improve_section.splitlines() if line.strip().startswith("-")]) != 3:
+        raise ValueError("논리 구조 개선 포인트는 정확히 3개여야 합니다.")
+    next_section = old_extract_section(report, REPORT_HEADERS[5], "")
+    if len([line for line in next_section.splitlines() if line.strip()]) != 1:
+        raise ValueError("다음 라운드 추천 질문은 정확히 1줄이어야 합니다.")
+
+
+# --- Documents ---
+
+TURN = {"role": "pro", "text": "저는 찬성합니다."}
+DEBATE_OK = [TURN, {"role": "con", "text": "반대합니다."}, TURN, {"role": "con", "text": "보류합니다."}]
+
+STRUCTURE_OK = {
+    "claim": "원격근무는 조건부로 도입해야 한다.",
+    "reasons": ["생산성이 오른다", "통근 시간이 준다"],
+    "assumptions": ["업무가 문서화되어 있다"],
+    "counterpoints": ["협업 리듬이 깨질 수 있다"],
+    "missing_info": ["팀별 성과 데이터"],
+    "next_revision": "첫째 문장입니다. 둘째 문장입니다. 셋째 문장입니다.",
+}
+
+SHORT_NOTE_ANSWER = {
+    "claim": "입장이 아직 명확히 정리되지 않았습니다.",
+    "reasons": [],
+    "assumptions": [],
+    "counterpoints": [],
+    "missing_info": ["주장을 1문장으로 명확히 작성하세요", "근거를 최소 2개 제시하세요"],
+    "next_revision": (
+        "주장을 1문장으로 정리하십시오. 그 주장을 뒷받침하는 근거 2가지를 추가하십시오. "
+        "반대 의견에 대한 대비를 포함하십시오."
+    ),
+}
+
+REPORT_OK = "\n".join(
+    [
+        REPORT_HEADERS[0],
+        "",
+        REPORT_HEADERS[1],
+        "원격근무를 기본으로 할까?",
+        REPORT_HEADERS[2],
+        "- 찬성: 효율",
+        "- 반대: 협업",
+        REPORT_HEADERS[3],
+        "주장: 조건부 도입",
+        "근거: 생산성",
+        "보완: 협업 규칙",
+        REPORT_HEADERS[4],
+        "- 근거를 늘린다",
+        "- 가정을 검증한다",
+        "- 반론에 대비한다",
+        REPORT_HEADERS[5],
+        "협업 규칙은 누가 정할까?",
+    ]
+)
+
+
+def with_changes(document: Dict[str, Any], **changes: Any) -> Dict[str, Any]:
+    out = copy.deepcopy(document)
+    for key, value in changes.items():
+        if value is KeyError:
+            del out[key]
+        else:
+            out[key] = value
+    return out
+
+
+def reordered(document: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(reversed(list(document.items())))
+
+
+def debate_cases() -> List[Any]:
+    return [
+        DEBATE_OK,
+        DEBATE_OK[:3],
+        DEBATE_OK + [TURN],
+        {"turns": DEBATE_OK},
+        [TURN, TURN, TURN, {"role": "con"}],
+        [TURN, TURN, {"text": "역할 없음."}, TURN],
+        [TURN, {"role": "judge", "text": "판정."}, TURN, TURN],
+        [TURN, TURN, TURN, {"role": "con", "text": "  "}],
+        [TURN, TURN, TURN, {"role": "con", "text": 3}],
+        [{"role": "con", "text": "순서는 자유입니다."}, TURN, TURN, TURN],
+    ]
+
+
+def structure_cases() -> List[Dict[str, Any]]:
+    return [
+        STRUCTURE_OK,
+        reordered(STRUCTURE_OK),
+        with_changes(STRUCTURE_OK, reasons=KeyError),
+        with_changes(STRUCTURE_OK, next_revision=KeyError),
+        with_changes(STRUCTURE_OK, reasons="하나의 근거"),
+        with_changes(STRUCTURE_OK, missing_info={"a": 1}),
+        with_changes(STRUCTURE_OK, next_revision=3),
+        with_changes(STRUCTURE_OK, reasons=["하나"]),
+        with_changes(STRUCTURE_OK, reasons=["하나", "둘", "셋", "넷"]),
+        with_changes(STRUCTURE_OK, assumptions=[]),
+        with_changes(STRUCTURE_OK, counterpoints=["하나", "둘", "셋"]),
+        with_changes(STRUCTURE_OK, missing_info=[]),
+        with_changes(STRUCTURE_OK, next_revision="한 문장입니다. 두 문장입니다."),
+        with_changes(STRUCTURE_OK, next_revision="하나입니다. 둘입니다. 셋입니다. 넷입니다."),
+        with_changes(STRUCTURE_OK, claim=None),
+        with_changes(STRUCTURE_OK, extra="추가 키"),
+    ]
+
+
+def short_note_cases() -> List[Dict[str, Any]]:
+    return [
+        SHORT_NOTE_ANSWER,
+        reordered(SHORT_NOTE_ANSWER),
+        with_changes(SHORT_NOTE_ANSWER, claim="다른 주장."),
+        with_changes(SHORT_NOTE_ANSWER, reasons=["근거"]),
+        with_changes(SHORT_NOTE_ANSWER, missing_info=["주장을 1문장으로 명확히 작성하세요"]),
+        with_changes(SHORT_NOTE_ANSWER, next_revision="주장을 정리하십시오."),
+        STRUCTURE_OK,
+    ]
+
+
+def report_cases() -> List[str]:
+    lines = REPORT_OK.split("\n")
+    return [
+        REPORT_OK,
+        REPORT_OK.replace(REPORT_HEADERS[2], "## 2. 요약"),
+        REPORT_OK.replace(REPORT_HEADERS[0], ""),
+        REPORT_OK.replace("보완: 협업 규칙\n", ""),
+        REPORT_OK.replace("보완: 협업 규칙", "보완: 협업 규칙\n추가 줄"),
+        REPORT_OK.replace("- 반론에 대비한다", "반론에 대비한다"),
+        REPORT_OK.replace("- 반론에 대비한다", "- 반론에 대비한다\n- 하나 더"),
+        REPORT_OK + "\n두 번째 질문?",
+        REPORT_OK + "\n\n",
+        "\n".join(lines[:-1]),
+        "\n".join(lines[7:] + lines[:7]),
+        REPORT_OK.replace("근거: 생산성", REPORT_HEADERS[3]),
+        REPORT_OK.replace("- 가정을 검증한다", "- 가정을 검증한다\n" + REPORT_HEADERS[1]),
+    ]
+
+
+CLAIM_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"claim": {"type": "string"}},
+    "required": ["claim"],
+}
+
+
+class ViolationsTest(unittest.TestCase):
+    def test_valid_documents_have_no_violations(self) -> None:
+        self.assertEqual(DEBATE.violations(DEBATE_OK), [])
+        self.assertEqual(STRUCTURE_AGENT.violations(STRUCTURE_OK), [])
+        self.assertEqual(STRUCTURE_SHORT_NOTE.violations(SHORT_NOTE_ANSWER), [])
+        self.assertEqual(REPORT.violations(REPORT_OK), [])
+        DEBATE.validate(DEBATE_OK)
+
+    def test_every_violation_is_collected_with_its_path(self) -> None:
+        debate = [TURN, {"role": "judge", "text": ""}, {"text": "역할 없음."}]
+        self.assertEqual(
+            DEBATE.violations(debate),
+            [
+                ("debate", "must have exactly 4 items, got 3"),
+                ("debate[1].role", "must be one of ['pro', 'con']"),
+                ("debate[1].text", "must be a non-empty string"),
+                ("debate[2].role", "is required"),
+            ],
+        )
+
+    def test_nested_paths_in_lists(self) -> None:
+        structure = with_changes(STRUCTURE_OK, reasons=["하나", "둘\n셋", 4], claim="줄\r바꿈")
+        self.assertEqual(
+            STRUCTURE_AGENT.violations(structure),
+            [
+                ("structure.claim", "must not contain line breaks"),
+                ("structure.reasons[1]", "must not contain line breaks"),
+                ("structure.reasons[2]", "must be a string"),
+            ],
+        )
+
+    def test_wrong_type_stops_descent(self) -> None:
+        self.assertEqual(DEBATE.violations("debate"), [("debate", "must be a list")])
+        self.assertEqual(STRUCTURE.violations([]), [("structure", "must be an object")])
+        self.assertEqual(
+            STRUCTURE.violations(with_changes(STRUCTURE_OK, reasons="하나")), [("structure.reasons", "must be a list")]
+        )
+
+    def test_key_order_and_counts(self) -> None:
+        violations = STRUCTURE_AGENT.violations(with_changes(reordered(STRUCTURE_OK), next_revision="하나입니다."))
+        self.assertEqual(
+            violations,
+            [
+                ("structure", f"keys must be exactly {STRUCTURE_KEYS} in this order"),
+                ("structure.next_revision", "must have exactly 3 sentences, got 1"),
+            ],
+        )
+        # Missing keys are reported as such, not as an ordering problem.
+        self.assertEqual(
+            STRUCTURE_AGENT.violations(with_changes(STRUCTURE_OK, claim=KeyError)), [("structure.claim", "is required")]
+        )
+
+    def test_report_sections(self) -> None:
+        report = REPORT_OK.replace(REPORT_HEADERS[1], "").replace("- 반론에 대비한다", "")
+        self.assertEqual(
+            REPORT.violations(report),
+            [
+                ("report", f"missing header {REPORT_HEADERS[1]!r}"),
+                (f"report[{REPORT_HEADERS[4]!r}]", "must have exactly 3 '-' lines, got 2"),
+            ],
+        )
+
+    def test_schema_error_carries_the_violations(self) -> None:
+        with self.assertRaises(SchemaError) as caught:
+            DEBATE.validate([], "bad debate")
+        self.assertIsInstance(caught.exception, ValueError)
+        self.assertEqual(caught.exception.violations, [("debate", "must have exactly 4 items, got 0")])
+        self.assertEqual(str(caught.exception), "bad debate: debate: must have exactly 4 items, got 0")
+
+    def test_compiles_once_on_first_use(self) -> None:
+        schema = CompiledSchema(extend(CLAIM_SCHEMA, claim={"non_empty": True}), "s")
+        self.assertIsNone(schema._check)
+        self.assertEqual(schema.violations({"claim": " "}), [("s.claim", "must be a non-empty string")])
+        check = schema._check
+        schema.violations({"claim": "ok"})
+        self.assertIs(schema._check, check)
+        self.assertTrue(schema.source.startswith("def validate(value, path, errors):"))
+
+
+class AgreesWithOldValidatorsTest(unittest.TestCase):
+    def assert_agree(self, old: Callable[[Any], None], new: CompiledSchema, cases: List[Any]) -> None:
+        accepted = 0
+        for i, case in enumerate(cases):
+            with self.subTest(case=i):
+                try:
+                    old(copy.deepcopy(case))
+                    old_ok = True
+                except ValueError:
+                    old_ok = False
+                self.assertEqual(new.violations(case) == [], old_ok, new.violations(case))
+                accepted += old_ok
+        self.assertTrue(0 < accepted < len(cases))  # both outcomes are exercised
+
+    def test_debate(self) -> None:
+        self.assert_agree(old_validate_debate, DEBATE, debate_cases())
+
+    def test_backend_structure(self) -> None:
+        # claim=None is the one deliberate difference: the shared schema also types claim.
+        cases = [case for case in structure_cases() if case.get("claim", "") is not None]
+        self.assert_agree(old_validate_structure, STRUCTURE, cases)
+        self.assertNotEqual(STRUCTURE.violations(with_changes(STRUCTURE_OK, claim=None)), [])
+
+    def test_agent_structure(self) -> None:
+        note = "생산성은 오르지만 협업 리듬이 깨질 수 있어서 조건부 도입이 필요해요"
+        self.assert_agree(lambda data: old_validate_structure_json(data, note), STRUCTURE_AGENT, structure_cases())
+
+    def test_short_note_structure(self) -> None:
+        self.assert_agree(
+            lambda data: old_validate_structure_json(data, "짧음"), STRUCTURE_SHORT_NOTE, short_note_cases()
+        )
+
+    def test_report(self) -> None:
+        self.assert_agree(old_validate_summary_report, REPORT, report_cases())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+session_store and run.py sessions: the event log round trip, the engine tag (and its inference
+for older logs), refusing another engine's session, and structure/report requests that carry only
+a session id, or a session id plus inputs that override the logged ones.
+Run from backend/: python -m unittest test_session_store
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from typing import Any, Dict
+
+import run
+from session_store import SessionStore
+
+TOPIC = "원격근무를 기본 근무제로 전환해야 하는가"
+NOTE = "생산성은 오르지만 협업 리듬이 깨질 수 있어서 조건부 도입이 필요해요"
+
+
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "sessions.sqlite3")
+
+    def open(self) -> SessionStore:
+        store = SessionStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_log_round_trip(self) -> None:
+        store = self.open()
+        self.assertIsNone(store.load("s"))
+        opened = {"topic": TOPIC, "seed": 7, "rng_version": 2, "engine": "backend"}
+        self.assertEqual(store.append("s", [(0, "session", opened), (1, "note", "첫 메모")]), 2)
+        self.assertEqual(store.append("s", [(1, "note", "고친 메모"), (2, "debate", [{"role": "pro", "text": "찬성."}])]), 4)
+        store.append("other", [(0, "session", opened)])
+
+        state = self.open().load("s")  # a second connection sees the same log
+        self.assertEqual((state.topic, state.seed, state.rng_version, state.engine), (TOPIC, 7, 2, "backend"))
+        self.assertEqual((state.events, state.last_round), (4, 2))
+        self.assertEqual(state.get(1, "note"), "고친 메모")  # later events win
+        self.assertEqual(state.get(2, "debate"), [{"role": "pro", "text": "찬성."}])
+        self.assertIsNone(state.get(3, "note"))
+
+    def test_unknown_kinds_are_rejected_without_writing(self) -> None:
+        store = self.open()
+        with self.assertRaises(ValueError):
+            store.append("s", [(1, "note", "메모"), (1, "unknown", {})])
+        self.assertIsNone(store.load("s"))
+
+    def test_engine_of_older_logs_is_inferred(self) -> None:
+        store = self.open()
+        store.append("backend", [(0, "session", {"topic": TOPIC, "seed": 42})])
+        store.append("mini", [(0, "session", {"topic": TOPIC})])
+        backend, mini = store.load("backend"), store.load("mini")
+        self.assertEqual((backend.engine, backend.rng_version), ("backend", 1))
+        self.assertEqual((mini.engine, mini.rng_version), ("thinkgym-mini", 1))
+
+
+class RunSessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        saved = (run.SESSION_DB_PATH, run.SESSION_STORE)
+        self.addCleanup(self.restore, saved)
+        run.SESSION_DB_PATH = os.path.join(directory.name, "sessions.sqlite3")
+        run.SESSION_STORE = None
+
+    @staticmethod
+    def restore(saved: tuple) -> None:
+        if run.SESSION_STORE is not None:
+            run.SESSION_STORE.close()
+        run.SESSION_DB_PATH, run.SESSION_STORE = saved
+
+    def request(self, mode: str, topic: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        note, debate, structure = kwargs.pop("user_note", None), kwargs.pop("debate", None), kwargs.pop("structure", None)
+        return run.handle_request(mode, topic, None, note, debate, structure, True, kwargs.pop("seed", None), **kwargs)
+
+    def test_a_new_session_is_tagged_with_this_engine(self) -> None:
+        payload = self.request("debate", TOPIC, user_note=NOTE, seed=3, session_id="s")
+        self.assertTrue(payload["ok"], payload)
+        self.assertEqual(payload["meta"]["session"]["round"], 1)
+        state = run.open_session_store().load("s")
+        self.assertEqual((state.engine, state.seed, state.topic), ("backend", 3, TOPIC))
+        self.assertEqual((state.get(1, "note"), state.get(1, "debate")), (NOTE, payload["debate"]))
+
+    def test_another_engines_session_is_refused(self) -> None:
+        run.open_session_store().append("mini", [(0, "session", {"topic": TOPIC, "engine": "thinkgym-mini"})])
+        payload = self.request("structure", session_id="mini")
+        self.assertFalse(payload["ok"])
+        self.assertEqual((payload["error"]["code"], payload["error"]["http_hint"]), ("INVALID_INPUT", 409))
+        self.assertEqual(run.open_session_store().load("mini").events, 1)  # nothing was appended
+
+    def test_structure_and_report_from_the_session_alone(self) -> None:
+        debate = self.request("debate", TOPIC, user_note=NOTE, seed=3, session_id="s")["debate"]
+        structure = self.request("structure", session_id="s")
+        explicit = self.request("structure", TOPIC, user_note=NOTE, debate=debate, seed=3)
+        self.assertTrue(structure["ok"], structure)
+        self.assertEqual(structure["structure"], explicit["structure"])
+
+        report = self.request("report", session_id="s")
+        explicit = self.request("report", TOPIC, user_note=NOTE, debate=debate, structure=structure["structure"], seed=3)
+        self.assertEqual(report["report"], explicit["report"])
+        state = run.open_session_store().load("s")
+        self.assertEqual((state.get(1, "structure"), state.get(1, "report")), (structure["structure"], report["report"]))
+
+    def test_sent_inputs_override_the_logged_ones(self) -> None:
+        debate = self.request("debate", TOPIC, user_note=NOTE, seed=3, session_id="s")["debate"]
+        revised = "원격근무는 팀별로 선택하게 해야 합니다. 협업 규칙이 먼저입니다. 성과 지표도 필요합니다."
+        structure = self.request("structure", user_note=revised, session_id="s")
+        explicit = self.request("structure", TOPIC, user_note=revised, debate=debate, seed=3)
+        self.assertEqual(structure["structure"], explicit["structure"])
+        self.assertEqual(run.open_session_store().load("s").get(1, "note"), revised)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Near-duplicate topic detection without an embedding service.
+- shingles: character bigrams of the topic's keywords ("AI 교사를 도입해야 할까?" and
+  "AI 교사 도입해야 하는가?" share most of theirs even though no keyword matches exactly)
+- signature: MinHash over the shingles (NUM_PERM seeded universal hashes)
+- band_keys: LSH buckets (BANDS bands of ROWS rows); topics sharing a bucket are candidates,
+  and candidates are confirmed with the exact Jaccard similarity of their shingles
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from typing import FrozenSet, List, Sequence, Tuple
+
+from korean_text import UNICODE_ALNUM, extract_keywords
+
+BANDS = 20
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+# Candidate probability is 1 - (1 - s**ROWS)**BANDS: ~0.37 similarity is the knee, and a pair at
+# the default reuse threshold (0.5) becomes a candidate with probability ~0.93.
+DEFAULT_THRESHOLD = 0.5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x7091C)  # fixed: signatures must agree across processes and runs
+_PERMUTATIONS: Tuple[Tuple[int, int], ...] = tuple(
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+)
+del _rng
+
+
+def shingles(topic: str, n: int = 2) -> FrozenSet[str]:
+    """Case-folded character n-grams within each keyword; the whole keyword when shorter than n."""
+    out = set()
+    for word in extract_keywords(topic, UNICODE_ALNUM, fold_case=True):
+        word = word.lower()
+        if len(word) <= n:
+            out.add(word)
+            continue
+        for i in range(len(word) - n + 1):
+            out.add(word[i : i + n])
+    if not out and topic.strip():
+        out.add(topic.strip().lower())
+    return frozenset(out)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signature(items: FrozenSet[str]) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big") for item in items]
+    if not hashes:
+        return [_PRIME] * NUM_PERM
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(sig: Sequence[int]) -> List[Tuple[int, str]]:
+    """(band, bucket) pairs; a bucket is the band's rows hashed into one short key."""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS : (band + 1) * ROWS]
+        bucket = hashlib.blake2b(",".join(map(str, rows)).encode("ascii"), digest_size=8).hexdigest()
+        keys.append((band, bucket))
+    return keys